@@ -0,0 +1,64 @@
+"""
+Measures render time per page for each render profile.
+
+Usage:
+    python benchmarks/render_profiles.py path/to/document.pdf [profile ...]
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from parallex.file_management.converter import convert_pdf_to_images
+from parallex.models.raw_file import RawFile
+from parallex.models.render_profile import RENDER_PROFILES
+
+
+async def benchmark_profile(pdf_path: Path, profile_name: str) -> None:
+    raw_file = RawFile(
+        name=pdf_path.name,
+        path=str(pdf_path),
+        content_type="application/pdf",
+        given_name=pdf_path.name,
+        trace_id=uuid.uuid4(),
+    )
+    with tempfile.TemporaryDirectory() as temp_directory:
+        start = time.perf_counter()
+        image_files = await convert_pdf_to_images(
+            raw_file=raw_file,
+            temp_directory=temp_directory,
+            render_profile=RENDER_PROFILES[profile_name],
+        )
+        elapsed = time.perf_counter() - start
+        if not image_files:
+            print(f"{profile_name:>10}: conversion failed")
+            return
+
+        sizes = set()
+        for image_file in image_files:
+            with Image.open(image_file.path) as image:
+                sizes.add(image.size)
+        heights = sorted({height for _, height in sizes})
+        print(
+            f"{profile_name:>10}: {len(image_files)} pages, "
+            f"{elapsed * 1000 / len(image_files):8.1f} ms/page, "
+            f"heights {heights}"
+        )
+
+
+async def main() -> None:
+    pdf_path = Path(sys.argv[1])
+    profile_names = sys.argv[2:] or list(RENDER_PROFILES)
+    for profile_name in profile_names:
+        await benchmark_profile(pdf_path, profile_name)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
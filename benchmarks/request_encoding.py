@@ -0,0 +1,115 @@
+"""
+Measures encoded pages/sec and event loop lag for each encoding pool mode.
+
+"inline" encodes on the event loop, which is how requests were encoded before the
+encoding pool existed.
+
+Usage:
+    python benchmarks/request_encoding.py [pages] [page_kib]
+"""
+
+import asyncio
+import math
+import os
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from parallex.ai.encoding_pool import encoding_pool
+from parallex.ai.uploader import upload_images_for_processing
+from parallex.models.image_file import ImageFile
+
+
+class LocalClient:
+    """Stands in for OpenAIClient so only encoding is measured"""
+
+    def __init__(self):
+        self.uploaded_paths = []
+
+    async def upload(self, file_path: str) -> SimpleNamespace:
+        self.uploaded_paths.append(file_path)
+        return SimpleNamespace(
+            id=file_path, filename=file_path, purpose="batch", status="processed"
+        )
+
+
+async def measure_loop_lag(stop: asyncio.Event) -> float:
+    max_lag = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        max_lag = max(max_lag, time.perf_counter() - start - 0.001)
+    return max_lag
+
+
+async def benchmark_mode(mode: str, page_paths: list[str], temp_directory: str):
+    encoding_pool.configure(mode=mode)
+    trace_id = uuid.uuid4()
+
+    async def image_files():
+        for page_number, path in enumerate(page_paths, start=1):
+            yield ImageFile(
+                path=path,
+                page_number=page_number,
+                given_file_name="benchmark.pdf",
+                trace_id=trace_id,
+            )
+
+    # Start the workers before timing
+    await encoding_pool.run(len, page_paths)
+
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(stop))
+    client = LocalClient()
+    start = time.perf_counter()
+    await upload_images_for_processing(
+        client=client,
+        image_files=image_files(),
+        temp_directory=temp_directory,
+        trace_id=trace_id,
+        prompt_text="Convert the page to markdown",
+        model_name="gpt-4o-mini",
+    )
+    elapsed = time.perf_counter() - start
+    stop.set()
+    max_lag = await lag_task
+    encoding_pool.shutdown()
+    encoded_pages = 0
+    for path in client.uploaded_paths:
+        with open(path, "rb") as shard:
+            encoded_pages += sum(1 for _ in shard)
+    assert encoded_pages == len(
+        page_paths
+    ), f"{mode}: {encoded_pages} of {len(page_paths)} pages were encoded"
+    print(
+        f"{mode:>8}: {len(page_paths) / elapsed:8.1f} pages/sec, "
+        f"max loop lag {max_lag * 1000:7.1f} ms"
+    )
+
+
+async def main() -> None:
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    page_kib = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+    with tempfile.TemporaryDirectory() as temp_directory:
+        # Noise does not compress, so each PNG is about page_kib in size
+        side = math.isqrt(page_kib * 1024 // 3)
+        page_paths = []
+        for page_number in range(pages):
+            path = os.path.join(temp_directory, f"page-{page_number}.png")
+            Image.frombytes("RGB", (side, side), os.urandom(side * side * 3)).save(path)
+            page_paths.append(path)
+
+        for mode in ("inline", "thread", "process"):
+            with tempfile.TemporaryDirectory() as shard_directory:
+                await benchmark_mode(mode, page_paths, shard_directory)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
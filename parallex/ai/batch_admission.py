@@ -0,0 +1,212 @@
+import asyncio
+import heapq
+import itertools
+import re
+from collections import defaultdict
+from typing import Optional
+
+from openai import BadRequestError, DefaultAsyncHttpxClient
+
+from parallex.ai.batch_poller import batch_poller
+from parallex.ai.open_ai_client import OpenAIClient
+from parallex.file_management.remote_file_handler import RemoteFileHandler
+from parallex.utils.logger import logger
+
+QUOTA_RECHECK_INTERVAL = 60  # Seconds to wait when other processes hold the quota
+MAX_TRACKING_SECONDS = 25 * 60 * 60  # Batches have a 24h completion window
+_ENQUEUED_LIMIT_PATTERN = re.compile(
+    r"enqueued token limit.*?limit:\s*([\d,]+)", re.IGNORECASE | re.DOTALL
+)
+
+
+class BatchAdmission:
+    """
+    Process-wide admission of batches against each model's enqueued token limit.
+
+    A batch is admitted once the estimated tokens of the batches already enqueued for its
+    model leave room for it, and is held locally until then. Held batches are admitted
+    in priority order, then in the order they arrived, as enqueued batches finish.
+    Limits are set with configure() or learned from the first quota error of a model.
+    """
+
+    def __init__(self):
+        self._limits: dict[str, int] = {}
+        self._enqueued: dict[str, int] = defaultdict(int)
+        self._held: dict[str, list] = defaultdict(list)
+        self._release_waiters: dict[str, list[asyncio.Future]] = defaultdict(list)
+        self._arrival = itertools.count()
+        self._tracking_clients: dict[tuple, list] = {}
+        self._tracking_tasks: set[asyncio.Task] = set()
+
+    def configure(self, model_name: str, enqueued_token_limit: Optional[int]) -> None:
+        """Sets the enqueued token limit of a model. None removes it."""
+        if enqueued_token_limit is None:
+            self._limits.pop(model_name, None)
+        else:
+            self._limits[model_name] = enqueued_token_limit
+        self._admit_held(model_name)
+
+    def enqueued_tokens(self, model_name: str) -> int:
+        return self._enqueued[model_name]
+
+    async def admit(self, model_name: str, tokens: int, priority: int = 0) -> None:
+        """Waits until the batch fits in the model's quota and reserves its tokens"""
+        held = self._held[model_name]
+        if not held and self._fits(model_name, tokens):
+            self._enqueued[model_name] += tokens
+            return
+        admitted = asyncio.get_running_loop().create_future()
+        heapq.heappush(held, (-priority, next(self._arrival), tokens, admitted))
+        logger.info(
+            f"holding batch of {tokens} tokens for {model_name} quota - "
+            f"{self._enqueued[model_name]} tokens enqueued"
+        )
+        try:
+            await admitted
+        except asyncio.CancelledError:
+            if admitted.done() and not admitted.cancelled():
+                self.release(model_name, tokens)
+            else:
+                admitted.cancel()
+                self._admit_held(model_name)
+            raise
+
+    def release(self, model_name: str, tokens: int) -> None:
+        """Returns the tokens of a batch that finished or was never created"""
+        self._enqueued[model_name] = max(0, self._enqueued[model_name] - tokens)
+        for waiter in self._release_waiters.pop(model_name, []):
+            if not waiter.done():
+                waiter.set_result(None)
+        self._admit_held(model_name)
+
+    async def wait_for_quota(
+        self, model_name: str, error: BadRequestError, tokens: int
+    ) -> None:
+        """
+        Learns the model's limit from a quota error and waits until a batch of this process
+        finishes, or QUOTA_RECHECK_INTERVAL when the quota is held elsewhere.
+        """
+        limit = enqueued_token_limit(error)
+        if limit is not None and self._limits.get(model_name) != limit:
+            logger.info(f"enqueued token limit for {model_name} is {limit}")
+            self._limits[model_name] = limit
+        timeout = None if self._enqueued[model_name] else QUOTA_RECHECK_INTERVAL
+        logger.info(
+            f"holding batch of {tokens} tokens until {model_name} quota frees up"
+        )
+        released = asyncio.get_running_loop().create_future()
+        self._release_waiters[model_name].append(released)
+        try:
+            await asyncio.wait_for(released, timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def track(
+        self, client: OpenAIClient, batch_id: str, model_name: str, tokens: int
+    ) -> asyncio.Task:
+        """
+        Releases the tokens of an admitted batch once it reaches a terminal status.
+
+        The batch is polled with a client of its own, since the caller's client may be
+        closed while the batch is still enqueued. Tokens are held while polls fail. The
+        task is referenced until it finishes, so callers do not need to keep it.
+        """
+        task = asyncio.create_task(
+            self._release_when_finished(client, batch_id, model_name, tokens)
+        )
+        self._tracking_tasks.add(task)
+        task.add_done_callback(self._tracking_tasks.discard)
+        return task
+
+    async def _release_when_finished(
+        self, client: OpenAIClient, batch_id: str, model_name: str, tokens: int
+    ) -> None:
+        tracking_client = None
+        try:
+            tracking_client = self._acquire_tracking_client(client)
+            async with asyncio.timeout(MAX_TRACKING_SECONDS):
+                await self._poll_until_finished(tracking_client, batch_id)
+        except TimeoutError:
+            logger.warning(f"Stopped tracking batch {batch_id} for quota")
+        except Exception as e:
+            logger.error(f"Could not track batch {batch_id} for quota: {e}")
+        finally:
+            self.release(model_name, tokens)
+            if tracking_client is not None:
+                await self._release_tracking_client(client)
+
+    async def _poll_until_finished(self, client: OpenAIClient, batch_id: str) -> None:
+        failures = 0
+        while True:
+            try:
+                await batch_poller.wait_until_finished(client=client, batch_id=batch_id)
+                return
+            except Exception as e:
+                logger.warning(
+                    f"Could not poll batch {batch_id} for quota, holding its tokens: {e}"
+                )
+            # The first retry may only have shared a failing poll of the caller's client
+            if failures:
+                await asyncio.sleep(QUOTA_RECHECK_INTERVAL)
+            failures += 1
+
+    def _acquire_tracking_client(self, client: OpenAIClient) -> OpenAIClient:
+        key = (asyncio.get_running_loop(), client.connection)
+        entry = self._tracking_clients.get(key)
+        if entry is None:
+            entry = [self._open_tracking_client(client), 0]
+            self._tracking_clients[key] = entry
+        entry[1] += 1
+        return entry[0]
+
+    async def _release_tracking_client(self, client: OpenAIClient) -> None:
+        key = (asyncio.get_running_loop(), client.connection)
+        entry = self._tracking_clients[key]
+        entry[1] -= 1
+        if entry[1] == 0:
+            del self._tracking_clients[key]
+            await entry[0].connection.close()
+
+    @staticmethod
+    def _open_tracking_client(client: OpenAIClient) -> OpenAIClient:
+        """A client on the same account as client, with connections of its own"""
+        return OpenAIClient(
+            remote_file_handler=RemoteFileHandler(),
+            api_key_env_name="",
+            limiter=client.limiter,
+            openai_client=client.connection.copy(http_client=DefaultAsyncHttpxClient()),
+        )
+
+    def _fits(self, model_name: str, tokens: int) -> bool:
+        limit = self._limits.get(model_name)
+        enqueued = self._enqueued[model_name]
+        # A batch larger than the limit is still admitted on its own
+        return limit is None or enqueued == 0 or enqueued + tokens <= limit
+
+    def _admit_held(self, model_name: str) -> None:
+        held = self._held[model_name]
+        while held:
+            _, _, tokens, admitted = held[0]
+            if admitted.done():
+                heapq.heappop(held)
+                continue
+            if not self._fits(model_name, tokens):
+                return
+            heapq.heappop(held)
+            self._enqueued[model_name] += tokens
+            admitted.set_result(None)
+
+
+def enqueued_token_limit(error: BadRequestError) -> Optional[int]:
+    """Reads the limit from an enqueued token limit error. Returns None for other errors."""
+    match = _ENQUEUED_LIMIT_PATTERN.search(str(error))
+    if match is None:
+        return None
+    return int(match.group(1).replace(",", ""))
+
+
+def is_quota_error(error: BadRequestError) -> bool:
+    return "enqueued token limit" in str(error).lower()
+
+
+batch_admission = BatchAdmission()
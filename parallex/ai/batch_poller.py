@@ -0,0 +1,213 @@
+import asyncio
+import time
+from collections import defaultdict
+from typing import Optional
+
+from openai import APIError
+from openai.types import Batch
+
+from parallex.ai.open_ai_client import OpenAIClient
+from parallex.exceptions.BatchProcessingError import BatchProcessingError
+from parallex.models.upload_batch import UploadBatch
+from parallex.utils.logger import logger
+
+MIN_POLL_INTERVAL = 5
+MAX_POLL_INTERVAL = 120
+BACKOFF_FACTOR = 1.5
+LIST_THRESHOLD = 3  # Due batches of one connection before listing replaces retrieving
+MAX_LIST_PAGES = 5
+LIST_PAGE_SIZE = 100
+
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled", "canceled")
+QUICK_STATUSES = ("validating", "finalizing", "cancelling")
+
+
+class _WatchedBatch:
+    def __init__(self, client: OpenAIClient, batch_id: str):
+        self.client = client
+        self.batch_id = batch_id
+        self.waiters: list[asyncio.Future] = []
+        self.interval = MIN_POLL_INTERVAL
+        self.next_poll_at = time.monotonic() + MIN_POLL_INTERVAL
+        self.last_polled_at: Optional[float] = None
+        self.last_completed: Optional[int] = None
+
+    def schedule(self, batch: Batch, now: float) -> None:
+        """Picks the next poll time from the batch status and request_counts progress"""
+        counts = batch.request_counts
+        if batch.status in QUICK_STATUSES or counts is None or not counts.total:
+            self.interval = MIN_POLL_INTERVAL
+        else:
+            done = counts.completed + counts.failed
+            if (
+                self.last_completed is not None
+                and self.last_polled_at is not None
+                and done > self.last_completed
+            ):
+                rate = (done - self.last_completed) / (now - self.last_polled_at)
+                remaining_seconds = (counts.total - done) / rate
+                self.interval = remaining_seconds / 2
+            else:
+                self.interval *= BACKOFF_FACTOR
+            self.last_completed = done
+        self.interval = min(max(self.interval, MIN_POLL_INTERVAL), MAX_POLL_INTERVAL)
+        self.last_polled_at = now
+        self.next_poll_at = now + self.interval
+
+    def resolve(self, batch: Batch) -> None:
+        self._settle(result=batch)
+
+    def fail(self, error: Exception) -> None:
+        self._settle(error=error)
+
+    def _settle(
+        self, result: Optional[Batch] = None, error: Optional[Exception] = None
+    ) -> None:
+        for waiter in self.waiters:
+            if waiter.done():
+                continue
+            if error is not None:
+                waiter.set_exception(error)
+            else:
+                waiter.set_result(result)
+
+
+class BatchPoller:
+    """
+    Process-wide poller for every outstanding batch.
+
+    One task polls all watched batches instead of a sleeping loop per batch. Batches of
+    the same connection that are due together are fetched with a single batch listing, and
+    each batch's interval adapts to its status and to the progress of its request_counts.
+    """
+
+    def __init__(self):
+        self._watched: dict[str, _WatchedBatch] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    async def watch(self, client: OpenAIClient, batch: UploadBatch) -> Batch:
+        """Waits until the batch completes and returns it. Raises BatchProcessingError if it does not."""
+        finished = await self.wait_until_finished(client=client, batch_id=batch.id)
+        if finished.status == "completed":
+            return finished
+        if finished.status == "failed":
+            error_message = getattr(finished, "errors", None) or "Unknown error"
+            raise BatchProcessingError(f"Batch processing failed: {error_message}")
+        if finished.status == "expired":
+            raise BatchProcessingError("Batch processing expired")
+        raise BatchProcessingError("Batch processing was canceled")
+
+    async def wait_until_finished(self, client: OpenAIClient, batch_id: str) -> Batch:
+        """Waits until the batch reaches a terminal status and returns it"""
+        waiter = asyncio.get_running_loop().create_future()
+        watched = self._watched.get(batch_id)
+        if watched is None:
+            watched = _WatchedBatch(client=client, batch_id=batch_id)
+            self._watched[batch_id] = watched
+        watched.waiters.append(waiter)
+        self._ensure_running()
+        try:
+            return await waiter
+        finally:
+            watched.waiters.remove(waiter)
+            if not watched.waiters and self._watched.get(batch_id) is watched:
+                del self._watched[batch_id]
+
+    def _ensure_running(self) -> None:
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        else:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while self._watched:
+            now = time.monotonic()
+            next_poll_at = min(w.next_poll_at for w in self._watched.values())
+            if next_poll_at > now:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), timeout=next_poll_at - now
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            # Clients of one session share a connection and the account behind it
+            due_by_connection: dict[object, list[_WatchedBatch]] = defaultdict(list)
+            for watched in self._watched.values():
+                if watched.next_poll_at <= now:
+                    due_by_connection[watched.client.connection].append(watched)
+            try:
+                await asyncio.gather(
+                    *(self._poll(due) for due in due_by_connection.values())
+                )
+            except Exception as e:
+                logger.error(f"Error while polling batches: {e}")
+                for due in due_by_connection.values():
+                    for watched in due:
+                        watched.fail(e)
+                        self._watched.pop(watched.batch_id, None)
+
+    async def _poll(self, due: list[_WatchedBatch]) -> None:
+        batches: dict[str, Batch] = {}
+        if len(due) >= LIST_THRESHOLD:
+            batches = await self._list(due[0].client, {w.batch_id for w in due})
+
+        missing = [w for w in due if w.batch_id not in batches]
+        retrieved = await asyncio.gather(
+            *(w.client.retrieve_batch(w.batch_id) for w in missing),
+            return_exceptions=True,
+        )
+        for watched, result in zip(missing, retrieved):
+            if isinstance(result, APIError):
+                logger.error(f"APIError while retrieving batch status: {str(result)}")
+                watched.fail(
+                    BatchProcessingError(
+                        f"API error occurred while retrieving batch status: {str(result)}"
+                    )
+                )
+                self._watched.pop(watched.batch_id, None)
+            elif isinstance(result, Exception):
+                watched.fail(result)
+                self._watched.pop(watched.batch_id, None)
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                batches[watched.batch_id] = result
+
+        now = time.monotonic()
+        for watched in due:
+            batch = batches.get(watched.batch_id)
+            if batch is None:
+                continue
+            if batch.status in TERMINAL_STATUSES:
+                watched.client.track_batch_files(batch)
+                watched.resolve(batch)
+                self._watched.pop(watched.batch_id, None)
+            else:
+                watched.schedule(batch, now)
+
+    async def _list(
+        self, client: OpenAIClient, batch_ids: set[str]
+    ) -> dict[str, Batch]:
+        """Finds the given batches in the account's most recent batches"""
+        found: dict[str, Batch] = {}
+        after = None
+        try:
+            for _ in range(MAX_LIST_PAGES):
+                page, has_more = await client.list_batches(
+                    limit=LIST_PAGE_SIZE, after=after
+                )
+                found.update({b.id: b for b in page if b.id in batch_ids})
+                if len(found) == len(batch_ids) or not has_more or not page:
+                    break
+                after = page[-1].id
+        except APIError as e:
+            logger.warning(f"APIError while listing batches, retrieving instead: {e}")
+        return found
+
+
+batch_poller = BatchPoller()
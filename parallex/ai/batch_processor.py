@@ -3,73 +3,104 @@ from uuid import UUID
 from typing import Optional
 
 from openai import BadRequestError, APIError
+from openai.types import Batch
 
+from parallex.ai.batch_admission import batch_admission, is_quota_error
+from parallex.ai.batch_poller import batch_poller
 from parallex.ai.open_ai_client import OpenAIClient
 from parallex.exceptions.BatchCreationError import BatchCreationError
+from parallex.exceptions.BatchDeadlineError import BatchDeadlineError
 from parallex.exceptions.BatchProcessingError import BatchProcessingError
+from parallex.models.deadline_policy import DEFAULT_BATCH_TIMEOUT
 from parallex.models.upload_batch import build_batch, UploadBatch
 from parallex.utils.logger import logger
 
 
 async def create_batch(
-    client: OpenAIClient, file_id: str, trace_id: UUID
+    client: OpenAIClient,
+    file_id: str,
+    trace_id: UUID,
+    model_name: Optional[str] = None,
+    estimated_tokens: int = 0,
+    priority: int = 0,
 ) -> UploadBatch | None:
-    """Creates a Batch for the given file_id"""
-    max_retries = 10
+    """
+    Creates a Batch for the given file_id once the model's enqueued token quota has room for it.
+
+    Batches are held locally while the quota is full rather than retried blindly, and are
+    created in priority order as enqueued batches finish.
+    """
+    max_retries = 3
     backoff_delay = 5
+    attempt = 0
+    admission_key = model_name or ""
 
-    for attempt in range(max_retries):
+    while True:
+        await batch_admission.admit(admission_key, estimated_tokens, priority)
         try:
             batch_response = await client.create_batch(upload_file_id=file_id)
-            batch = build_batch(open_ai_batch=batch_response, trace_id=trace_id)
-            return batch
         except BadRequestError as e:
-            logger.warning(f"BadRequestError on attempt {attempt + 1}: {str(e)}")
-            if attempt == max_retries - 1:
+            batch_admission.release(admission_key, estimated_tokens)
+            if is_quota_error(e):
+                await batch_admission.wait_for_quota(admission_key, e, estimated_tokens)
+                continue
+            attempt += 1
+            logger.warning(f"BadRequestError on attempt {attempt}: {str(e)}")
+            if attempt == max_retries:
                 raise BatchCreationError(
                     f"Failed to create batch after {max_retries} attempts: {str(e)}"
                 )
             await asyncio.sleep(backoff_delay)
             backoff_delay *= 2
+            continue
         except APIError as e:
+            batch_admission.release(admission_key, estimated_tokens)
             logger.error(f"APIError on attempt {attempt + 1}: {str(e)}")
             raise BatchCreationError(
                 f"API error occurred while creating batch: {str(e)}"
             )
+        except BaseException:
+            batch_admission.release(admission_key, estimated_tokens)
+            raise
+        batch_admission.track(
+            client, batch_response.id, admission_key, estimated_tokens
+        )
+        return build_batch(open_ai_batch=batch_response, trace_id=trace_id)
 
 
 async def wait_for_batch_completion(
-    client: OpenAIClient, batch: UploadBatch
+    client: OpenAIClient,
+    batch: UploadBatch,
+    timeout: Optional[float] = DEFAULT_BATCH_TIMEOUT,
 ) -> Optional[str]:
     """Waits for Batch to complete and returns output_file_id when available"""
-    status = "validating"
-    delay = 5
-    max_attempts = 60  # 30 minutes maximum wait time
-    attempts = 0
-
-    while status not in ("completed", "failed", "canceled"):
-        await asyncio.sleep(delay)
-        try:
-            batch_response = await client.retrieve_batch(batch.id)
-            status = batch_response.status
-            delay = 30
-            attempts += 1
-
-            if status == "completed":
-                return batch_response.output_file_id
-            elif status == "failed":
-                error_message = getattr(batch_response, "error", "Unknown error")
-                raise BatchProcessingError(f"Batch processing failed: {error_message}")
-            elif status == "canceled":
-                raise BatchProcessingError("Batch processing was canceled")
+    try:
+        batch_response = await asyncio.wait_for(
+            batch_poller.watch(client=client, batch=batch),
+            timeout=timeout,
+        )
+    except asyncio.TimeoutError:
+        raise BatchDeadlineError("Batch processing timed out")
+    return batch_response.output_file_id
 
-            if attempts >= max_attempts:
-                raise BatchProcessingError("Batch processing timed out")
-
-        except APIError as e:
-            logger.error(f"APIError while retrieving batch status: {str(e)}")
-            raise BatchProcessingError(
-                f"API error occurred while retrieving batch status: {str(e)}"
-            )
 
-    return None
+async def cancel_batch(
+    client: OpenAIClient, batch: UploadBatch, grace: float
+) -> Optional[Batch]:
+    """Cancels a Batch and waits up to grace seconds for it to stop. Returns the stopped Batch, or None."""
+    try:
+        await client.cancel_batch(batch.id)
+    except APIError as e:
+        # The batch may have finished in the meantime
+        logger.warning(f"APIError while cancelling batch {batch.id}: {str(e)}")
+    try:
+        return await asyncio.wait_for(
+            batch_poller.wait_until_finished(client=client, batch_id=batch.id),
+            timeout=grace,
+        )
+    except asyncio.TimeoutError:
+        logger.warning(f"batch did not stop within {grace} seconds - {batch.id}")
+        return None
+    except BatchProcessingError as e:
+        logger.warning(f"Error while waiting for batch to stop: {str(e)}")
+        return None
@@ -0,0 +1,66 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Literal, Optional, TypeVar
+
+EncodingMode = Literal["process", "thread", "inline"]
+ResultType = TypeVar("ResultType")
+
+
+class EncodingPool:
+    """
+    Process-wide workers that encode request lines into JSONL shards.
+
+    "thread" (default) encodes in this process but off the event loop, "process" spreads
+    encoding across cores, and "inline" runs it on the event loop. Base64 encoding and
+    file I/O release the GIL, so threads keep up in most cases.
+    """
+
+    def __init__(
+        self, mode: EncodingMode = "thread", max_workers: Optional[int] = None
+    ):
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor: Optional[Executor] = None
+
+    def configure(
+        self, mode: Optional[EncodingMode] = None, max_workers: Optional[int] = None
+    ) -> None:
+        """Changes the mode or size of the pool. Takes effect for work submitted after the call."""
+        if max_workers is not None and max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.shutdown(wait=False)
+        self.mode = mode or self.mode
+        self.max_workers = max_workers or self.max_workers
+
+    async def run(self, function: Callable[..., ResultType], *args) -> ResultType:
+        if self.mode == "inline":
+            return function(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(), partial(function, *args)
+        )
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="parallex-encoding",
+                )
+        return self._executor
+
+
+encoding_pool = EncodingPool()
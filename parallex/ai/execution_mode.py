@@ -0,0 +1,31 @@
+from typing import Literal, Optional
+
+from parallex.models.deadline_policy import DeadlinePolicy
+
+ExecutionMode = Literal["batch", "realtime", "auto"]
+
+AUTO_REALTIME_MAX_REQUESTS = 20
+AUTO_REALTIME_MAX_TIMEOUT = 10 * 60  # Batches rarely finish sooner
+
+
+def select_execution_mode(
+    execution_mode: ExecutionMode,
+    request_count: Optional[int],
+    deadline_policy: Optional[DeadlinePolicy] = None,
+) -> Literal["batch", "realtime"]:
+    """
+    Resolves "auto" to "realtime" for jobs of at most AUTO_REALTIME_MAX_REQUESTS requests
+    or with a deadline shorter than AUTO_REALTIME_MAX_TIMEOUT, and to "batch" otherwise.
+    """
+    if execution_mode not in ("batch", "realtime", "auto"):
+        raise ValueError(
+            f"Unknown execution mode '{execution_mode}'. Use 'batch', 'realtime' or 'auto'"
+        )
+    if execution_mode != "auto":
+        return execution_mode
+    if request_count is not None and request_count <= AUTO_REALTIME_MAX_REQUESTS:
+        return "realtime"
+    timeout = (deadline_policy or DeadlinePolicy()).timeout
+    if timeout is not None and timeout < AUTO_REALTIME_MAX_TIMEOUT:
+        return "realtime"
+    return "batch"
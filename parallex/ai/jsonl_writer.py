@@ -0,0 +1,259 @@
+import asyncio
+import base64
+import os
+from typing import Awaitable, Callable, List, Optional
+from uuid import UUID
+
+from parallex.ai.encoding_pool import EncodingPool, encoding_pool
+from parallex.ai.shard_planner import ShardPlanner
+from parallex.file_management.utils import file_in_temp_dir
+from parallex.models.batch_file import BatchFile
+from parallex.utils.logger import logger
+
+WRITE_BUFFER_SIZE = 1024 * 1024
+BASE64_READ_SIZE = 3 * 64 * 1024  # Multiple of 3 so chunks encode without padding
+SEGMENT_SIZE = 4 * 1024 * 1024  # Bytes of request lines handed to a worker at a time
+
+# Called with the path and the estimated input tokens of each sealed shard
+ShardSealedCallable = Callable[[str, int], Awaitable[BatchFile]]
+# Called with the path of each file once its base64 encoding is written into a shard
+SourceWrittenCallable = Callable[[str], None]
+# (prefix, path of a file whose base64 encoding follows the prefix or None, suffix,
+# size of that file when the line was appended)
+SegmentLine = tuple[bytes, Optional[str], bytes, int]
+# (path of a file that could not be encoded, reason)
+SkippedSource = tuple[str, str]
+
+
+class JsonlShardWriter:
+    """
+    Writes request lines into size-limited JSONL shards using the encoding pool.
+
+    The size of every line is known before it is encoded, so lines are assigned their
+    byte offset in the shard up front and handed to workers in contiguous segments.
+    Workers encode and write segments in parallel while the event loop keeps
+    reading pages. A line that the shard planner does not fit into the open shard seals
+    it and starts the next one; a sealed shard is handed to on_shard_sealed as soon as its
+    segments are written, while later lines are still being encoded. on_source_written is
+    called with each file encoded into a shard once its segment is written.
+
+    A file that can no longer be read, or whose size changed, is logged and its line is
+    left out of the shard, as with any other page that fails to encode.
+    """
+
+    def __init__(
+        self,
+        temp_directory: str,
+        trace_id: UUID,
+        on_shard_sealed: ShardSealedCallable,
+        planner: Optional[ShardPlanner] = None,
+        total_requests: Optional[int] = None,
+        pool: EncodingPool = encoding_pool,
+        on_source_written: Optional[SourceWrittenCallable] = None,
+    ):
+        self.temp_directory = temp_directory
+        self.trace_id = trace_id
+        self.on_shard_sealed = on_shard_sealed
+        self.planner = planner or ShardPlanner()
+        self.total_requests = total_requests
+        self.pool = pool
+        self.on_source_written = on_source_written
+        self._shard_index = 0
+        self._shard_path: Optional[str] = None
+        self._shard_size = 0
+        self._shard_requests = 0
+        self._shard_tokens = 0
+        self._segment: List[SegmentLine] = []
+        self._segment_start = 0
+        self._segment_writes: List[asyncio.Task] = []
+        self._sealed_shards: List[asyncio.Task] = []
+        self._segments_in_flight = asyncio.Semaphore(2 * pool.max_workers)
+
+    @property
+    def shard_path(self) -> Optional[str]:
+        return self._shard_path
+
+    async def write(self, line: bytes, tokens: int = 0) -> None:
+        """Appends one request line, which must end with a newline, estimated at tokens input tokens"""
+        await self._append((line, None, b"", 0), len(line), tokens)
+
+    async def write_base64_line(
+        self, prefix: bytes, source_path: str, suffix: bytes, tokens: int = 0
+    ) -> None:
+        """
+        Appends a request line whose middle is the base64 encoding of source_path.
+
+        Workers encode the file in fixed-size chunks straight into the shard, so memory
+        use does not grow with the size of the file. suffix must end with a newline.
+        """
+        source_size = os.path.getsize(source_path)
+        line_size = len(prefix) + 4 * -(-source_size // 3) + len(suffix)
+        await self._append(
+            (prefix, source_path, suffix, source_size), line_size, tokens
+        )
+
+    async def flush(self) -> None:
+        """Hands the lines appended so far to the workers without sealing the shard"""
+        await self._dispatch_segment()
+
+    async def close(self) -> List[BatchFile]:
+        """Seals the open shard and returns the batch files of every shard in order"""
+        if self._shard_requests:
+            await self._seal()
+        batch_files = await asyncio.gather(*self._sealed_shards)
+        return [batch_file for batch_file in batch_files if batch_file is not None]
+
+    def abort(self) -> None:
+        """Cancels pending segment writes and uploads of sealed shards"""
+        for task in self._segment_writes + self._sealed_shards:
+            task.cancel()
+
+    async def _append(self, line: SegmentLine, line_size: int, tokens: int) -> None:
+        if self._shard_requests and not self.planner.fits(
+            shard_bytes=self._shard_size,
+            shard_requests=self._shard_requests,
+            shard_tokens=self._shard_tokens,
+            line_bytes=line_size,
+            line_tokens=tokens,
+            total_requests=self.total_requests,
+        ):
+            await self._seal()
+        if self._shard_path is None:
+            self._open()
+        self._segment.append(line)
+        self._shard_size += line_size
+        self._shard_requests += 1
+        self._shard_tokens += tokens
+        if self._shard_size - self._segment_start >= SEGMENT_SIZE:
+            await self._dispatch_segment()
+
+    def _open(self) -> None:
+        self._shard_path = file_in_temp_dir(
+            directory=self.temp_directory,
+            file_name=f"{self.trace_id}-{self._shard_index}.jsonl",
+        )
+        open(self._shard_path, "wb").close()
+        self._shard_size = 0
+        self._shard_requests = 0
+        self._shard_tokens = 0
+        self._segment_start = 0
+
+    async def _dispatch_segment(self) -> None:
+        if not self._segment:
+            return
+        await self._segments_in_flight.acquire()
+        self._segment_writes.append(
+            asyncio.create_task(
+                self._write_segment(
+                    self._shard_path,
+                    self._segment_start,
+                    self._shard_size - self._segment_start,
+                    self._segment,
+                )
+            )
+        )
+        self._segment = []
+        self._segment_start = self._shard_size
+        await asyncio.sleep(0)  # Let the event loop run between segments
+
+    async def _write_segment(
+        self, shard_path: str, offset: int, size: int, segment: List[SegmentLine]
+    ) -> List[SkippedSource]:
+        try:
+            skipped = await self.pool.run(
+                write_segment, shard_path, offset, size, segment
+            )
+        finally:
+            self._segments_in_flight.release()
+        for source_path, reason in skipped:
+            logger.error(f"Error encoding image {source_path}: {reason}")
+        if self.on_source_written is not None:
+            for _, source_path, _, _ in segment:
+                if source_path is not None:
+                    self.on_source_written(source_path)
+        return skipped
+
+    async def _seal(self) -> None:
+        await self._dispatch_segment()
+        self._sealed_shards.append(
+            asyncio.create_task(
+                self._finish_shard(
+                    self._shard_path, self._shard_tokens, self._segment_writes
+                )
+            )
+        )
+        self._shard_index += 1
+        self._shard_path = None
+        self._shard_size = 0
+        self._shard_requests = 0
+        self._shard_tokens = 0
+        self._segment_writes = []
+
+    async def _finish_shard(
+        self, shard_path: str, shard_tokens: int, segment_writes: List[asyncio.Task]
+    ) -> Optional[BatchFile]:
+        skipped = await asyncio.gather(*segment_writes)
+        if any(skipped):
+            if not await self.pool.run(remove_skipped_lines, shard_path):
+                os.remove(shard_path)
+                return None
+        return await self.on_shard_sealed(shard_path, shard_tokens)
+
+
+def write_segment(
+    shard_path: str, offset: int, size: int, segment: List[SegmentLine]
+) -> List[SkippedSource]:
+    """
+    Encodes a contiguous run of request lines into the shard at offset. Runs in the encoding pool.
+
+    The line of a file that cannot be encoded is blanked out so that every other line
+    keeps its offset, and the file is returned with the reason it was skipped.
+    """
+    skipped: List[SkippedSource] = []
+    with open(shard_path, "r+b", buffering=WRITE_BUFFER_SIZE) as shard:
+        shard.seek(offset)
+        for prefix, source_path, suffix, source_size in segment:
+            line_start = shard.tell()
+            if source_path is None:
+                shard.write(prefix + suffix)
+                continue
+            line_size = len(prefix) + 4 * -(-source_size // 3) + len(suffix)
+            try:
+                shard.write(prefix)
+                _write_base64(shard, source_path, source_size)
+                shard.write(suffix)
+            except OSError as e:
+                skipped.append((source_path, str(e)))
+                shard.seek(line_start)
+                shard.write(b" " * (line_size - 1) + b"\n")
+        written = shard.tell() - offset
+    if written != size:
+        raise ValueError(
+            f"Wrote {written} bytes to {shard_path} at {offset}, expected {size}"
+        )
+    return skipped
+
+
+def remove_skipped_lines(shard_path: str) -> int:
+    """Rewrites the shard without the lines blanked out by write_segment and returns the lines kept"""
+    kept = 0
+    compacted_path = f"{shard_path}.tmp"
+    with open(shard_path, "rb") as shard, open(
+        compacted_path, "wb", buffering=WRITE_BUFFER_SIZE
+    ) as compacted:
+        for line in shard:
+            if line.strip():
+                compacted.write(line)
+                kept += 1
+    os.replace(compacted_path, shard_path)
+    return kept
+
+
+def _write_base64(shard, source_path: str, source_size: int) -> None:
+    remaining = source_size
+    with open(source_path, "rb") as source:
+        while remaining and (chunk := source.read(min(BASE64_READ_SIZE, remaining))):
+            shard.write(base64.b64encode(chunk))
+            remaining -= len(chunk)
+        if remaining or source.read(1):
+            raise OSError(f"size changed from {source_size} bytes")
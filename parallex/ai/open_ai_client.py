@@ -1,54 +1,249 @@
+import asyncio
 import os
-from openai import AsyncOpenAI
-from openai._legacy_response import HttpxBinaryResponseContent
+import re
+import time
+from typing import AsyncIterator, Awaitable, Callable, Mapping, Optional, TypeVar
+
+from openai import AsyncOpenAI, RateLimitError
+from openai._legacy_response import LegacyAPIResponse
 from openai.types import FileObject, FileDeleted, Batch
+from openai.types.chat import ChatCompletion
 
+from parallex.ai.token_estimator import estimate_request_tokens
 from parallex.file_management.remote_file_handler import RemoteFileHandler
 from parallex.utils.logger import logger
 
+RATE_LIMIT_WINDOW = 60  # Seconds over which RPM and TPM limits refill
+RATE_LIMIT_KINDS = ("requests", "tokens")
+MAX_RATE_LIMIT_RETRIES = 5
+_DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_SECONDS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+ResponseType = TypeVar("ResponseType")
+
+
+class TokenBucket:
+    """Holds up to capacity units that refill continuously. Waiters are served in arrival order."""
+
+    def __init__(self, capacity: float):
+        self.capacity = capacity
+        self.level = capacity
+        self.refill_per_second = capacity / RATE_LIMIT_WINDOW
+        self._updated_at = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def update(
+        self, capacity: float, remaining: float, reset_seconds: Optional[float] = None
+    ) -> None:
+        """Resizes the bucket from a limit, the remaining amount and the time until it is fully refilled"""
+        self._refill()
+        self.capacity = capacity
+        self.level = min(self.level, remaining)
+        if reset_seconds and remaining < capacity:
+            self.refill_per_second = (capacity - remaining) / reset_seconds
+        else:
+            self.refill_per_second = capacity / RATE_LIMIT_WINDOW
+
+    async def acquire(self, amount: float) -> None:
+        amount = min(amount, self.capacity)
+        async with self._get_lock():
+            while True:
+                self._refill()
+                if self.level >= amount:
+                    self.level -= amount
+                    return
+                await asyncio.sleep((amount - self.level) / self.refill_per_second)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        refilled = (now - self._updated_at) * self.refill_per_second
+        self.level = min(self.capacity, self.level + refilled)
+        self._updated_at = now
+
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+
+class RateLimiter:
+    """
+    Process-wide request and token buckets per model or endpoint, shared by every client.
+
+    Calls wait for room in the buckets instead of being sent into a 429. Buckets are
+    sized from the x-ratelimit-* headers of each response, or up front with configure().
+    Calls to a model or endpoint are not limited until its limits are known.
+    """
+
+    def __init__(self):
+        self._buckets: dict[str, dict[str, TokenBucket]] = {}
+
+    def configure(
+        self,
+        key: str,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+    ) -> None:
+        """Sets the limits of a model or endpoint before any response reports them"""
+        limits = {"requests": requests_per_minute, "tokens": tokens_per_minute}
+        for kind, limit in limits.items():
+            if limit is not None:
+                self._buckets.setdefault(key, {})[kind] = TokenBucket(limit)
+
+    async def acquire(self, key: str, tokens: int = 0) -> None:
+        buckets = self._buckets.get(key, {})
+        if "requests" in buckets:
+            await buckets["requests"].acquire(1)
+        if tokens and "tokens" in buckets:
+            await buckets["tokens"].acquire(tokens)
+
+    def update(self, key: str, headers: Mapping[str, str]) -> bool:
+        """Refills the buckets of key from rate limit headers. Returns whether any were present."""
+        updated = False
+        for kind in RATE_LIMIT_KINDS:
+            try:
+                limit = float(headers[f"x-ratelimit-limit-{kind}"])
+                remaining = float(headers[f"x-ratelimit-remaining-{kind}"])
+            except (KeyError, ValueError):
+                continue
+            reset_seconds = _parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+            buckets = self._buckets.setdefault(key, {})
+            if kind not in buckets:
+                buckets[kind] = TokenBucket(limit)
+            buckets[kind].update(limit, remaining, reset_seconds)
+            updated = True
+        return updated
+
+
+rate_limiter = RateLimiter()
+
 
 class OpenAIClient:
     def __init__(
         self,
         remote_file_handler: RemoteFileHandler,
         api_key_env_name: str,
+        limiter: RateLimiter = rate_limiter,
+        openai_client: Optional[AsyncOpenAI] = None,
     ):
         self.file_handler = remote_file_handler
+        self.limiter = limiter
 
-        self._client = AsyncOpenAI(
+        self._client = openai_client or AsyncOpenAI(
             api_key=os.getenv(api_key_env_name),
         )
 
+    @property
+    def connection(self) -> AsyncOpenAI:
+        """The underlying OpenAI client, which clients of one session share"""
+        return self._client
+
     async def upload(self, file_path: str) -> FileObject:
-        file = await self._client.files.create(
-            file=open(file_path, "rb"), purpose="batch"
-        )
+        async def request() -> LegacyAPIResponse[FileObject]:
+            with open(file_path, "rb") as file:
+                return await self._client.files.with_raw_response.create(
+                    file=file, purpose="batch"
+                )
+
+        file = await self._rate_limited("files", request)
         self.file_handler.add_file(file.id)
         return file
 
     async def create_batch(self, upload_file_id: str) -> Batch:
-        batch = await self._client.batches.create(
-            input_file_id=upload_file_id,
-            endpoint="/v1/chat/completions",
-            completion_window="24h",
+        batch = await self._rate_limited(
+            "batches",
+            lambda: self._client.batches.with_raw_response.create(
+                input_file_id=upload_file_id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h",
+            ),
         )
-        self.file_handler.add_file(batch.input_file_id)
-        self.file_handler.add_file(batch.output_file_id)
-        self.file_handler.add_file(batch.error_file_id)
+        self.track_batch_files(batch)
         return batch
 
     async def retrieve_batch(self, batch_id: str) -> Batch:
-        batch = await self._client.batches.retrieve(batch_id)
+        batch = await self._rate_limited(
+            "batches", lambda: self._client.batches.with_raw_response.retrieve(batch_id)
+        )
+        self.track_batch_files(batch)
+        return batch
+
+    async def cancel_batch(self, batch_id: str) -> Batch:
+        batch = await self._rate_limited(
+            "batches", lambda: self._client.batches.with_raw_response.cancel(batch_id)
+        )
+        self.track_batch_files(batch)
+        return batch
+
+    async def list_batches(
+        self, limit: int = 100, after: Optional[str] = None
+    ) -> tuple[list[Batch], bool]:
+        """Lists the most recent batches of the account. Returns the batches and whether there are more."""
+        params = {"limit": limit}
+        if after is not None:
+            params["after"] = after
+        page = await self._rate_limited(
+            "batches", lambda: self._client.batches.with_raw_response.list(**params)
+        )
+        return page.data, page.has_more
+
+    def track_batch_files(self, batch: Batch) -> None:
         self.file_handler.add_file(batch.input_file_id)
         self.file_handler.add_file(batch.output_file_id)
         self.file_handler.add_file(batch.error_file_id)
-        return batch
 
-    async def retrieve_file(self, file_id: str) -> HttpxBinaryResponseContent:
-        return await self._client.files.content(file_id)
+    async def create_chat_completion(self, body: dict) -> ChatCompletion:
+        """Sends a request body of a batch line to the Chat Completions API"""
+        return await self._rate_limited(
+            body["model"],
+            lambda: self._client.chat.completions.with_raw_response.create(**body),
+            tokens=estimate_request_tokens(body),
+        )
+
+    async def stream_file(self, file_id: str) -> AsyncIterator[bytes]:
+        """Streams the content of a file in chunks as it downloads"""
+        async with self._client.files.with_streaming_response.content(
+            file_id
+        ) as response:
+            async for chunk in response.iter_bytes():
+                yield chunk
 
     async def delete_file(self, file_id: str) -> FileDeleted | None:
         try:
             return await self._client.files.delete(file_id)
         except Exception as e:
             logger.info(f"Did not delete file: {e}")
+
+    async def _rate_limited(
+        self,
+        key: str,
+        request: Callable[[], Awaitable[LegacyAPIResponse[ResponseType]]],
+        tokens: int = 0,
+    ) -> ResponseType:
+        """Sends a request once the rate limiter has room for it, and refills the limiter from the response"""
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            await self.limiter.acquire(key, tokens)
+            try:
+                response = await request()
+            except RateLimitError as e:
+                if attempt == MAX_RATE_LIMIT_RETRIES:
+                    raise
+                logger.warning(f"Rate limited on {key}, queueing the request: {e}")
+                if not self.limiter.update(key, e.response.headers):
+                    await asyncio.sleep(2**attempt)
+                continue
+            self.limiter.update(key, response.headers)
+            return response.parse()
+
+
+def _parse_duration(duration: Optional[str]) -> Optional[float]:
+    """Parses a rate limit reset duration such as "1s", "6m0s" or "120ms" into seconds"""
+    if not duration:
+        return None
+    matches = _DURATION_PATTERN.findall(duration)
+    if not matches:
+        return None
+    return sum(float(value) * _DURATION_SECONDS[unit] for value, unit in matches)
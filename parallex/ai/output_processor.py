@@ -1,102 +1,176 @@
 import json
-from typing import TypeVar, Callable, Optional, List
+from collections import defaultdict
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    TypeVar,
+    Callable,
+    Iterable,
+    Optional,
+    List,
+)
 
 from pydantic import BaseModel
-from openai import APIError
 
 from parallex.ai.open_ai_client import OpenAIClient
 from parallex.models.page_response import PageResponse
 from parallex.models.prompt_response import PromptResponse
 from parallex.utils.constants import CUSTOM_ID_DELINEATOR
+from parallex.utils.iterators import as_async_iterator
 from parallex.utils.logger import logger
 
+OutputRecords = Iterable[dict] | AsyncIterable[dict]
 
-async def process_images_output(
-    client: OpenAIClient,
-    output_file_id: str,
-    response_model: Optional[type[BaseModel]] = None,
+
+def build_page_responses(
+    output_records: Iterable[dict], response_model: Optional[type[BaseModel]] = None
+) -> List[PageResponse]:
+    """Builds page responses from parsed lines in the batch output format."""
+    return _build_responses(output_records, response_model, _page_response)
+
+
+def build_prompt_responses(
+    output_records: Iterable[dict], response_model: Optional[type[BaseModel]] = None
+) -> List[PromptResponse]:
+    """Builds prompt responses from parsed lines in the batch output format."""
+    return _build_responses(output_records, response_model, _prompt_response)
+
+
+async def collect_page_responses(
+    output_records: OutputRecords, response_model: Optional[type[BaseModel]] = None
 ) -> List[PageResponse]:
-    """Processes the output file from an image processing batch job."""
-    return await _process_output(
-        client=client,
-        output_file_id=output_file_id,
-        response_model=response_model,
-        response_builder=lambda content, identifier: PageResponse(
-            output_content=content, page_number=int(identifier)
-        ),
-    )
-
-
-async def process_prompts_output(
-    client: OpenAIClient,
-    output_file_id: str,
-    response_model: Optional[type[BaseModel]] = None,
+    """Builds page responses one output line at a time as the lines are read."""
+    return await _collect_responses(output_records, response_model, _page_response)
+
+
+async def collect_prompt_responses(
+    output_records: OutputRecords, response_model: Optional[type[BaseModel]] = None
 ) -> List[PromptResponse]:
-    """Processes the output file from a prompt processing batch job."""
-    return await _process_output(
-        client=client,
-        output_file_id=output_file_id,
-        response_model=response_model,
-        response_builder=lambda content, identifier: PromptResponse(
-            output_content=content, prompt_index=int(identifier)
-        ),
-    )
+    """Builds prompt responses one output line at a time as the lines are read."""
+    return await _collect_responses(output_records, response_model, _prompt_response)
+
+
+async def collect_page_responses_by_trace(
+    output_records: OutputRecords, response_model: Optional[type[BaseModel]] = None
+) -> dict[str, List[PageResponse]]:
+    """Builds page responses of a batch that packs many documents, grouped by the trace ID in their custom_id"""
+    groups: dict[str, List[PageResponse]] = defaultdict(list)
+    async for output_record in as_async_iterator(output_records):
+        custom_id = output_record.get("custom_id")
+        if not custom_id or CUSTOM_ID_DELINEATOR not in custom_id:
+            logger.error(f"Output line without a document trace ID: {custom_id}")
+            continue
+        response = _build_response(output_record, response_model, _page_response)
+        if response is not None:
+            groups[custom_id.split(CUSTOM_ID_DELINEATOR)[0]].append(response)
+    return groups
+
+
+async def iter_output_records(
+    client: OpenAIClient, output_file_id: str
+) -> AsyncIterator[dict]:
+    """
+    Streams a batch output file and yields its lines as they are parsed, skipping unreadable ones.
+
+    Only one line is held at a time.
+    """
+    async for raw_line in _split_lines(client.stream_file(output_file_id)):
+        if not raw_line.strip():
+            continue
+        try:
+            yield json.loads(raw_line)
+        except json.JSONDecodeError as e:
+            logger.error(f"Error processing raw response: {e}")
+
+
+async def retrieve_output_records(
+    client: OpenAIClient, output_file_id: str
+) -> List[dict]:
+    """Retrieves a batch output file and parses its lines, skipping unreadable ones."""
+    return [
+        output_record
+        async for output_record in iter_output_records(client, output_file_id)
+    ]
+
+
+def output_custom_id(output_record: dict) -> Optional[str]:
+    """Returns the custom_id of an output line that holds a successful response"""
+    response = output_record.get("response") or {}
+    if response.get("status_code", 200) != 200:
+        return None
+    return output_record.get("custom_id")
+
+
+def _page_response(content: str | BaseModel, identifier: str) -> PageResponse:
+    return PageResponse(output_content=content, page_number=int(identifier))
+
+
+def _prompt_response(content: str | BaseModel, identifier: str) -> PromptResponse:
+    return PromptResponse(output_content=content, prompt_index=int(identifier))
+
+
+async def _split_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """Splits streamed bytes into lines, holding at most one partial line between chunks"""
+    pending = b""
+    async for chunk in chunks:
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
 
 
 ResponseType = TypeVar("ResponseType")
 
 
-async def _process_output(
-    client: OpenAIClient,
-    output_file_id: str,
+async def _collect_responses(
+    output_records: OutputRecords,
     response_model: Optional[type[BaseModel]],
     response_builder: Callable[[str, str], ResponseType],
 ) -> List[ResponseType]:
-    """
-    Retrieves and processes the output file content, creating a list of response objects.
+    responses: List[ResponseType] = []
+    async for json_response in as_async_iterator(output_records):
+        response = _build_response(json_response, response_model, response_builder)
+        if response is not None:
+            responses.append(response)
+    return responses
 
-    Args:
-        client: OpenAIClient instance.
-        output_file_id: The ID of the output file to retrieve.
-        response_model: An optional Pydantic model to parse the output content.
-        response_builder: A callable that builds the response object from the content and identifier.
 
-    Returns:
-        A list of response objects.
-    """
+def _build_responses(
+    output_records: Iterable[dict],
+    response_model: Optional[type[BaseModel]],
+    response_builder: Callable[[str, str], ResponseType],
+) -> List[ResponseType]:
+    responses: List[ResponseType] = []
+    for json_response in output_records:
+        response = _build_response(json_response, response_model, response_builder)
+        if response is not None:
+            responses.append(response)
+    return responses
+
+
+def _build_response(
+    json_response: dict,
+    response_model: Optional[type[BaseModel]],
+    response_builder: Callable[[str, str], ResponseType],
+) -> Optional[ResponseType]:
     try:
-        file_response = await client.retrieve_file(output_file_id)
-        raw_responses = file_response.text.strip().split("\n")
-        responses: List[ResponseType] = []
+        custom_id = json_response["custom_id"]
+        identifier = custom_id.split(CUSTOM_ID_DELINEATOR)[1].split(".")[0]
+        output_content = json_response["response"]["body"]["choices"][0]["message"][
+            "content"
+        ]
 
-        for raw_response in raw_responses:
+        if response_model:
             try:
-                json_response = json.loads(raw_response)
-                custom_id = json_response["custom_id"]
-                identifier = custom_id.split(CUSTOM_ID_DELINEATOR)[1].split(".")[0]
-                output_content = json_response["response"]["body"]["choices"][0][
-                    "message"
-                ]["content"]
-
-                if response_model:
-                    try:
-                        json_data = json.loads(output_content)
-                        output_content = response_model(**json_data)
-                    except (json.JSONDecodeError, ValueError) as e:
-                        logger.error(f"Error parsing output content into model: {e}")
-                        continue  # Skip this response if parsing fails
-
-                response = response_builder(output_content, identifier)
-                responses.append(response)
-            except (json.JSONDecodeError, KeyError, IndexError) as e:
-                logger.error(f"Error processing raw response: {e}")
-                continue  # Skip this response if processing fails
-
-        return responses
-
-    except APIError as e:
-        logger.error(f"API error while retrieving or processing file: {e}")
-        raise
-    except Exception as e:
-        logger.error(f"Unexpected error while processing output: {e}")
-        raise
+                json_data = json.loads(output_content)
+                output_content = response_model(**json_data)
+            except (json.JSONDecodeError, ValueError) as e:
+                logger.error(f"Error parsing output content into model: {e}")
+                return None  # Skip this response if parsing fails
+
+        return response_builder(output_content, identifier)
+    except (KeyError, IndexError, TypeError) as e:
+        logger.error(f"Error processing raw response: {e}")
+        return None  # Skip this response if processing fails
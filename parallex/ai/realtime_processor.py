@@ -0,0 +1,151 @@
+import asyncio
+import base64
+import json
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, List, Optional
+from uuid import UUID
+
+from openai import APIError
+from pydantic import BaseModel
+
+from parallex.ai.open_ai_client import OpenAIClient
+from parallex.ai.uploader import (
+    DEFAULT_TEMPERATURE,
+    _image_jsonl_format,
+    _simple_jsonl_format,
+)
+from parallex.file_management.working_directory import working_directories
+from parallex.models.image_file import ImageFile
+from parallex.utils.constants import CUSTOM_ID_DELINEATOR
+from parallex.utils.iterators import as_async_iterator
+from parallex.utils.logger import logger
+
+
+async def process_images_realtime(
+    client: OpenAIClient,
+    image_files: AsyncIterable[ImageFile],
+    prompt_text: str,
+    model_name: str,
+    concurrency: int,
+    response_model: Optional[type[BaseModel]] = None,
+    temperature: float = DEFAULT_TEMPERATURE,
+    image_detail: Optional[str] = None,
+) -> List[dict]:
+    """Sends each page as it is rendered through the Chat Completions API. Returns the results in the batch output format."""
+    return await send_requests(
+        client,
+        _image_requests(
+            image_files,
+            prompt_text,
+            model_name,
+            response_model,
+            temperature,
+            image_detail,
+        ),
+        concurrency=concurrency,
+    )
+
+
+async def process_prompts_realtime(
+    client: OpenAIClient,
+    prompts: List[str],
+    trace_id: UUID,
+    model_name: str,
+    concurrency: int,
+    response_model: Optional[type[BaseModel]] = None,
+    temperature: float = DEFAULT_TEMPERATURE,
+) -> List[dict]:
+    """Sends each prompt through the Chat Completions API. Returns the results in the batch output format."""
+    requests = (
+        _simple_jsonl_format(
+            f"{trace_id}{CUSTOM_ID_DELINEATOR}{index}.jsonl",
+            prompt,
+            model_name,
+            response_model,
+            temperature,
+        )
+        for index, prompt in enumerate(prompts)
+    )
+    return await send_requests(client, requests, concurrency=concurrency)
+
+
+async def send_requests(
+    client: OpenAIClient,
+    requests: Iterable[dict] | AsyncIterable[dict],
+    concurrency: int,
+) -> List[dict]:
+    """
+    Sends batch request lines through the Chat Completions API, concurrency at a time.
+
+    Requests are pulled from the iterable as slots free up, so a lazily produced iterable
+    never holds more than concurrency request bodies. Returns the results in the
+    batch output format; requests that fail are logged and left out.
+    """
+    pending = as_async_iterator(requests)
+    pending_lock = asyncio.Lock()
+    output_records: List[dict] = []
+
+    async def send_pending() -> None:
+        while True:
+            async with pending_lock:
+                request = await anext(pending, None)
+            if request is None:
+                return
+            output_record = await _send_request(client, request)
+            if output_record is not None:
+                output_records.append(output_record)
+
+    await asyncio.gather(*(send_pending() for _ in range(concurrency)))
+    return output_records
+
+
+def read_requests(jsonl_path: str) -> Iterator[dict]:
+    """Lazily reads the request lines of a batch input file"""
+    with open(jsonl_path, "r") as jsonl_file:
+        for line in jsonl_file:
+            if line.strip():
+                yield json.loads(line)
+
+
+async def _send_request(client: OpenAIClient, request: dict) -> Optional[dict]:
+    try:
+        completion = await client.create_chat_completion(request["body"])
+    except APIError as e:
+        logger.error(f"APIError on realtime request {request['custom_id']}: {e}")
+        return None
+    return {
+        "custom_id": request["custom_id"],
+        "response": {"status_code": 200, "body": completion.model_dump()},
+    }
+
+
+async def _image_requests(
+    image_files: AsyncIterable[ImageFile],
+    prompt_text: str,
+    model_name: str,
+    response_model: Optional[type[BaseModel]],
+    temperature: float,
+    image_detail: Optional[str],
+) -> AsyncIterator[dict]:
+    async for image_file in image_files:
+        try:
+            encoded_image = await asyncio.to_thread(_read_base64, image_file.path)
+        except OSError as e:
+            logger.error(f"Error encoding image {image_file.path}: {e}")
+            continue
+        finally:
+            working_directories.discard(image_file.path)
+        yield _image_jsonl_format(
+            f"{image_file.trace_id}{CUSTOM_ID_DELINEATOR}{image_file.page_number}.jsonl",
+            encoded_image,
+            prompt_text,
+            model_name,
+            response_model,
+            temperature,
+            image_file.content_type,
+            image_detail,
+        )
+
+
+def _read_base64(path: str) -> str:
+    with open(path, "rb") as image:
+        return base64.b64encode(image.read()).decode("utf-8")
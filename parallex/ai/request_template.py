@@ -0,0 +1,59 @@
+import json
+import re
+from typing import Literal
+
+_SLOT_PATTERN = re.compile(r'"__parallex_value_(\w+)__"|__parallex_raw_(\w+)__')
+
+SlotKind = Literal["value", "raw"]
+
+
+def value_slot(name: str) -> str:
+    """Marks a JSON value that is filled in per request"""
+    return f"__parallex_value_{name}__"
+
+
+def raw_slot(name: str) -> str:
+    """Marks text inside a JSON string that is filled in per request without escaping"""
+    return f"__parallex_raw_{name}__"
+
+
+class RequestTemplate:
+    """
+    A JSONL request line serialized once, with slots for the parts that vary per request.
+
+    Build the payload with value_slot and raw_slot markers in place of the varying
+    parts. Rendering splices the per-request values into the pre-serialized text
+    instead of rebuilding and re-serializing the whole payload.
+    """
+
+    def __init__(self, payload: dict):
+        line = json.dumps(payload) + "\n"
+        self._static_parts: list[str] = []
+        self._slots: list[tuple[SlotKind, str]] = []
+        position = 0
+        for match in _SLOT_PATTERN.finditer(line):
+            self._static_parts.append(line[position : match.start()])
+            value_name, raw_name = match.groups()
+            self._slots.append(
+                ("value", value_name) if value_name else ("raw", raw_name)
+            )
+            position = match.end()
+        self._static_parts.append(line[position:])
+
+    def render(self, **values) -> str:
+        """Returns the request line with every slot filled from values"""
+        return "".join(self._render_parts(values))
+
+    def render_around(self, slot_name: str, **values) -> tuple[str, str]:
+        """Returns the request line before and after the raw slot slot_name, with every other slot filled"""
+        parts = self._render_parts({**values, slot_name: "\0"})
+        prefix, suffix = "".join(parts).split("\0")
+        return prefix, suffix
+
+    def _render_parts(self, values: dict) -> list[str]:
+        parts = [self._static_parts[0]]
+        for (kind, name), static_part in zip(self._slots, self._static_parts[1:]):
+            value = values[name]
+            parts.append(json.dumps(value) if kind == "value" else value)
+            parts.append(static_part)
+        return parts
@@ -0,0 +1,214 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import AsyncIterator, Awaitable, Callable, Iterable, List, Optional
+
+from pydantic import BaseModel, ValidationError
+
+from parallex.ai.output_processor import OutputRecords, output_custom_id
+from parallex.utils.iterators import as_async_iterator
+from parallex.utils.logger import logger
+
+DEFAULT_CACHE_MAX_BYTES = 1024 * 1024 * 1024  # 1 GB of cached response content
+DEFAULT_CACHE_MAX_AGE = 30 * 24 * 60 * 60  # 30 days
+DIGEST_READ_SIZE = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    content TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_accessed_at ON results (accessed_at);
+"""
+
+
+class ResultCache:
+    """
+    Persistent cache of model responses in a SQLite database, keyed by request content.
+
+    Entries older than max_age are dropped, and the least recently used entries are
+    evicted once the cached content outgrows max_bytes. Database access runs in a
+    thread so lookups do not block the event loop.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+        max_age: float = DEFAULT_CACHE_MAX_AGE,
+    ):
+        path = os.path.expanduser(path)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.executescript(_SCHEMA)
+
+    async def get(self, key: str) -> Optional[str]:
+        """Returns the cached response content of a request, or None"""
+        return await asyncio.to_thread(self._get, key)
+
+    async def put_many(self, entries: Iterable[tuple[str, str]]) -> None:
+        """Caches (key, content) pairs and evicts entries past the age and size limits"""
+        evicted = await asyncio.to_thread(self._put_many, list(entries))
+        if evicted:
+            logger.info(f"evicted {evicted} cached results")
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def _get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT content, created_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            content, created_at = row
+            if now - created_at > self.max_age:
+                self._connection.execute("DELETE FROM results WHERE key = ?", (key,))
+                return None
+            self._connection.execute(
+                "UPDATE results SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            return content
+
+    def _put_many(self, entries: List[tuple[str, str]]) -> int:
+        if not entries:
+            return 0
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                [
+                    (key, content, len(content.encode("utf-8")), now, now)
+                    for key, content in entries
+                ],
+            )
+            return self._evict(now)
+
+    def _evict(self, now: float) -> int:
+        self._connection.execute(
+            "DELETE FROM results WHERE created_at < ?", (now - self.max_age,)
+        )
+        (total_bytes,) = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM results"
+        ).fetchone()
+        if total_bytes <= self.max_bytes:
+            return 0
+        rows = self._connection.execute(
+            "SELECT key, size FROM results ORDER BY accessed_at"
+        )
+        evicted = []
+        for key, size in rows:
+            if total_bytes <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total_bytes -= size
+        self._connection.executemany("DELETE FROM results WHERE key = ?", evicted)
+        return len(evicted)
+
+
+class ResultCacheLookup:
+    """
+    Cache lookups of one call: the output lines of its hits, and the keys of its misses
+    so their responses can be cached once their batches complete.
+    """
+
+    def __init__(
+        self, cache: ResultCache, response_model: Optional[type[BaseModel]] = None
+    ):
+        self.cache = cache
+        self.response_model = response_model
+        self.hits: List[dict] = []
+        self._miss_keys: dict[str, str] = {}
+
+    async def check(self, custom_id: str, key: str) -> bool:
+        """Whether the request is cached. A hit is kept as an output line under custom_id."""
+        try:
+            content = await self.cache.get(key)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read cached result: {e}")
+            content = None
+        if content is None:
+            self._miss_keys[custom_id] = key
+            return False
+        self.hits.append(cached_output_record(custom_id, content))
+        return True
+
+    def storing(
+        self, collect: Callable[[OutputRecords], Awaitable]
+    ) -> Callable[[OutputRecords], Awaitable]:
+        """Wraps an output collector so the responses it reads are cached as they pass through"""
+
+        async def collect_and_store(output_records: OutputRecords):
+            entries: List[tuple[str, str]] = []
+            result = await collect(self._tap(output_records, entries))
+            try:
+                await self.cache.put_many(entries)
+            except sqlite3.Error as e:
+                logger.warning(f"Could not cache {len(entries)} results: {e}")
+            return result
+
+        return collect_and_store
+
+    async def _tap(
+        self, output_records: OutputRecords, entries: List[tuple[str, str]]
+    ) -> AsyncIterator[dict]:
+        async for output_record in as_async_iterator(output_records):
+            key = self._miss_keys.get(output_custom_id(output_record))
+            content = _output_content(output_record)
+            if key is not None and content is not None and self._is_valid(content):
+                entries.append((key, content))
+            yield output_record
+
+    def _is_valid(self, content: str) -> bool:
+        if self.response_model is None:
+            return True
+        try:
+            self.response_model.model_validate_json(content)
+            return True
+        except ValidationError:
+            return False
+
+
+def request_key(request_line: str, content_digest: bytes = b"") -> str:
+    """Cache key of a request line rendered without its custom_id, and of the file it embeds"""
+    return hashlib.sha256(request_line.encode("utf-8") + content_digest).hexdigest()
+
+
+def file_digest(path: str) -> bytes:
+    with open(path, "rb") as file:
+        digest = hashlib.sha256()
+        while chunk := file.read(DIGEST_READ_SIZE):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def cached_output_record(custom_id: str, content: str) -> dict:
+    """A cached response as a line in the batch output format"""
+    return {
+        "custom_id": custom_id,
+        "response": {
+            "status_code": 200,
+            "body": {"choices": [{"message": {"content": content}}]},
+        },
+    }
+
+
+def _output_content(output_record: dict) -> Optional[str]:
+    try:
+        return output_record["response"]["body"]["choices"][0]["message"]["content"]
+    except (KeyError, IndexError, TypeError):
+        return None
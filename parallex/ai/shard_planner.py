@@ -0,0 +1,54 @@
+import math
+from typing import Optional
+
+MAX_FILE_SIZE = 180 * 1024 * 1024  # 180 MB in bytes. Limit for OpenAI is 200MB.
+MAX_REQUESTS_PER_BATCH = 50_000  # Limit for OpenAI
+
+
+class ShardPlanner:
+    """
+    Decides where request lines are split into batch files.
+
+    A shard is sealed before a request would take it past any of the limits: bytes,
+    request count or estimated input tokens (to stay under a model's enqueued-token
+    limit). With target_batches, requests are spread over that many balanced batches
+    so smaller batches can run in parallel. Subclass and override fits() for other policies.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = MAX_FILE_SIZE,
+        max_requests: int = MAX_REQUESTS_PER_BATCH,
+        max_tokens: Optional[int] = None,
+        target_batches: Optional[int] = None,
+    ):
+        if target_batches is not None and target_batches < 1:
+            raise ValueError("target_batches must be at least 1")
+        self.max_bytes = max_bytes
+        self.max_requests = max_requests
+        self.max_tokens = max_tokens
+        self.target_batches = target_batches
+
+    def requests_per_shard(self, total_requests: Optional[int]) -> int:
+        """Maximum requests in one shard once the total number of requests is known"""
+        if self.target_batches is None or not total_requests:
+            return self.max_requests
+        return min(self.max_requests, math.ceil(total_requests / self.target_batches))
+
+    def fits(
+        self,
+        shard_bytes: int,
+        shard_requests: int,
+        shard_tokens: int,
+        line_bytes: int,
+        line_tokens: int,
+        total_requests: Optional[int] = None,
+    ) -> bool:
+        """Whether a request line can be added to a shard that already holds some requests"""
+        if shard_bytes + line_bytes > self.max_bytes:
+            return False
+        if shard_requests + 1 > self.requests_per_shard(total_requests):
+            return False
+        if self.max_tokens is not None and shard_tokens + line_tokens > self.max_tokens:
+            return False
+        return True
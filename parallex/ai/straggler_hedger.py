@@ -0,0 +1,52 @@
+import os
+from typing import List
+
+from parallex.ai.batch_processor import cancel_batch
+from parallex.ai.open_ai_client import OpenAIClient
+from parallex.ai.output_processor import output_custom_id, retrieve_output_records
+from parallex.ai.realtime_processor import read_requests, send_requests
+from parallex.exceptions.BatchDeadlineError import BatchDeadlineError
+from parallex.models.deadline_policy import DeadlinePolicy
+from parallex.models.upload_batch import UploadBatch
+from parallex.utils.logger import logger
+
+
+async def hedge_batch(
+    client: OpenAIClient, batch: UploadBatch, policy: DeadlinePolicy
+) -> List[dict]:
+    """
+    Cancels a batch that is past its deadline and finishes it through the Chat Completions API.
+
+    Requests the batch completed before it stopped are kept. The rest are read back from
+    the batch's local input file and sent as concurrent realtime requests. Returns every
+    result in the batch output format.
+    """
+    if batch.input_file_path is None or not os.path.exists(batch.input_file_path):
+        raise BatchDeadlineError(
+            f"Batch {batch.id} is past its deadline and its input file is not available to hedge"
+        )
+    logger.info(f"hedging batch past its deadline - {batch.id} - {batch.trace_id}")
+
+    stopped_batch = await cancel_batch(
+        client=client, batch=batch, grace=policy.cancel_grace
+    )
+    output_records = []
+    if stopped_batch is not None and stopped_batch.output_file_id:
+        output_records = await retrieve_output_records(
+            client, stopped_batch.output_file_id
+        )
+    finished_ids = {output_custom_id(record) for record in output_records}
+
+    pending_requests = (
+        request
+        for request in read_requests(batch.input_file_path)
+        if request["custom_id"] not in finished_ids
+    )
+    hedged_records = await send_requests(
+        client, pending_requests, concurrency=policy.hedge_concurrency
+    )
+    logger.info(
+        f"batch hedged. {len(output_records)} from batch, "
+        f"{len(hedged_records)} realtime - {batch.id} - {batch.trace_id}"
+    )
+    return output_records + hedged_records
@@ -0,0 +1,74 @@
+import base64
+import math
+from io import BytesIO
+from typing import Optional
+
+from PIL import Image
+
+CHARACTERS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 7
+LOW_DETAIL_IMAGE_TOKENS = 85
+TILE_TOKENS = 170
+TILE_SIZE = 512
+MAX_IMAGE_SIDE = 2048
+SHORT_IMAGE_SIDE = 768
+IMAGE_HEADER_BASE64_SIZE = 64 * 1024  # Enough of a data URL to read the image size
+
+
+def estimate_text_tokens(text: str) -> int:
+    """Rough token count of text, without a tokenizer"""
+    return math.ceil(len(text) / CHARACTERS_PER_TOKEN) + MESSAGE_OVERHEAD_TOKENS
+
+
+def estimate_image_tokens(width: int, height: int, detail: Optional[str] = None) -> int:
+    """Token cost of an image input following OpenAI's tile pricing"""
+    if detail == "low":
+        return LOW_DETAIL_IMAGE_TOKENS
+
+    scale = min(1.0, MAX_IMAGE_SIDE / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, SHORT_IMAGE_SIDE / min(width, height))
+    width, height = width * scale, height * scale
+    tiles = math.ceil(width / TILE_SIZE) * math.ceil(height / TILE_SIZE)
+    return TILE_TOKENS * tiles + LOW_DETAIL_IMAGE_TOKENS
+
+
+def estimate_image_file_tokens(path: str, detail: Optional[str] = None) -> int:
+    """Token cost of an image file, assuming the largest image when its header can't be read"""
+    if detail != "low":
+        try:
+            with Image.open(path) as image:
+                return estimate_image_tokens(*image.size, detail)
+        except (OSError, ValueError):
+            pass
+    return estimate_image_tokens(MAX_IMAGE_SIDE, MAX_IMAGE_SIDE, detail)
+
+
+def estimate_request_tokens(body: dict) -> int:
+    """Tokens a Chat Completions request body counts against a tokens-per-minute limit, including max_tokens"""
+    tokens = body.get("max_tokens") or 0
+    for message in body.get("messages", []):
+        content = message.get("content") or []
+        if isinstance(content, str):
+            tokens += estimate_text_tokens(content)
+            continue
+        for part in content:
+            if part.get("type") == "text":
+                tokens += estimate_text_tokens(part["text"])
+            elif part.get("type") == "image_url":
+                tokens += _estimate_image_url_tokens(part["image_url"])
+    return tokens
+
+
+def _estimate_image_url_tokens(image_url: dict) -> int:
+    detail = image_url.get("detail")
+    url = image_url["url"]
+    if detail != "low" and url.startswith("data:"):
+        encoded_image = url.partition(",")[2][:IMAGE_HEADER_BASE64_SIZE]
+        try:
+            with Image.open(BytesIO(base64.b64decode(encoded_image))) as image:
+                return estimate_image_tokens(*image.size, detail)
+        except (OSError, ValueError):
+            pass
+    # Size unknown, assume the largest image
+    return estimate_image_tokens(MAX_IMAGE_SIDE, MAX_IMAGE_SIDE, detail)
@@ -1,79 +1,105 @@
-import base64
+import asyncio
 import json
-import os
-from typing import Optional, List
+from functools import partial, lru_cache
+from typing import AsyncIterable, Callable, Optional, List
 from uuid import UUID
 
 from openai.lib._pydantic import to_strict_json_schema
 from pydantic import BaseModel
 
+from parallex.ai.jsonl_writer import JsonlShardWriter
 from parallex.ai.open_ai_client import OpenAIClient
-from parallex.file_management.utils import file_in_temp_dir
+from parallex.ai.request_template import RequestTemplate, value_slot, raw_slot
+from parallex.ai.result_cache import ResultCacheLookup, file_digest, request_key
+from parallex.ai.shard_planner import ShardPlanner
+from parallex.ai.token_estimator import (
+    estimate_text_tokens,
+    estimate_image_file_tokens,
+)
+from parallex.file_management.working_directory import working_directories
 from parallex.models.batch_file import BatchFile
 from parallex.models.image_file import ImageFile
 from parallex.utils.constants import CUSTOM_ID_DELINEATOR
 from parallex.utils.logger import logger
 
-MAX_FILE_SIZE = 180 * 1024 * 1024  # 180 MB in bytes. Limit for OpenAI is 200MB.
 DEFAULT_TEMPERATURE = 0.0
+RESPONSE_FORMAT_CACHE_SIZE = 128  # Response models whose strict schemas are kept
+
+BatchFileCallable = Callable[[BatchFile], None]
 
 
 async def upload_images_for_processing(
     client: OpenAIClient,
-    image_files: List[ImageFile],
+    image_files: AsyncIterable[ImageFile],
     temp_directory: str,
+    trace_id: UUID,
     prompt_text: str,
     model_name: str,
     response_model: Optional[type[BaseModel]] = None,
     temperature: float = DEFAULT_TEMPERATURE,
+    image_detail: Optional[str] = None,
+    on_batch_file: Optional[BatchFileCallable] = None,
+    shard_planner: Optional[ShardPlanner] = None,
+    cache_lookup: Optional[ResultCacheLookup] = None,
+    keep_shards: bool = False,
 ) -> List[BatchFile]:
-    """Base64 encodes image, converts to expected jsonl format and uploads"""
-    trace_id = image_files[0].trace_id
-    current_index = 0
-    batch_files: List[BatchFile] = []
-    upload_file_location = file_in_temp_dir(
-        directory=temp_directory, file_name=f"{trace_id}-{current_index}.jsonl"
-    )
+    """
+    Base64 encodes images as they are rendered, converts to expected jsonl format and uploads.
 
-    for image_file in image_files:
-        if await _approaching_file_size_limit(upload_file_location):
-            """When approaching upload file limit, upload and start new file"""
-            batch_file = await _create_batch_file(
-                client, trace_id, upload_file_location
-            )
-            batch_files.append(batch_file)
-            current_index += 1
-            upload_file_location = await set_file_location(
-                current_index, temp_directory, trace_id
+    on_batch_file is called with each batch file as soon as its shard is uploaded.
+    Pages found in cache_lookup are left out of the batches. Pages are deleted once they are
+    written into a shard, and shards once uploaded unless keep_shards. The next page is only
+    read while the working directory is within its disk budget.
+    """
+    writer = JsonlShardWriter(
+        temp_directory=temp_directory,
+        trace_id=trace_id,
+        on_shard_sealed=partial(
+            _upload_shard, client, trace_id, model_name, on_batch_file, keep_shards
+        ),
+        planner=shard_planner,
+        on_source_written=working_directories.discard,
+    )
+    template = image_request_template(
+        prompt_text, model_name, response_model, temperature, image_detail
+    )
+    prompt_tokens = estimate_text_tokens(prompt_text)
+    try:
+        async for image_file in image_files:
+            working_directories.track(image_file.path)
+            if image_file.trace_id == trace_id:
+                # Packed uploads mix documents, so their total is not known up front
+                writer.total_requests = image_file.page_count
+            prompt_custom_id = f"{image_file.trace_id}{CUSTOM_ID_DELINEATOR}{image_file.page_number}.jsonl"
+            prefix, suffix = template.render_around(
+                "image",
+                custom_id=prompt_custom_id,
+                content_type=image_file.content_type,
             )
-
-        try:
-            with open(image_file.path, "rb") as image:
-                base64_encoded_image = base64.b64encode(image.read()).decode("utf-8")
-        except Exception as e:
-            logger.error(f"Error encoding image {image_file.path}: {e}")
-            continue
-
-        prompt_custom_id = (
-            f"{image_file.trace_id}{CUSTOM_ID_DELINEATOR}{image_file.page_number}.jsonl"
-        )
-        jsonl = _image_jsonl_format(
-            prompt_custom_id,
-            base64_encoded_image,
-            prompt_text,
-            model_name,
-            response_model,
-            temperature,
-        )
-        try:
-            with open(upload_file_location, "a") as jsonl_file:
-                jsonl_file.write(json.dumps(jsonl) + "\n")
-        except Exception as e:
-            logger.error(f"Error writing to jsonl file {upload_file_location}: {e}")
-
-    batch_file = await _create_batch_file(client, trace_id, upload_file_location)
-    batch_files.append(batch_file)
-    return batch_files
+            if cache_lookup is not None and await _is_image_cached(
+                cache_lookup, template, prompt_custom_id, image_file
+            ):
+                working_directories.discard(image_file.path)
+            else:
+                image_tokens = estimate_image_file_tokens(image_file.path, image_detail)
+                try:
+                    await writer.write_base64_line(
+                        prefix.encode("utf-8"),
+                        image_file.path,
+                        suffix.encode("utf-8"),
+                        tokens=prompt_tokens + image_tokens,
+                    )
+                except Exception as e:
+                    logger.error(f"Error encoding image {image_file.path}: {e}")
+                    working_directories.discard(image_file.path)
+            if not working_directories.has_room(temp_directory):
+                # Pages waiting in the open segment are only freed once it is written
+                await writer.flush()
+                await working_directories.wait_for_room(temp_directory)
+        return await writer.close()
+    except BaseException:
+        writer.abort()
+        raise
 
 
 async def upload_prompts_for_processing(
@@ -84,60 +110,127 @@ async def upload_prompts_for_processing(
     model_name: str,
     response_model: Optional[type[BaseModel]] = None,
     temperature: float = DEFAULT_TEMPERATURE,
+    on_batch_file: Optional[BatchFileCallable] = None,
+    shard_planner: Optional[ShardPlanner] = None,
+    cache_lookup: Optional[ResultCacheLookup] = None,
+    keep_shards: bool = False,
 ) -> List[BatchFile]:
-    """Creates jsonl file and uploads for processing"""
-    current_index = 0
-    batch_files: List[BatchFile] = []
+    """
+    Creates jsonl file and uploads for processing.
 
-    upload_file_location = await set_file_location(
-        current_index, temp_directory, trace_id
+    on_batch_file is called with each batch file as soon as its shard is uploaded.
+    Prompts found in cache_lookup are left out of the batches. Shards are deleted once
+    uploaded unless keep_shards.
+    """
+    writer = JsonlShardWriter(
+        temp_directory=temp_directory,
+        trace_id=trace_id,
+        on_shard_sealed=partial(
+            _upload_shard, client, trace_id, model_name, on_batch_file, keep_shards
+        ),
+        planner=shard_planner,
+        total_requests=len(prompts),
     )
-    for index, prompt in enumerate(prompts):
-        if await _approaching_file_size_limit(upload_file_location):
-            """When approaching upload file limit, upload and start new file"""
-            batch_file = await _create_batch_file(
-                client, trace_id, upload_file_location
-            )
-            batch_files.append(batch_file)
-            current_index += 1
-            upload_file_location = await set_file_location(
-                current_index, temp_directory, trace_id
-            )
+    template = prompt_request_template(model_name, response_model, temperature)
+    try:
+        for index, prompt in enumerate(prompts):
+            prompt_custom_id = f"{trace_id}{CUSTOM_ID_DELINEATOR}{index}.jsonl"
+            if cache_lookup is not None and await cache_lookup.check(
+                prompt_custom_id,
+                request_key(template.render(custom_id="", prompt=prompt)),
+            ):
+                continue
+            jsonl = template.render(custom_id=prompt_custom_id, prompt=prompt)
+            await _write_line(writer, jsonl, estimate_text_tokens(prompt))
+        return await writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+
 
-        prompt_custom_id = f"{trace_id}{CUSTOM_ID_DELINEATOR}{index}.jsonl"
-        jsonl = _simple_jsonl_format(
-            prompt_custom_id, prompt, model_name, response_model, temperature
+def image_request_template(
+    prompt_text: str,
+    model_name: str,
+    response_model: Optional[type[BaseModel]],
+    temperature: float,
+    image_detail: Optional[str] = None,
+) -> RequestTemplate:
+    """Template of an image request line with custom_id, content_type and image slots"""
+    return RequestTemplate(
+        _image_jsonl_format(
+            value_slot("custom_id"),
+            raw_slot("image"),
+            prompt_text,
+            model_name,
+            response_model,
+            temperature,
+            raw_slot("content_type"),
+            image_detail,
         )
-        try:
-            with open(upload_file_location, "a") as jsonl_file:
-                jsonl_file.write(json.dumps(jsonl) + "\n")
-        except Exception as e:
-            logger.error(f"Error writing to jsonl file {upload_file_location}: {e}")
-
-    batch_file = await _create_batch_file(client, trace_id, upload_file_location)
-    batch_files.append(batch_file)
-    return batch_files
-
-
-async def set_file_location(
-    current_index: int, temp_directory: str, trace_id: UUID
-) -> str:
-    return file_in_temp_dir(
-        directory=temp_directory, file_name=f"{trace_id}-{current_index}.jsonl"
     )
 
 
-async def _approaching_file_size_limit(upload_file_location: str) -> bool:
-    try:
-        return (
-            os.path.exists(upload_file_location)
-            and os.path.getsize(upload_file_location) > MAX_FILE_SIZE
+def prompt_request_template(
+    model_name: str,
+    response_model: Optional[type[BaseModel]],
+    temperature: float,
+) -> RequestTemplate:
+    """Template of a prompt request line with custom_id and prompt slots"""
+    return RequestTemplate(
+        _simple_jsonl_format(
+            value_slot("custom_id"),
+            value_slot("prompt"),
+            model_name,
+            response_model,
+            temperature,
         )
+    )
+
+
+async def _is_image_cached(
+    cache_lookup: ResultCacheLookup,
+    template: RequestTemplate,
+    prompt_custom_id: str,
+    image_file: ImageFile,
+) -> bool:
+    prefix, suffix = template.render_around(
+        "image", custom_id="", content_type=image_file.content_type
+    )
+    digest = await asyncio.to_thread(file_digest, image_file.path)
+    return await cache_lookup.check(
+        prompt_custom_id, request_key(prefix + suffix, digest)
+    )
+
+
+async def _write_line(writer: JsonlShardWriter, jsonl: str, tokens: int) -> None:
+    try:
+        await writer.write(jsonl.encode("utf-8"), tokens)
     except Exception as e:
-        logger.error(
-            f"Error checking file size for {upload_file_location}: {e}. Assuming limit is reached."
-        )
-        return True  # Assume limit reached to be safe
+        logger.error(f"Error writing to jsonl file {writer.shard_path}: {e}")
+
+
+async def _upload_shard(
+    client: OpenAIClient,
+    trace_id: UUID,
+    model_name: str,
+    on_batch_file: Optional[BatchFileCallable],
+    keep_shard: bool,
+    upload_file_location: str,
+    estimated_tokens: int,
+) -> BatchFile:
+    if keep_shard:
+        # Kept shards are freed once their batches complete, which only happens after
+        # the upload, so they are not held against the disk budget
+        batch_file = await _create_batch_file(client, trace_id, upload_file_location)
+    else:
+        working_directories.track(upload_file_location)
+        batch_file = await _create_batch_file(client, trace_id, upload_file_location)
+        working_directories.discard(upload_file_location)
+    batch_file.model_name = model_name
+    batch_file.estimated_tokens = estimated_tokens
+    if on_batch_file is not None:
+        on_batch_file(batch_file)
+    return batch_file
 
 
 async def _create_batch_file(
@@ -151,6 +244,7 @@ async def _create_batch_file(
             purpose=file_response.purpose,
             status=file_response.status,
             trace_id=trace_id,
+            path=upload_file_location,
         )
     except Exception as e:
         logger.error(f"Error creating batch file from {upload_file_location}: {e}")
@@ -158,11 +252,19 @@ async def _create_batch_file(
 
 
 def _response_format(model: type[BaseModel]) -> dict:
+    # A fresh dict per call, so callers can change their payloads without touching the cache
+    return json.loads(_response_format_json(model))
+
+
+@lru_cache(maxsize=RESPONSE_FORMAT_CACHE_SIZE)
+def _response_format_json(model: type[BaseModel]) -> str:
     schema = to_strict_json_schema(model)
-    return {
-        "type": "json_schema",
-        "json_schema": {"name": model.__name__, "strict": True, "schema": schema},
-    }
+    return json.dumps(
+        {
+            "type": "json_schema",
+            "json_schema": {"name": model.__name__, "strict": True, "schema": schema},
+        }
+    )
 
 
 def _simple_jsonl_format(
@@ -194,7 +296,12 @@ def _image_jsonl_format(
     model_name: str,
     response_model: Optional[type[BaseModel]],
     temperature: float,
+    content_type: str = "image/png",
+    image_detail: Optional[str] = None,
 ) -> dict:
+    image_url = {"url": f"data:{content_type};base64,{encoded_image}"}
+    if image_detail:
+        image_url["detail"] = image_detail
     payload = {
         "custom_id": prompt_custom_id,
         "method": "POST",
@@ -206,12 +313,7 @@ def _image_jsonl_format(
                     "role": "user",
                     "content": [
                         {"type": "text", "text": prompt_text},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/png;base64,{encoded_image}"
-                            },
-                        },
+                        {"type": "image_url", "image_url": image_url},
                     ],
                 }
             ],
@@ -0,0 +1,5 @@
+from parallex.exceptions.BatchProcessingError import BatchProcessingError
+
+
+class BatchDeadlineError(BatchProcessingError):
+    pass
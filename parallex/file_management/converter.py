@@ -1,37 +1,149 @@
 import asyncio
+from collections import deque
+from typing import AsyncIterator
 
-from pdf2image import convert_from_path
+from pdf2image import pdfinfo_from_path
 
+from parallex.file_management.rasterizer import rasterization_engine
 from parallex.models.image_file import ImageFile
 from parallex.models.raw_file import RawFile
+from parallex.models.render_profile import (
+    RenderProfile,
+    RENDER_PROFILES,
+    DEFAULT_RENDER_PROFILE,
+)
 from parallex.utils.logger import logger
 
+PAGES_PER_CHUNK = 8  # Pages rendered per pdftocairo invocation
+CHUNKS_AHEAD = 2  # Rendered chunks allowed to wait for the consumer
+
 
 async def convert_pdf_to_images(
-    raw_file: RawFile, temp_directory: str
+    raw_file: RawFile,
+    temp_directory: str,
+    render_profile: RenderProfile = RENDER_PROFILES[DEFAULT_RENDER_PROFILE],
 ) -> list[ImageFile] | None:
     """Converts a PDF file to a series of images in the temp_directory. Returns a list ImageFile objects."""
-    options = {
-        "pdf_path": raw_file.path,
-        "output_folder": temp_directory,
-        "dpi": 300,
-        "fmt": "png",
-        "size": (None, 1056),
-        "thread_count": 4,
-        "use_pdftocairo": True,
-        "paths_only": True,
-    }
-
     try:
-        image_paths = await asyncio.to_thread(convert_from_path, **options)
         return [
-            ImageFile(
-                path=path,
-                trace_id=raw_file.trace_id,
-                given_file_name=raw_file.given_name,
-                page_number=(i + 1),
+            image_file
+            async for image_file in stream_pdf_to_images(
+                raw_file=raw_file,
+                temp_directory=temp_directory,
+                render_profile=render_profile,
             )
-            for i, path in enumerate(image_paths)
         ]
     except Exception as err:
         logger.error(f"Error converting PDF to images: {err}")
+
+
+async def stream_pdf_to_images(
+    raw_file: RawFile,
+    temp_directory: str,
+    render_profile: RenderProfile = RENDER_PROFILES[DEFAULT_RENDER_PROFILE],
+    pages_per_chunk: int = PAGES_PER_CHUNK,
+) -> AsyncIterator[ImageFile]:
+    """
+    Renders a PDF in page-range chunks and yields ImageFile objects as each chunk completes.
+
+    Chunks are spread across the shared rasterization engine's workers and
+    yielded in page order. Rendering continues in the background while the caller
+    consumes the current chunk, up to CHUNKS_AHEAD rendered chunks ahead.
+    """
+    page_count = await _page_count(raw_file)
+    chunks: asyncio.Queue = asyncio.Queue(maxsize=CHUNKS_AHEAD)
+    producer = asyncio.create_task(
+        _render_chunks(
+            raw_file=raw_file,
+            temp_directory=temp_directory,
+            page_count=page_count,
+            pages_per_chunk=pages_per_chunk,
+            render_profile=render_profile,
+            chunks=chunks,
+        )
+    )
+    try:
+        while (image_files := await chunks.get()) is not None:
+            if isinstance(image_files, Exception):
+                raise image_files
+            for image_file in image_files:
+                yield image_file
+    finally:
+        if not producer.done():
+            producer.cancel()
+
+
+async def _render_chunks(
+    raw_file: RawFile,
+    temp_directory: str,
+    page_count: int,
+    pages_per_chunk: int,
+    render_profile: RenderProfile,
+    chunks: asyncio.Queue,
+) -> None:
+    in_flight: deque[asyncio.Task] = deque()
+    try:
+        for first_page in range(1, page_count + 1, pages_per_chunk):
+            last_page = min(first_page + pages_per_chunk - 1, page_count)
+            render_task = asyncio.create_task(
+                _render_page_range(
+                    raw_file=raw_file,
+                    temp_directory=temp_directory,
+                    first_page=first_page,
+                    last_page=last_page,
+                    page_count=page_count,
+                    render_profile=render_profile,
+                )
+            )
+            in_flight.append(render_task)
+            if len(in_flight) >= rasterization_engine.max_workers:
+                await chunks.put(await in_flight.popleft())
+        while in_flight:
+            await chunks.put(await in_flight.popleft())
+    except Exception as err:
+        await chunks.put(err)
+        return
+    finally:
+        for render_task in in_flight:
+            render_task.cancel()
+    await chunks.put(None)
+
+
+async def _render_page_range(
+    raw_file: RawFile,
+    temp_directory: str,
+    first_page: int,
+    last_page: int,
+    page_count: int,
+    render_profile: RenderProfile,
+) -> list[ImageFile]:
+    # pdftocairo derives the resolution of each page from its own height when scaling
+    # to a size, so pages are rendered at the target height rather than downscaled
+    image_paths = await rasterization_engine.render(
+        pdf_path=raw_file.path,
+        output_folder=temp_directory,
+        output_file=f"{raw_file.trace_id}-p{first_page}_",
+        first_page=first_page,
+        last_page=last_page,
+        fmt="png",
+        dpi=300,
+        size=(None, render_profile.target_height),
+        thread_count=1,
+        use_pdftocairo=True,
+        paths_only=True,
+    )
+    return [
+        ImageFile(
+            path=path,
+            trace_id=raw_file.trace_id,
+            given_file_name=raw_file.given_name,
+            page_number=first_page + i,
+            page_count=page_count,
+        )
+        for i, path in enumerate(image_paths)
+    ]
+
+
+async def _page_count(raw_file: RawFile) -> int:
+    info = await asyncio.to_thread(pdfinfo_from_path, raw_file.path)
+    return info["Pages"]
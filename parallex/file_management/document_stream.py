@@ -0,0 +1,142 @@
+import asyncio
+from pathlib import Path
+from typing import AsyncIterator, Callable, Optional, Sequence, Union
+
+import httpx
+
+from parallex.file_management.file_finder import add_file_to_temp_directory
+from parallex.file_management.image_encoder import encode_images
+from parallex.file_management.page_cache import page_cache
+from parallex.file_management.working_directory import working_directories
+from parallex.models.encoding_stats import EncodingStats
+from parallex.models.image_encoding import (
+    ImageEncoding,
+    IMAGE_ENCODINGS,
+    DEFAULT_IMAGE_ENCODING,
+)
+from parallex.models.image_file import ImageFile
+from parallex.models.packed_document import PackedDocument
+from parallex.models.raw_file import RawFile
+from parallex.models.render_profile import (
+    RenderProfile,
+    RENDER_PROFILES,
+    DEFAULT_RENDER_PROFILE,
+)
+from parallex.utils.logger import logger
+
+DEFAULT_DOCUMENT_CONCURRENCY = 8  # Documents downloaded and rendered at once
+PAGES_AHEAD = 64  # Rendered pages allowed to wait for the consumer
+
+PackedDocumentCallable = Callable[[PackedDocument], None]
+
+
+async def stream_documents_to_images(
+    pdf_sources: Sequence[Union[str, Path]],
+    temp_directory: str,
+    on_document: PackedDocumentCallable,
+    render_profile: RenderProfile = RENDER_PROFILES[DEFAULT_RENDER_PROFILE],
+    image_encoding: ImageEncoding = IMAGE_ENCODINGS[DEFAULT_IMAGE_ENCODING],
+    http_client: Optional[httpx.AsyncClient] = None,
+    document_concurrency: int = DEFAULT_DOCUMENT_CONCURRENCY,
+) -> AsyncIterator[ImageFile]:
+    """
+    Downloads, renders and encodes many documents and yields their pages as one stream.
+
+    Up to document_concurrency documents are in progress at once and their pages are
+    interleaved in the order they finish encoding. on_document is called with each
+    document once it is read, before its first page is yielded, and with each document
+    that cannot be read once it fails. Errors are logged and recorded on the document:
+    one that fails to render keeps the pages rendered before the failure, and is
+    partial once the stream ends if fewer pages were read than the PDF has.
+    """
+    pages: asyncio.Queue = asyncio.Queue(maxsize=PAGES_AHEAD)
+    sources = iter(enumerate(pdf_sources))
+
+    async def worker() -> None:
+        for index, pdf_source in sources:
+            document = PackedDocument(
+                index=index,
+                pdf_source=str(pdf_source),
+                encoding_stats=EncodingStats(encoding=image_encoding.name),
+            )
+            try:
+                await _stream_document(
+                    document=document,
+                    pdf_source=pdf_source,
+                    temp_directory=temp_directory,
+                    on_document=on_document,
+                    render_profile=render_profile,
+                    image_encoding=image_encoding,
+                    http_client=http_client,
+                    pages=pages,
+                )
+            except Exception as e:
+                logger.error(f"Error reading document {pdf_source}: {e}")
+                document.error = str(e) or type(e).__name__
+                if document.raw_file is None:
+                    on_document(document)
+
+    async def produce() -> None:
+        await asyncio.gather(*(worker() for _ in range(document_concurrency)))
+        await pages.put(None)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while (image_file := await pages.get()) is not None:
+            yield image_file
+        await producer
+    finally:
+        if not producer.done():
+            producer.cancel()
+
+
+async def render_pages(
+    raw_file: RawFile,
+    temp_directory: str,
+    render_profile: RenderProfile,
+    image_encoding: ImageEncoding,
+    stats: EncodingStats,
+) -> AsyncIterator[ImageFile]:
+    """Renders and encodes the pages of a document, then deletes its raw file from the job directory"""
+    try:
+        async for image_file in encode_images(
+            image_files=page_cache.stream_pages(
+                raw_file=raw_file,
+                temp_directory=temp_directory,
+                render_profile=render_profile,
+            ),
+            encoding=image_encoding,
+            stats=stats,
+        ):
+            yield image_file
+    finally:
+        working_directories.discard(raw_file.path)
+
+
+async def _stream_document(
+    document: PackedDocument,
+    pdf_source: Union[str, Path],
+    temp_directory: str,
+    on_document: PackedDocumentCallable,
+    render_profile: RenderProfile,
+    image_encoding: ImageEncoding,
+    http_client: Optional[httpx.AsyncClient],
+    pages: asyncio.Queue,
+) -> None:
+    document.raw_file = await add_file_to_temp_directory(
+        file_source=pdf_source,
+        temp_directory=temp_directory,
+        http_client=http_client,
+    )
+    on_document(document)
+    image_files = render_pages(
+        raw_file=document.raw_file,
+        temp_directory=temp_directory,
+        render_profile=render_profile,
+        image_encoding=image_encoding,
+        stats=document.encoding_stats,
+    )
+    async for image_file in image_files:
+        document.page_count = image_file.page_count
+        document.pages_read += 1
+        await pages.put(image_file)
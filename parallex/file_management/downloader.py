@@ -0,0 +1,341 @@
+import asyncio
+import hashlib
+import re
+import weakref
+from typing import BinaryIO, NamedTuple, Optional
+
+import httpx
+
+from parallex.exceptions.DownloadError import DownloadError
+from parallex.models.downloaded_file import DownloadedFile
+from parallex.utils.logger import logger
+
+DEFAULT_MAX_DOWNLOAD_BYTES = 2 * 1024 * 1024 * 1024
+DEFAULT_DOWNLOAD_TIMEOUT = 300  # Seconds for a whole download
+DEFAULT_REQUEST_TIMEOUT = 30  # Seconds to connect or to wait for the next chunk
+DEFAULT_RANGE_SIZE = 8 * 1024 * 1024
+DEFAULT_RANGE_CONCURRENCY = 8
+WRITE_BUFFER_SIZE = 1024 * 1024
+SNIFF_SIZE = 1024
+
+FILE_SIGNATURES = {
+    b"%PDF-": "application/pdf",
+    b"\xff\xd8\xff": "image/jpeg",
+    b"\x89PNG\r\n\x1a\n": "image/png",
+}
+# Byte offsets only match the file on disk when the body is not compressed
+_IDENTITY_ENCODING = {"Accept-Encoding": "identity"}
+_CONTENT_RANGE_PATTERN = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+)")
+
+
+class ContentRange(NamedTuple):
+    start: int
+    end: int
+    total: int
+
+
+class Downloader:
+    """
+    Process-wide downloader of remote documents.
+
+    A download starts with a request for the first range of the file. If the server
+    answers with part of a larger file, the remaining ranges are fetched in parallel.
+    Otherwise the body arrives in that one response. Chunks are written to disk in a
+    worker thread. Files past max_bytes and downloads past timeout are stopped, and so
+    are requests that wait longer than request_timeout to connect or for the next chunk,
+    whichever client they are sent with. The content type is sniffed from the first bytes, so a missing or wrong Content-Type
+    header does not matter for the supported file types.
+
+    Downloads without a client share one connection pool per event loop, which stays
+    open until aclose() is called on that loop. Parallex sessions download through
+    their own pool from open_client() and close it themselves.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_DOWNLOAD_BYTES,
+        timeout: float = DEFAULT_DOWNLOAD_TIMEOUT,
+        range_size: int = DEFAULT_RANGE_SIZE,
+        range_concurrency: int = DEFAULT_RANGE_CONCURRENCY,
+        request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+    ):
+        _validate_limits(
+            max_bytes, timeout, range_size, range_concurrency, request_timeout
+        )
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.range_size = range_size
+        self.range_concurrency = range_concurrency
+        self.request_timeout = request_timeout
+        self._clients: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, httpx.AsyncClient
+        ] = weakref.WeakKeyDictionary()
+
+    def configure(
+        self,
+        max_bytes: Optional[int] = None,
+        timeout: Optional[float] = None,
+        range_size: Optional[int] = None,
+        range_concurrency: Optional[int] = None,
+        request_timeout: Optional[float] = None,
+    ) -> None:
+        """Changes the limits of downloads started after the call"""
+        _validate_limits(
+            max_bytes, timeout, range_size, range_concurrency, request_timeout
+        )
+        if max_bytes is not None:
+            self.max_bytes = max_bytes
+        if timeout is not None:
+            self.timeout = timeout
+        if range_size is not None:
+            self.range_size = range_size
+        if range_concurrency is not None:
+            self.range_concurrency = range_concurrency
+        if request_timeout is not None:
+            self.request_timeout = request_timeout
+
+    async def download(
+        self, url: str, path: str, client: Optional[httpx.AsyncClient] = None
+    ) -> DownloadedFile:
+        """Downloads url to path, through the shared connection pool when no client is given"""
+        client = client or self._shared_client()
+        try:
+            async with asyncio.timeout(self.timeout):
+                return await self._download(client, url, path)
+        except TimeoutError:
+            raise DownloadError(
+                f"Download of {url} took longer than {self.timeout} seconds"
+            ) from None
+        except httpx.HTTPStatusError as e:
+            raise DownloadError(f"HTTP error occurred: {e}") from e
+        except httpx.RequestError as e:
+            raise DownloadError(
+                f"An error occurred while requesting the file: {e}"
+            ) from e
+
+    async def aclose(self) -> None:
+        """Closes the shared connection pool of the running event loop. It is reopened by the next download."""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    def open_client(self, limits: Optional[httpx.Limits] = None) -> httpx.AsyncClient:
+        """A new connection pool with the downloader's request timeout. The caller closes it."""
+        if limits is None:
+            return httpx.AsyncClient(timeout=self.request_timeout)
+        return httpx.AsyncClient(timeout=self.request_timeout, limits=limits)
+
+    def _shared_client(self) -> httpx.AsyncClient:
+        # Connections belong to the event loop that opened them
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self.open_client()
+            self._clients[loop] = client
+        return client
+
+    async def _download(
+        self, client: httpx.AsyncClient, url: str, path: str
+    ) -> DownloadedFile:
+        await asyncio.to_thread(_create_file, path)
+        head = bytearray()
+        content_hash = hashlib.sha256()
+        headers = {**_IDENTITY_ENCODING, "Range": f"bytes=0-{self.range_size - 1}"}
+        async with client.stream(
+            "GET",
+            url,
+            headers=headers,
+            follow_redirects=True,
+            timeout=self.request_timeout,
+        ) as response:
+            response.raise_for_status()
+            first_range = _content_range(response)
+            if first_range is not None:
+                size = first_range.total
+            elif "Content-Length" in response.headers:
+                size = int(response.headers["Content-Length"])
+            else:
+                size = None
+            if size is not None and size > self.max_bytes:
+                raise DownloadError(
+                    f"{url} is {size} bytes, more than the limit of {self.max_bytes}"
+                )
+            is_partial = first_range is not None and first_range.end + 1 < size
+            received = await _write_body(
+                response,
+                path,
+                offset=0,
+                limit=self.max_bytes,
+                content_hash=None if is_partial else content_hash,
+                head=head,
+            )
+            declared_type = response.headers.get("Content-Type")
+            etag = response.headers.get("ETag")
+
+        if is_partial:
+            await self._download_ranges(
+                client, url, path, first_range.end + 1, size, etag
+            )
+            received = size
+            content_hash = await asyncio.to_thread(_hash_file, path)
+            logger.info(
+                f"downloaded {size} bytes in {-(-size // self.range_size)} ranges - {url}"
+            )
+
+        return DownloadedFile(
+            path=path,
+            content_type=sniff_content_type(bytes(head), declared_type),
+            size=received,
+            content_hash=content_hash.hexdigest(),
+        )
+
+    async def _download_ranges(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        path: str,
+        offset: int,
+        size: int,
+        etag: Optional[str],
+    ) -> None:
+        semaphore = asyncio.Semaphore(self.range_concurrency)
+        headers = dict(_IDENTITY_ENCODING)
+        if etag is not None and not etag.startswith("W/"):
+            # Fails the ranges if the file changes between requests
+            headers["If-Match"] = etag
+
+        async def download_range(start: int, end: int) -> None:
+            async with semaphore:
+                async with client.stream(
+                    "GET",
+                    url,
+                    headers={**headers, "Range": f"bytes={start}-{end}"},
+                    follow_redirects=True,
+                    timeout=self.request_timeout,
+                ) as response:
+                    response.raise_for_status()
+                    content_range = _content_range(response)
+                    if content_range != ContentRange(start, end, size):
+                        raise DownloadError(
+                            f"{url} did not return bytes {start}-{end} of {size}"
+                        )
+                    received = await _write_body(
+                        response, path, offset=start, limit=end - start + 1
+                    )
+                    if received != end - start + 1:
+                        raise DownloadError(
+                            f"{url} returned {received} of bytes {start}-{end}"
+                        )
+
+        tasks = [
+            asyncio.create_task(
+                download_range(start, min(start + self.range_size, size) - 1)
+            )
+            for start in range(offset, size, self.range_size)
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+
+def sniff_content_type(head: bytes, declared_type: Optional[str]) -> Optional[str]:
+    """Content type recognized from the first bytes of a file, or else the declared one"""
+    for signature, content_type in FILE_SIGNATURES.items():
+        if head.startswith(signature):
+            return content_type
+    # PDF readers accept a header preceded by other bytes
+    if b"%PDF-" in head:
+        return "application/pdf"
+    if declared_type is None:
+        return None
+    return declared_type.split(";")[0].strip().lower()
+
+
+def _content_range(response: httpx.Response) -> Optional[ContentRange]:
+    if response.status_code != 206:
+        return None
+    match = _CONTENT_RANGE_PATTERN.fullmatch(
+        response.headers.get("Content-Range", "").strip()
+    )
+    if match is None:
+        raise DownloadError(
+            f"Unsupported Content-Range: {response.headers.get('Content-Range')}"
+        )
+    return ContentRange(*map(int, match.groups()))
+
+
+async def _write_body(
+    response: httpx.Response,
+    path: str,
+    offset: int,
+    limit: int,
+    content_hash: Optional["hashlib._Hash"] = None,
+    head: Optional[bytearray] = None,
+) -> int:
+    """Writes a response body at offset in the file, in a worker thread. Returns the bytes received."""
+    received = 0
+    buffer = bytearray()
+    file = await asyncio.to_thread(open, path, "r+b")
+    try:
+        file.seek(offset)
+        async for chunk in response.aiter_bytes():
+            received += len(chunk)
+            if received > limit:
+                raise DownloadError(f"{response.url} returned more than {limit} bytes")
+            if head is not None and len(head) < SNIFF_SIZE:
+                head += chunk[: SNIFF_SIZE - len(head)]
+            buffer += chunk
+            if len(buffer) >= WRITE_BUFFER_SIZE:
+                await asyncio.to_thread(_write, file, buffer, content_hash)
+                buffer = bytearray()
+        if buffer:
+            await asyncio.to_thread(_write, file, buffer, content_hash)
+    finally:
+        file.close()
+    return received
+
+
+def _write(
+    file: BinaryIO, data: bytearray, content_hash: Optional["hashlib._Hash"]
+) -> None:
+    file.write(data)
+    if content_hash is not None:
+        content_hash.update(data)
+
+
+def _create_file(path: str) -> None:
+    open(path, "wb").close()
+
+
+def _hash_file(path: str) -> "hashlib._Hash":
+    content_hash = hashlib.sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(WRITE_BUFFER_SIZE):
+            content_hash.update(chunk)
+    return content_hash
+
+
+def _validate_limits(
+    max_bytes: Optional[int],
+    timeout: Optional[float],
+    range_size: Optional[int],
+    range_concurrency: Optional[int],
+    request_timeout: Optional[float],
+) -> None:
+    """Rejects limits that would stop every download. None leaves a limit unchanged."""
+    if max_bytes is not None and max_bytes < 1:
+        raise ValueError("max_bytes must be at least 1")
+    if timeout is not None and timeout <= 0:
+        raise ValueError("timeout must be greater than 0")
+    if range_size is not None and range_size < 1:
+        raise ValueError("range_size must be at least 1")
+    if range_concurrency is not None and range_concurrency < 1:
+        raise ValueError("range_concurrency must be at least 1")
+    if request_timeout is not None and request_timeout <= 0:
+        raise ValueError("request_timeout must be greater than 0")
+
+
+downloader = Downloader()
@@ -1,12 +1,22 @@
+import asyncio
+import hashlib
+import os
+import sys
 import uuid
 from pathlib import Path
-from typing import Union
+from typing import Optional, Union
 
 import httpx
 
+from parallex.file_management.downloader import downloader
 from parallex.file_management.utils import file_in_temp_dir
+from parallex.file_management.working_directory import working_directories
 from parallex.models.raw_file import RawFile
 
+COPY_CHUNK_SIZE = 1024 * 1024
+# Linux ioctl that shares the blocks of a file on btrfs, XFS and others
+FICLONE = 0x40049409
+
 ALLOWED_CONTENT_TYPES = {
     "application/pdf": "pdf",
     "image/jpeg": "jpg",
@@ -15,51 +25,66 @@ ALLOWED_CONTENT_TYPES = {
 
 
 async def add_file_to_temp_directory(
-    file_source: Union[str, Path], temp_directory: str
+    file_source: Union[str, Path],
+    temp_directory: str,
+    http_client: Optional[httpx.AsyncClient] = None,
 ) -> RawFile:
-    """Downloads file from URL or copies from file system and adds to temp directory"""
+    """
+    Downloads file from URL or copies from file system and adds to temp directory.
+
+    Downloads reuse http_client when given, and the downloader's shared connection pool otherwise.
+    """
     file_trace_id = uuid.uuid4()
 
     if isinstance(file_source, str) and file_source.startswith(("http://", "https://")):
-        return await _download_file(file_source, temp_directory, file_trace_id)
+        return await _download_file(
+            http_client, file_source, temp_directory, file_trace_id
+        )
     elif isinstance(file_source, (str, Path)):
-        return _copy_local_file(file_source, temp_directory, file_trace_id)
+        return await asyncio.to_thread(
+            _copy_local_file, file_source, temp_directory, file_trace_id
+        )
     else:
         raise ValueError("Invalid file source. Must be a URL or a file path.")
 
 
 async def _download_file(
-    url: str, temp_directory: str, file_trace_id: uuid.UUID
+    client: Optional[httpx.AsyncClient],
+    url: str,
+    temp_directory: str,
+    file_trace_id: uuid.UUID,
 ) -> RawFile:
     given_file_name = url.split("/")[-1]
-    async with httpx.AsyncClient() as client:
-        try:
-            async with client.stream("GET", url) as response:
-                response.raise_for_status()
-                content_type = response.headers.get("Content-Type")
-                file_name = _determine_file_name(file_trace_id, content_type)
-                path = file_in_temp_dir(temp_directory, file_name)
-                with open(path, "wb") as file:
-                    async for chunk in response.aiter_bytes():
-                        file.write(chunk)
-
-                return RawFile(
-                    name=file_name,
-                    path=path,
-                    content_type=content_type,
-                    given_name=given_file_name,
-                    pdf_source_url=url,
-                    trace_id=file_trace_id,
-                )
-        except httpx.HTTPStatusError as e:
-            raise Exception(f"HTTP error occurred: {e}")
-        except httpx.RequestError as e:
-            raise Exception(f"An error occurred while requesting the file: {e}")
+    downloaded_file = await downloader.download(
+        url=url,
+        path=file_in_temp_dir(temp_directory, f"{file_trace_id}.download"),
+        client=client,
+    )
+    file_name = _determine_file_name(file_trace_id, downloaded_file.content_type)
+    path = file_in_temp_dir(temp_directory, file_name)
+    await asyncio.to_thread(os.replace, downloaded_file.path, path)
+    working_directories.track(path)
+
+    return RawFile(
+        name=file_name,
+        path=path,
+        content_type=downloaded_file.content_type,
+        given_name=given_file_name,
+        pdf_source_url=url,
+        trace_id=file_trace_id,
+        content_hash=downloaded_file.content_hash,
+    )
 
 
 def _copy_local_file(
     file_path: Union[str, Path], temp_directory: str, file_trace_id: uuid.UUID
 ) -> RawFile:
+    """
+    Adds a local file to the temp directory without copying its content when possible.
+
+    The file is hard-linked, reflinked or symlinked into the temp directory, in that order,
+    and copied in chunks only when none of those work. Memory use does not grow with file size.
+    """
     source_path = Path(file_path)
     if not source_path.exists():
         raise FileNotFoundError(f"The file {file_path} does not exist.")
@@ -68,7 +93,9 @@ def _copy_local_file(
     file_name = _determine_file_name(file_trace_id, content_type)
     destination_path = file_in_temp_dir(temp_directory, file_name)
 
-    Path(destination_path).write_bytes(source_path.read_bytes())
+    content_hash = _link_file(source_path, destination_path)
+    if content_hash is None:
+        content_hash = _copy_file_in_chunks(source_path, destination_path)
 
     return RawFile(
         name=file_name,
@@ -77,9 +104,55 @@ def _copy_local_file(
         given_name=source_path.name,
         pdf_source_url=None,
         trace_id=file_trace_id,
+        content_hash=content_hash,
     )
 
 
+def _link_file(source_path: Path, destination_path: str) -> Optional[str]:
+    """Links the file into place and returns the hash of its content, or None if it can't be linked"""
+    for link in (os.link, _reflink, _symlink):
+        try:
+            link(source_path, destination_path)
+        except (OSError, NotImplementedError):
+            continue
+        return _hash_file(source_path)
+    return None
+
+
+def _reflink(source_path: Path, destination_path: str) -> None:
+    if not sys.platform.startswith("linux"):
+        raise NotImplementedError("reflinks are only made on Linux")
+    import fcntl
+
+    with open(source_path, "rb") as source, open(destination_path, "wb") as destination:
+        try:
+            fcntl.ioctl(destination.fileno(), FICLONE, source.fileno())
+        except OSError:
+            os.unlink(destination_path)
+            raise
+
+
+def _symlink(source_path: Path, destination_path: str) -> None:
+    os.symlink(source_path.resolve(), destination_path)
+
+
+def _copy_file_in_chunks(source_path: Path, destination_path: str) -> str:
+    content_hash = hashlib.sha256()
+    with open(source_path, "rb") as source, open(destination_path, "wb") as destination:
+        while chunk := source.read(COPY_CHUNK_SIZE):
+            destination.write(chunk)
+            content_hash.update(chunk)
+    return content_hash.hexdigest()
+
+
+def _hash_file(path: Path) -> str:
+    content_hash = hashlib.sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(COPY_CHUNK_SIZE):
+            content_hash.update(chunk)
+    return content_hash.hexdigest()
+
+
 def _get_content_type(file_path: Path) -> str:
     extension = file_path.suffix.lower()[1:]  # Remove the leading dot
     for content_type, ext in ALLOWED_CONTENT_TYPES.items():
@@ -0,0 +1,56 @@
+import asyncio
+import os
+from pathlib import Path
+from typing import AsyncIterable, AsyncIterator
+
+from PIL import Image
+
+from parallex.models.encoding_stats import EncodingStats
+from parallex.models.image_encoding import ImageEncoding
+from parallex.models.image_file import ImageFile
+
+
+async def encode_images(
+    image_files: AsyncIterable[ImageFile],
+    encoding: ImageEncoding,
+    stats: EncodingStats,
+) -> AsyncIterator[ImageFile]:
+    """
+    Re-encodes rendered pages with the given encoding and records the sizes in stats.
+
+    A page keeps its original PNG when the re-encoded image would be larger.
+    """
+    async for image_file in image_files:
+        original_bytes = os.path.getsize(image_file.path)
+        if encoding.is_passthrough:
+            stats.add_page(original_bytes, original_bytes)
+            yield image_file
+            continue
+
+        encoded_file = await asyncio.to_thread(encode_image, image_file, encoding)
+        stats.add_page(original_bytes, os.path.getsize(encoded_file.path))
+        yield encoded_file
+
+
+def encode_image(image_file: ImageFile, encoding: ImageEncoding) -> ImageFile:
+    """Writes the page in the given encoding next to the original and keeps the smaller of the two"""
+    source_path = Path(image_file.path)
+    encoded_path = source_path.with_name(
+        f"{source_path.stem}-encoded.{encoding.format}"
+    )
+
+    with Image.open(source_path) as image:
+        image = image.convert("L" if encoding.grayscale else "RGB")
+        save_options = {"optimize": True}
+        if encoding.format != "png":
+            save_options["quality"] = encoding.quality
+        image.save(encoded_path, format=encoding.format.upper(), **save_options)
+
+    if encoded_path.stat().st_size >= source_path.stat().st_size:
+        encoded_path.unlink()
+        return image_file
+
+    source_path.unlink()
+    return image_file.model_copy(
+        update={"path": str(encoded_path), "content_type": encoding.content_type}
+    )
@@ -0,0 +1,241 @@
+import asyncio
+import atexit
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import AsyncIterator, Optional
+
+from parallex.file_management.converter import stream_pdf_to_images
+from parallex.models.image_file import ImageFile
+from parallex.models.raw_file import RawFile
+from parallex.models.render_profile import (
+    RenderProfile,
+    RENDER_PROFILES,
+    DEFAULT_RENDER_PROFILE,
+)
+from parallex.utils.logger import logger
+
+DEFAULT_PAGE_CACHE_MAX_BYTES = 0  # Caching is off until a size is configured
+MANIFEST_NAME = "manifest.json"
+
+
+class PageCache:
+    """
+    Process-wide cache of rendered page sets on disk, keyed by document content and render profile.
+
+    Off by default: configure a max_bytes to turn it on. Pages are hard-linked into the
+    caller's temp directory one at a time as they are pulled, so callers can change or
+    delete their copies and the working directory budget applies to cached pages as to
+    rendered ones. Pages being rendered are staged for the cache while staged pages of
+    all documents fit in max_bytes, and a document is not cached once they no longer do.
+    Once the cached pages outgrow max_bytes, the least recently used sets are evicted.
+    Without a directory, the cache lives in a temp directory removed at exit.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_bytes: int = DEFAULT_PAGE_CACHE_MAX_BYTES,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._staged_bytes = 0
+
+    def configure(
+        self, directory: Optional[str] = None, max_bytes: Optional[int] = None
+    ) -> None:
+        """Sets where page sets are cached and the cache size. A max_bytes of 0 disables caching."""
+        if directory is not None:
+            self.directory = os.path.expanduser(directory)
+        if max_bytes is not None:
+            self.max_bytes = max_bytes
+
+    async def stream_pages(
+        self,
+        raw_file: RawFile,
+        temp_directory: str,
+        render_profile: RenderProfile = RENDER_PROFILES[DEFAULT_RENDER_PROFILE],
+    ) -> AsyncIterator[ImageFile]:
+        """Yields the pages of a document from the cache, or renders and caches them"""
+        if self.max_bytes <= 0 or raw_file.content_hash is None:
+            async for image_file in stream_pdf_to_images(
+                raw_file=raw_file,
+                temp_directory=temp_directory,
+                render_profile=render_profile,
+            ):
+                yield image_file
+            return
+
+        key = f"{raw_file.content_hash}-{_profile_digest(render_profile)}"
+        page_count = await asyncio.to_thread(self._open_entry, key)
+        pages_served = 0
+        if page_count is not None:
+            logger.info(f"pages cached - {raw_file.trace_id}")
+            for page_number in range(1, page_count + 1):
+                try:
+                    image_file = await asyncio.to_thread(
+                        self._link_cached_page,
+                        key,
+                        raw_file,
+                        temp_directory,
+                        page_number,
+                        page_count,
+                    )
+                except OSError as e:
+                    logger.warning(
+                        f"cached pages were evicted, rendering the rest - "
+                        f"{raw_file.trace_id}: {e}"
+                    )
+                    break
+                pages_served += 1
+                yield image_file
+            else:
+                return
+
+        staging_directory = None
+        if not pages_served:
+            staging_directory = tempfile.mkdtemp(prefix=".staging-", dir=self._root())
+        staged_bytes = 0
+        pages_rendered = 0
+        try:
+            async for image_file in stream_pdf_to_images(
+                raw_file=raw_file,
+                temp_directory=temp_directory,
+                render_profile=render_profile,
+            ):
+                pages_rendered += 1
+                if image_file.page_number <= pages_served:
+                    await asyncio.to_thread(os.unlink, image_file.path)
+                    continue
+                if staging_directory is not None:
+                    page_bytes = await asyncio.to_thread(
+                        _stage_page, image_file, staging_directory
+                    )
+                    staged_bytes += page_bytes
+                    self._staged_bytes += page_bytes
+                    if self._staged_bytes > self.max_bytes:
+                        logger.info(
+                            f"staged pages are past the page cache size, "
+                            f"not caching the document - {raw_file.trace_id}"
+                        )
+                        await asyncio.to_thread(shutil.rmtree, staging_directory, True)
+                        staging_directory = None
+                        self._staged_bytes -= staged_bytes
+                        staged_bytes = 0
+                if (
+                    staging_directory is not None
+                    and pages_rendered == image_file.page_count
+                ):
+                    evicted = await asyncio.to_thread(
+                        self._commit, key, staging_directory, image_file.page_count
+                    )
+                    staging_directory = None
+                    self._staged_bytes -= staged_bytes
+                    staged_bytes = 0
+                    if evicted:
+                        logger.info(f"evicted {evicted} cached page sets")
+                yield image_file
+        finally:
+            self._staged_bytes -= staged_bytes
+            if staging_directory is not None:
+                shutil.rmtree(staging_directory, ignore_errors=True)
+
+    def _root(self) -> str:
+        if self.directory is None:
+            self.directory = tempfile.mkdtemp(prefix="parallex-pages-")
+            atexit.register(shutil.rmtree, self.directory, True)
+        os.makedirs(self.directory, exist_ok=True)
+        return self.directory
+
+    def _open_entry(self, key: str) -> Optional[int]:
+        """Returns the page count of a cached page set and marks it used, or None if it is not cached"""
+        manifest_path = os.path.join(self._root(), key, MANIFEST_NAME)
+        try:
+            with open(manifest_path) as manifest_file:
+                page_count = json.load(manifest_file)["page_count"]
+            os.utime(manifest_path)
+        except (OSError, ValueError, KeyError):
+            return None
+        return page_count
+
+    def _link_cached_page(
+        self,
+        key: str,
+        raw_file: RawFile,
+        temp_directory: str,
+        page_number: int,
+        page_count: int,
+    ) -> ImageFile:
+        path = os.path.join(
+            temp_directory, f"{raw_file.trace_id}-cached-{page_number}.png"
+        )
+        _link_or_copy(os.path.join(self._root(), key, f"{page_number}.png"), path)
+        return ImageFile(
+            path=path,
+            page_number=page_number,
+            given_file_name=raw_file.given_name,
+            trace_id=raw_file.trace_id,
+            page_count=page_count,
+        )
+
+    def _commit(self, key: str, staging_directory: str, page_count: int) -> int:
+        with open(os.path.join(staging_directory, MANIFEST_NAME), "w") as manifest:
+            json.dump({"page_count": page_count}, manifest)
+        try:
+            os.rename(staging_directory, os.path.join(self._root(), key))
+        except OSError:
+            # Another process cached the same page set first
+            shutil.rmtree(staging_directory, ignore_errors=True)
+        return self._evict()
+
+    def _evict(self) -> int:
+        entries = []
+        total_bytes = 0
+        with os.scandir(self._root()) as children:
+            for child in children:
+                manifest_path = os.path.join(child.path, MANIFEST_NAME)
+                if child.name.startswith(".") or not os.path.exists(manifest_path):
+                    continue
+                size = _directory_size(child.path)
+                entries.append((os.path.getmtime(manifest_path), size, child.path))
+                total_bytes += size
+        evicted = 0
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total_bytes -= size
+            evicted += 1
+        return evicted
+
+
+def _profile_digest(render_profile: RenderProfile) -> str:
+    return hashlib.sha256(render_profile.model_dump_json().encode("utf-8")).hexdigest()[
+        :16
+    ]
+
+
+def _stage_page(image_file: ImageFile, staging_directory: str) -> int:
+    """Links a rendered page into a staging directory and returns its size"""
+    _link_or_copy(
+        image_file.path,
+        os.path.join(staging_directory, f"{image_file.page_number}.png"),
+    )
+    return os.path.getsize(image_file.path)
+
+
+def _link_or_copy(source: str, destination: str) -> None:
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+
+def _directory_size(path: str) -> int:
+    with os.scandir(path) as children:
+        return sum(child.stat().st_size for child in children if child.is_file())
+
+
+page_cache = PageCache()
@@ -0,0 +1,51 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Optional
+
+from pdf2image import convert_from_path
+
+
+class RasterizationEngine:
+    """
+    Process-wide pool that renders PDF page ranges.
+
+    Every parallex() call in the process submits its page ranges here, so the number of
+    concurrent pdftocairo renders never exceeds max_workers regardless of how many
+    documents are in flight. Each worker thread only waits on its pdftocairo subprocess,
+    so rendering uses every CPU without worker processes.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def configure(self, max_workers: int) -> None:
+        """Changes the render budget. Takes effect for renders submitted after the call."""
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.shutdown(wait=False)
+        self.max_workers = max_workers
+
+    async def render(self, **options) -> list[str]:
+        """Renders a page range in a worker thread and returns the image paths."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(), partial(convert_from_path, **options)
+        )
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="parallex-render"
+            )
+        return self._executor
+
+
+rasterization_engine = RasterizationEngine()
@@ -0,0 +1,135 @@
+import asyncio
+import os
+import shutil
+import tempfile
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from parallex.utils.logger import logger
+
+
+class WorkingDirectories:
+    """
+    Process-wide manager of the working directories of jobs, with a disk budget.
+
+    Each job gets a directory under root that is removed when the job ends. Pages and
+    shards written there are tracked and deleted as soon as they are no longer needed.
+    A job waits before taking on more files while its own tracked files are past
+    job_max_bytes, or the tracked files of all jobs are past max_bytes. A budget of 0
+    means no limit. Without a root, directories are made in the system temp directory.
+    """
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        max_bytes: int = 0,
+        job_max_bytes: int = 0,
+    ):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.job_max_bytes = job_max_bytes
+        self._files: dict[str, dict[str, int]] = {}
+        self._job_bytes: dict[str, int] = {}
+        self._used_bytes = 0
+        self._room_waiters: list[asyncio.Future] = []
+
+    def configure(
+        self,
+        root: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        job_max_bytes: Optional[int] = None,
+    ) -> None:
+        """Sets where job directories are made and the disk budgets. Takes effect for jobs started after the call."""
+        if root is not None:
+            self.root = os.path.abspath(os.path.expanduser(root))
+        if max_bytes is not None:
+            self.max_bytes = max_bytes
+        if job_max_bytes is not None:
+            self.job_max_bytes = job_max_bytes
+        self._wake_waiters()
+
+    @property
+    def used_bytes(self) -> int:
+        return self._used_bytes
+
+    @asynccontextmanager
+    async def job(self) -> AsyncIterator[str]:
+        """Makes the working directory of a job and removes it with its files when the job ends"""
+        if self.root is not None:
+            os.makedirs(self.root, exist_ok=True)
+        directory = tempfile.mkdtemp(prefix="parallex-", dir=self.root)
+        self._files[directory] = {}
+        self._job_bytes[directory] = 0
+        try:
+            yield directory
+        finally:
+            self._files.pop(directory)
+            self._used_bytes -= self._job_bytes.pop(directory)
+            shutil.rmtree(directory, ignore_errors=True)
+            self._wake_waiters()
+
+    def track(self, path: str) -> None:
+        """Counts a file in a job directory against the budgets until it is discarded"""
+        directory = os.path.dirname(path)
+        files = self._files.get(directory)
+        if files is None or path in files:
+            return
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        files[path] = size
+        self._job_bytes[directory] += size
+        self._used_bytes += size
+
+    def discard(self, path: str) -> None:
+        """Deletes a file in a job directory that is no longer needed and frees its bytes"""
+        directory = os.path.dirname(path)
+        files = self._files.get(directory)
+        if files is None:
+            return
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not delete {path}: {e}")
+            return
+        size = files.pop(path, 0)
+        if size:
+            self._job_bytes[directory] -= size
+            self._used_bytes -= size
+            self._wake_waiters()
+
+    def has_room(self, directory: str) -> bool:
+        """Whether the job can take on more files within the budgets"""
+        if directory not in self._job_bytes:
+            return True
+        if self.job_max_bytes and self._job_bytes[directory] >= self.job_max_bytes:
+            return False
+        return not self.max_bytes or self._used_bytes < self.max_bytes
+
+    async def wait_for_room(self, directory: str) -> None:
+        """Waits until the job can take on more files within the budgets"""
+        if not self.has_room(directory):
+            logger.info(
+                f"waiting for disk budget. {self._job_bytes[directory]} bytes in job, "
+                f"{self._used_bytes} bytes in all jobs - {directory}"
+            )
+        while not self.has_room(directory):
+            room = asyncio.get_running_loop().create_future()
+            self._room_waiters.append(room)
+            try:
+                await room
+            finally:
+                if room in self._room_waiters:
+                    self._room_waiters.remove(room)
+
+    def _wake_waiters(self) -> None:
+        waiters, self._room_waiters = self._room_waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+
+working_directories = WorkingDirectories()
@@ -1,3 +1,4 @@
+from typing import Optional
 from uuid import UUID
 
 from pydantic import BaseModel, Field
@@ -9,3 +10,12 @@ class BatchFile(BaseModel):
     purpose: str = Field(description="Purpose 'batch")
     status: str = Field(description="Status of the batch")
     trace_id: UUID = Field(description="Unique trace for each file")
+    path: Optional[str] = Field(
+        None, description="Local path of the JSONL file that was uploaded"
+    )
+    model_name: Optional[str] = Field(
+        None, description="Model the requests in the file are sent to"
+    )
+    estimated_tokens: int = Field(
+        0, description="Estimated input tokens of the requests in the file"
+    )
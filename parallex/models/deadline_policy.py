@@ -0,0 +1,29 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+DEFAULT_BATCH_TIMEOUT = 30 * 60
+
+
+class DeadlinePolicy(BaseModel):
+    """How long to wait for a batch, and what to do with a batch that takes longer"""
+
+    timeout: Optional[float] = Field(
+        DEFAULT_BATCH_TIMEOUT,
+        gt=0,
+        description="Seconds to wait for a batch. None waits for the batch's completion window",
+    )
+    hedge: bool = Field(
+        False,
+        description="Cancel a batch past its deadline and send its pending requests through the Chat Completions API",
+    )
+    cancel_grace: float = Field(
+        60,
+        ge=0,
+        description="Seconds to wait for a cancelled batch to report the requests it finished",
+    )
+    hedge_concurrency: int = Field(
+        20,
+        ge=1,
+        description="Maximum concurrent Chat Completions requests when hedging",
+    )
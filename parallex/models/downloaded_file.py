@@ -0,0 +1,12 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class DownloadedFile(BaseModel):
+    path: str = Field(description="Path the file was downloaded to")
+    content_type: Optional[str] = Field(
+        None, description="Content type sniffed from the file, or the one declared"
+    )
+    size: int = Field(description="Size of the file in bytes")
+    content_hash: str = Field(description="SHA-256 of the file content")
@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+
+
+class EncodingStats(BaseModel):
+    encoding: str = Field(description="Name of the image encoding used")
+    pages: int = Field(0, description="Number of pages encoded")
+    original_bytes: int = Field(0, description="Size of the rendered PNG pages")
+    encoded_bytes: int = Field(0, description="Size of the pages as sent to the model")
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_bytes - self.encoded_bytes
+
+    def add_page(self, original_bytes: int, encoded_bytes: int) -> None:
+        self.pages += 1
+        self.original_bytes += original_bytes
+        self.encoded_bytes += encoded_bytes
@@ -0,0 +1,47 @@
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
+
+
+class ImageEncoding(BaseModel):
+    name: str = Field(description="Name of the encoding")
+    format: Literal["png", "jpeg", "webp"] = Field(
+        "png", description="Image format sent to the model"
+    )
+    quality: int = Field(
+        85, ge=1, le=100, description="Quality for lossy formats (jpeg, webp)"
+    )
+    grayscale: bool = Field(False, description="Convert pages to grayscale")
+    detail: Optional[Literal["low", "high", "auto"]] = Field(
+        None, description="Image detail level requested from the model"
+    )
+
+    @property
+    def content_type(self) -> str:
+        return f"image/{self.format}"
+
+    @property
+    def is_passthrough(self) -> bool:
+        """Rendered pages are PNG, so a plain PNG encoding needs no re-encoding"""
+        return self.format == "png" and not self.grayscale
+
+
+IMAGE_ENCODINGS = {
+    "lossless": ImageEncoding(name="lossless"),
+    "high": ImageEncoding(name="high", format="jpeg", quality=90),
+    "balanced": ImageEncoding(
+        name="balanced", format="jpeg", quality=80, grayscale=True
+    ),
+    "compact": ImageEncoding(name="compact", format="webp", quality=60, grayscale=True),
+}
+DEFAULT_IMAGE_ENCODING = "lossless"
+
+
+def resolve_image_encoding(encoding: str | ImageEncoding) -> ImageEncoding:
+    if isinstance(encoding, ImageEncoding):
+        return encoding
+    if encoding not in IMAGE_ENCODINGS:
+        raise ValueError(
+            f"Unknown image encoding: {encoding}. Expected one of {list(IMAGE_ENCODINGS)}"
+        )
+    return IMAGE_ENCODINGS[encoding]
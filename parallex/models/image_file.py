@@ -1,3 +1,4 @@
+from typing import Optional
 from uuid import UUID
 
 from pydantic import BaseModel
@@ -9,3 +10,5 @@ class ImageFile(BaseModel):
     page_number: int = Field(description="Associated page of the PDF")
     given_file_name: str = Field(description="Name of the given file")
     trace_id: UUID = Field(description="Unique trace for each file")
+    content_type: str = Field("image/png", description="Content type of the image")
+    page_count: Optional[int] = Field(None, description="Number of pages in the PDF")
@@ -0,0 +1,29 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from parallex.models.encoding_stats import EncodingStats
+from parallex.models.raw_file import RawFile
+
+
+class PackedDocument(BaseModel):
+    index: int = Field(description="Position of the document in the given sources")
+    pdf_source: str = Field(description="URL or file path the document was given as")
+    raw_file: Optional[RawFile] = Field(
+        None, description="The document in the temp directory, once it is read"
+    )
+    encoding_stats: EncodingStats = Field(
+        description="Sizes of the pages before and after image encoding"
+    )
+    page_count: Optional[int] = Field(None, description="Number of pages in the PDF")
+    pages_read: int = Field(0, description="Pages rendered and encoded so far")
+    error: Optional[str] = Field(
+        None, description="Why the document could not be read or rendered in full"
+    )
+
+    @property
+    def partial(self) -> bool:
+        """Whether pages of the document are missing from the stream"""
+        if self.error is not None:
+            return True
+        return self.page_count is not None and self.pages_read < self.page_count
@@ -3,6 +3,7 @@ from uuid import UUID
 
 from pydantic import BaseModel, Field
 
+from parallex.models.encoding_stats import EncodingStats
 from parallex.models.page_response import PageResponse
 
 
@@ -13,3 +14,12 @@ class ParallexCallableOutput(BaseModel):
     )
     trace_id: UUID = Field(description="Unique trace for each file")
     pages: list[PageResponse] = Field(description="List of PageResponse objects")
+    encoding_stats: Optional[EncodingStats] = Field(
+        None, description="Sizes of the pages before and after image encoding"
+    )
+    partial: bool = Field(
+        False, description="Whether pages are missing because the document failed"
+    )
+    error: Optional[str] = Field(
+        None, description="Why the document could not be read or rendered in full"
+    )
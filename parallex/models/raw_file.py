@@ -11,3 +11,4 @@ class RawFile(BaseModel):
     given_name: str = Field(description="Name of file given")
     pdf_source_url: Optional[str] = Field(description="Source of file", default=None)
     trace_id: UUID = Field(description="Unique trace for each file")
+    content_hash: Optional[str] = Field(None, description="SHA-256 of the file content")
@@ -0,0 +1,24 @@
+from pydantic import BaseModel, Field
+
+
+class RenderProfile(BaseModel):
+    name: str = Field(description="Name of the profile")
+    target_height: int = Field(description="Height in pixels of each rendered page")
+
+
+RENDER_PROFILES = {
+    "standard": RenderProfile(name="standard", target_height=1056),
+    "draft": RenderProfile(name="draft", target_height=792),
+    "detailed": RenderProfile(name="detailed", target_height=1584),
+}
+DEFAULT_RENDER_PROFILE = "standard"
+
+
+def resolve_render_profile(profile: str | RenderProfile) -> RenderProfile:
+    if isinstance(profile, RenderProfile):
+        return profile
+    if profile not in RENDER_PROFILES:
+        raise ValueError(
+            f"Unknown render profile: {profile}. Expected one of {list(RENDER_PROFILES)}"
+        )
+    return RENDER_PROFILES[profile]
@@ -35,6 +35,9 @@ class UploadBatch(BaseModel):
         None, description="File that is created during error of batch"
     )
     errors: Optional[Errors] = Field(None, description="List of errors")
+    input_file_path: Optional[str] = Field(
+        None, description="Local path of the JSONL file the batch was created from"
+    )
 
 
 def build_batch(open_ai_batch: Batch, trace_id: UUID) -> UploadBatch:
@@ -1,12 +1,24 @@
 import asyncio
-import tempfile
+import os
+from collections import defaultdict
+from functools import partial
 from pathlib import Path
 import uuid
-from typing import Callable, Optional, Union, List
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Optional,
+    Sequence,
+    TypeVar,
+    Union,
+    List,
+)
 from uuid import UUID
 
+import httpx
 from pydantic import BaseModel
-from openai import APIError
+from openai import APIError, AsyncOpenAI, DefaultAsyncHttpxClient
 
 from parallex.ai.batch_processor import (
     wait_for_batch_completion,
@@ -14,30 +26,553 @@ from parallex.ai.batch_processor import (
     BatchCreationError,
     BatchProcessingError,
 )
-from parallex.ai.open_ai_client import OpenAIClient
-from parallex.ai.output_processor import process_images_output, process_prompts_output
+from parallex.exceptions.BatchDeadlineError import BatchDeadlineError
+from parallex.ai.open_ai_client import OpenAIClient, RateLimiter, rate_limiter
+from parallex.ai.shard_planner import ShardPlanner
+from parallex.ai.output_processor import (
+    OutputRecords,
+    build_page_responses,
+    build_prompt_responses,
+    collect_page_responses,
+    collect_page_responses_by_trace,
+    collect_prompt_responses,
+    iter_output_records,
+)
+from parallex.ai.execution_mode import ExecutionMode, select_execution_mode
+from parallex.ai.result_cache import ResultCache, ResultCacheLookup
+from parallex.ai.realtime_processor import (
+    process_images_realtime,
+    process_prompts_realtime,
+)
+from parallex.ai.straggler_hedger import hedge_batch
 from parallex.ai.uploader import (
     upload_images_for_processing,
     upload_prompts_for_processing,
 )
-from parallex.file_management.converter import convert_pdf_to_images
+from parallex.file_management.downloader import downloader
+from parallex.file_management.document_stream import (
+    DEFAULT_DOCUMENT_CONCURRENCY,
+    render_pages,
+    stream_documents_to_images,
+)
+from parallex.file_management.working_directory import working_directories
 from parallex.file_management.file_finder import add_file_to_temp_directory
 from parallex.file_management.remote_file_handler import RemoteFileHandler
 from parallex.models.batch_file import BatchFile
+from parallex.models.deadline_policy import DeadlinePolicy
+from parallex.models.encoding_stats import EncodingStats
+from parallex.models.image_file import ImageFile
+from parallex.models.image_encoding import (
+    ImageEncoding,
+    IMAGE_ENCODINGS,
+    DEFAULT_IMAGE_ENCODING,
+    resolve_image_encoding,
+)
+from parallex.models.packed_document import PackedDocument
 from parallex.models.page_response import PageResponse
 from parallex.models.parallex_callable_output import ParallexCallableOutput
 from parallex.models.parallex_prompts_callable_output import (
     ParallexPromptsCallableOutput,
 )
+from parallex.models.prompt_response import PromptResponse
+from parallex.models.raw_file import RawFile
+from parallex.models.render_profile import (
+    RenderProfile,
+    RENDER_PROFILES,
+    DEFAULT_RENDER_PROFILE,
+    resolve_render_profile,
+)
 from parallex.models.upload_batch import UploadBatch
 from parallex.utils.constants import DEFAULT_PROMPT
 from parallex.utils.logger import logger, setup_logger
+from parallex.utils.singleflight import Singleflight
 
 # Define more specific types for callables
 PostProcessCallable = Callable[[ParallexCallableOutput], None]
 PromptsPostProcessCallable = Callable[[ParallexPromptsCallableOutput], None]
+CollectedType = TypeVar("CollectedType")
 
 DEFAULT_TEMPERATURE = 0.0
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 20
+DEFAULT_KEEPALIVE_EXPIRY = 60
+
+# Concurrent calls processing identical documents with the same settings
+_document_flights = Singleflight()
+
+
+class Parallex:
+    """
+    A long-lived session that shares HTTP connection pools across documents and prompts.
+
+    Every call made through a session reuses one OpenAI client and one download client,
+    so TLS handshakes and connection pools are paid for once rather than per document.
+    Batches are watched by the process-wide batch poller, and requests go through the
+    session's rate limiter, which is the process-wide one unless another is given.
+
+    Usage:
+        async with Parallex() as session:
+            output = await session.parallex(model_name="gpt-4o-mini", pdf_source=url)
+    """
+
+    def __init__(
+        self,
+        api_key_env_name: str = "OPENAI_API_KEY",
+        log_level: Optional[str] = None,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+        limiter: RateLimiter = rate_limiter,
+    ):
+        """
+        Args:
+            api_key_env_name: The environment variable name containing the OpenAI API key.
+            log_level: Logging level. Left unchanged if None.
+            max_connections: Maximum open connections of each HTTP pool.
+            max_keepalive_connections: Maximum idle connections kept open in each HTTP pool.
+            keepalive_expiry: Seconds an idle connection is kept open.
+            limiter: Rate limiter for requests to OpenAI.
+        """
+        if log_level is not None:
+            setup_logger(log_level)
+        self.api_key_env_name = api_key_env_name
+        self.limiter = limiter
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._openai: Optional[AsyncOpenAI] = None
+        self._http_client: Optional[httpx.AsyncClient] = None
+
+    async def __aenter__(self) -> "Parallex":
+        self._openai = AsyncOpenAI(
+            api_key=os.getenv(self.api_key_env_name),
+            http_client=DefaultAsyncHttpxClient(limits=self._limits),
+        )
+        self._http_client = downloader.open_client(self._limits)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Closes the HTTP connection pools of the session"""
+        if self._openai is not None:
+            await self._openai.close()
+            self._openai = None
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+    async def parallex(
+        self,
+        model_name: str,
+        pdf_source: Union[str, Path],
+        post_process_callable: Optional[PostProcessCallable] = None,
+        concurrency: Optional[int] = 20,
+        prompt_text: Optional[str] = DEFAULT_PROMPT,
+        response_model: Optional[type[BaseModel]] = None,
+        temperature: float = DEFAULT_TEMPERATURE,
+        render_profile: str | RenderProfile = DEFAULT_RENDER_PROFILE,
+        image_encoding: str | ImageEncoding = DEFAULT_IMAGE_ENCODING,
+        shard_planner: Optional[ShardPlanner] = None,
+        deadline_policy: Optional[DeadlinePolicy] = None,
+        execution_mode: ExecutionMode = "batch",
+        priority: int = 0,
+        result_cache: Optional[ResultCache] = None,
+    ) -> ParallexCallableOutput | List[UploadBatch] | None:
+        """Runs parallex() with the connections of this session"""
+        remote_file_handler = RemoteFileHandler()
+        open_ai_client = self._open_ai_client(remote_file_handler)
+        try:
+            return await _execute(
+                open_ai_client=open_ai_client,
+                pdf_source=pdf_source,
+                http_client=self._http_client,
+                post_process_callable=post_process_callable,
+                concurrency=concurrency,
+                prompt_text=prompt_text,
+                model_name=model_name,
+                response_model=response_model,
+                temperature=temperature,
+                render_profile=resolve_render_profile(render_profile),
+                image_encoding=resolve_image_encoding(image_encoding),
+                shard_planner=shard_planner,
+                priority=priority,
+                deadline_policy=deadline_policy,
+                execution_mode=execution_mode,
+                result_cache=result_cache,
+            )
+        except Exception as e:
+            logger.error(f"Error occurred: {e}")
+            raise e
+        finally:
+            await _delete_associated_files(open_ai_client, remote_file_handler)
+
+    async def parallex_async(
+        self,
+        model_name: str,
+        pdf_source: Union[str, Path],
+        concurrency: Optional[int] = 20,
+        prompt_text: Optional[str] = DEFAULT_PROMPT,
+        response_model: Optional[type[BaseModel]] = None,
+        temperature: float = DEFAULT_TEMPERATURE,
+        render_profile: str | RenderProfile = DEFAULT_RENDER_PROFILE,
+        image_encoding: str | ImageEncoding = DEFAULT_IMAGE_ENCODING,
+        shard_planner: Optional[ShardPlanner] = None,
+        deadline_policy: Optional[DeadlinePolicy] = None,
+        execution_mode: ExecutionMode = "batch",
+        priority: int = 0,
+    ) -> ParallexCallableOutput | List[UploadBatch] | None:
+        """Runs parallex_async() with the connections of this session"""
+        remote_file_handler = RemoteFileHandler()
+        open_ai_client = self._open_ai_client(remote_file_handler)
+        try:
+            return await _execute(
+                open_ai_client=open_ai_client,
+                pdf_source=pdf_source,
+                http_client=self._http_client,
+                post_process_callable=None,
+                concurrency=concurrency,
+                prompt_text=prompt_text,
+                model_name=model_name,
+                response_model=response_model,
+                temperature=temperature,
+                render_profile=resolve_render_profile(render_profile),
+                image_encoding=resolve_image_encoding(image_encoding),
+                shard_planner=shard_planner,
+                priority=priority,
+                deadline_policy=deadline_policy,
+                execution_mode=execution_mode,
+            )
+        except Exception as e:
+            logger.error(f"Error occurred: {e}")
+            raise e
+
+    async def parallex_many(
+        self,
+        model_name: str,
+        pdf_sources: Sequence[Union[str, Path]],
+        post_process_callable: Optional[PostProcessCallable] = None,
+        concurrency: Optional[int] = 20,
+        document_concurrency: int = DEFAULT_DOCUMENT_CONCURRENCY,
+        prompt_text: Optional[str] = DEFAULT_PROMPT,
+        response_model: Optional[type[BaseModel]] = None,
+        temperature: float = DEFAULT_TEMPERATURE,
+        render_profile: str | RenderProfile = DEFAULT_RENDER_PROFILE,
+        image_encoding: str | ImageEncoding = DEFAULT_IMAGE_ENCODING,
+        shard_planner: Optional[ShardPlanner] = None,
+        deadline_policy: Optional[DeadlinePolicy] = None,
+        priority: int = 0,
+    ) -> List[ParallexCallableOutput]:
+        """Runs parallex_many() with the connections of this session"""
+        remote_file_handler = RemoteFileHandler()
+        open_ai_client = self._open_ai_client(remote_file_handler)
+        try:
+            return await _execute_many(
+                open_ai_client=open_ai_client,
+                pdf_sources=pdf_sources,
+                model_name=model_name,
+                post_process_callable=post_process_callable,
+                concurrency=concurrency,
+                document_concurrency=document_concurrency,
+                prompt_text=prompt_text,
+                response_model=response_model,
+                temperature=temperature,
+                render_profile=resolve_render_profile(render_profile),
+                image_encoding=resolve_image_encoding(image_encoding),
+                shard_planner=shard_planner,
+                deadline_policy=deadline_policy,
+                priority=priority,
+                http_client=self._http_client,
+            )
+        except Exception as e:
+            logger.error(f"Error occurred: {e}")
+            raise e
+        finally:
+            await _delete_associated_files(open_ai_client, remote_file_handler)
+
+    async def parallex_stream(
+        self,
+        model_name: str,
+        pdf_source: Union[str, Path],
+        concurrency: Optional[int] = 20,
+        prompt_text: Optional[str] = DEFAULT_PROMPT,
+        response_model: Optional[type[BaseModel]] = None,
+        temperature: float = DEFAULT_TEMPERATURE,
+        render_profile: str | RenderProfile = DEFAULT_RENDER_PROFILE,
+        image_encoding: str | ImageEncoding = DEFAULT_IMAGE_ENCODING,
+        shard_planner: Optional[ShardPlanner] = None,
+        deadline_policy: Optional[DeadlinePolicy] = None,
+        priority: int = 0,
+    ) -> AsyncIterator[PageResponse]:
+        """Runs parallex_stream() with the connections of this session"""
+        remote_file_handler = RemoteFileHandler()
+        open_ai_client = self._open_ai_client(remote_file_handler)
+        try:
+            async for page in _execute_stream(
+                open_ai_client=open_ai_client,
+                pdf_source=pdf_source,
+                model_name=model_name,
+                concurrency=concurrency,
+                prompt_text=prompt_text,
+                response_model=response_model,
+                temperature=temperature,
+                render_profile=resolve_render_profile(render_profile),
+                image_encoding=resolve_image_encoding(image_encoding),
+                shard_planner=shard_planner,
+                deadline_policy=deadline_policy,
+                priority=priority,
+                http_client=self._http_client,
+            ):
+                yield page
+        finally:
+            await _delete_associated_files(open_ai_client, remote_file_handler)
+
+    async def parallex_simple_prompts(
+        self,
+        model_name: str,
+        prompts: List[str],
+        post_process_callable: Optional[PromptsPostProcessCallable] = None,
+        concurrency: Optional[int] = 20,
+        response_model: Optional[type[BaseModel]] = None,
+        temperature: float = DEFAULT_TEMPERATURE,
+        shard_planner: Optional[ShardPlanner] = None,
+        deadline_policy: Optional[DeadlinePolicy] = None,
+        execution_mode: ExecutionMode = "batch",
+        priority: int = 0,
+        result_cache: Optional[ResultCache] = None,
+    ) -> ParallexPromptsCallableOutput | None:
+        """Runs parallex_simple_prompts() with the connections of this session"""
+        remote_file_handler = RemoteFileHandler()
+        open_ai_client = self._open_ai_client(remote_file_handler)
+        try:
+            return await _prompts_execute(
+                open_ai_client=open_ai_client,
+                prompts=prompts,
+                post_process_callable=post_process_callable,
+                concurrency=concurrency,
+                model_name=model_name,
+                response_model=response_model,
+                temperature=temperature,
+                shard_planner=shard_planner,
+                priority=priority,
+                deadline_policy=deadline_policy,
+                execution_mode=execution_mode,
+                result_cache=result_cache,
+            )
+        except Exception as e:
+            logger.error(f"Error occurred: {e}")
+            raise e
+        finally:
+            await _delete_associated_files(open_ai_client, remote_file_handler)
+
+    async def parallex_simple_prompts_async(
+        self,
+        model_name: str,
+        prompts: List[str],
+        concurrency: Optional[int] = 20,
+        response_model: Optional[type[BaseModel]] = None,
+        temperature: float = DEFAULT_TEMPERATURE,
+        shard_planner: Optional[ShardPlanner] = None,
+        deadline_policy: Optional[DeadlinePolicy] = None,
+        execution_mode: ExecutionMode = "batch",
+        priority: int = 0,
+    ) -> ParallexPromptsCallableOutput | List[UploadBatch] | None:
+        """Runs parallex_simple_prompts_async() with the connections of this session"""
+        remote_file_handler = RemoteFileHandler()
+        open_ai_client = self._open_ai_client(remote_file_handler)
+        try:
+            return await _prompts_execute(
+                open_ai_client=open_ai_client,
+                prompts=prompts,
+                post_process_callable=None,
+                concurrency=concurrency,
+                model_name=model_name,
+                response_model=response_model,
+                temperature=temperature,
+                shard_planner=shard_planner,
+                priority=priority,
+                deadline_policy=deadline_policy,
+                execution_mode=execution_mode,
+            )
+        except Exception as e:
+            logger.error(f"Error occurred: {e}")
+            raise e
+
+    async def parallex_simple_prompts_stream(
+        self,
+        model_name: str,
+        prompts: List[str],
+        concurrency: Optional[int] = 20,
+        response_model: Optional[type[BaseModel]] = None,
+        temperature: float = DEFAULT_TEMPERATURE,
+        shard_planner: Optional[ShardPlanner] = None,
+        deadline_policy: Optional[DeadlinePolicy] = None,
+        priority: int = 0,
+    ) -> AsyncIterator[PromptResponse]:
+        """Runs parallex_simple_prompts_stream() with the connections of this session"""
+        remote_file_handler = RemoteFileHandler()
+        open_ai_client = self._open_ai_client(remote_file_handler)
+        try:
+            async for response in _prompts_execute_stream(
+                open_ai_client=open_ai_client,
+                prompts=prompts,
+                model_name=model_name,
+                concurrency=concurrency,
+                response_model=response_model,
+                temperature=temperature,
+                shard_planner=shard_planner,
+                deadline_policy=deadline_policy,
+                priority=priority,
+            ):
+                yield response
+        finally:
+            await _delete_associated_files(open_ai_client, remote_file_handler)
+
+    async def retrieve_image_batch(
+        self,
+        batch_id: str,
+        trace_id: UUID,
+        input_file_id: str,
+        output_file_id: str,
+        error_file_id: str,
+        concurrency: int = 20,
+        response_model: Optional[type[BaseModel]] = None,
+        deadline_policy: Optional[DeadlinePolicy] = None,
+    ) -> list[PageResponse]:
+        """Runs retrieve_image_batch() with the connections of this session"""
+        remote_file_handler = RemoteFileHandler()
+        open_ai_client = self._open_ai_client(remote_file_handler)
+
+        remote_file_handler.add_file(error_file_id)
+        remote_file_handler.add_file(input_file_id)
+        remote_file_handler.add_file(output_file_id)
+
+        batch_jobs = [
+            UploadBatch(
+                id=batch_id,
+                trace_id=trace_id,
+                error_file_id=error_file_id,
+                input_file_id=input_file_id,
+                output_file_id=output_file_id,
+                failed_at=None,
+                endpoint="",
+                created_at=0,
+                expired_at=None,
+                expires_at=None,
+                cancelling_at=None,
+                finalizing_at=None,
+                cancelled_at=None,
+                completed_at=None,
+                in_progress_at=None,
+                completion_window="24hrs",
+                errors=None,
+                status="",
+            )
+        ]
+
+        pages_tasks = []
+        process_semaphore = asyncio.Semaphore(concurrency)
+        for batch in batch_jobs:
+            page_task = asyncio.create_task(
+                _wait_and_create_pages(
+                    batch=batch,
+                    client=open_ai_client,
+                    semaphore=process_semaphore,
+                    response_model=response_model,
+                    deadline_policy=deadline_policy,
+                )
+            )
+            pages_tasks.append(page_task)
+        page_groups = await asyncio.gather(*pages_tasks)
+
+        pages = [page for batch_pages in page_groups for page in batch_pages]
+        logger.info(f"pages done. total pages- {len(pages)} - {trace_id}")
+        sorted_pages = sorted(pages, key=lambda x: x.page_number)
+
+        await _delete_associated_files(open_ai_client, remote_file_handler)
+
+        return sorted_pages
+
+    async def retrieve_prompt_batch(
+        self,
+        batch_id: str,
+        trace_id: UUID,
+        input_file_id: str,
+        output_file_id: str,
+        error_file_id: str,
+        concurrency: int = 20,
+        response_model: Optional[type[BaseModel]] = None,
+        deadline_policy: Optional[DeadlinePolicy] = None,
+    ) -> list[BaseModel]:
+        """Runs retrieve_prompt_batch() with the connections of this session"""
+        remote_file_handler = RemoteFileHandler()
+        open_ai_client = self._open_ai_client(remote_file_handler)
+
+        remote_file_handler.add_file(error_file_id)
+        remote_file_handler.add_file(input_file_id)
+        remote_file_handler.add_file(output_file_id)
+
+        batch_jobs = [
+            UploadBatch(
+                id=batch_id,
+                trace_id=trace_id,
+                error_file_id=error_file_id,
+                input_file_id=input_file_id,
+                output_file_id=output_file_id,
+                failed_at=None,
+                endpoint="",
+                created_at=0,
+                expired_at=None,
+                expires_at=None,
+                cancelling_at=None,
+                finalizing_at=None,
+                cancelled_at=None,
+                completed_at=None,
+                in_progress_at=None,
+                completion_window="24hrs",
+                errors=None,
+                status="",
+            )
+        ]
+
+        prompt_tasks = []
+        process_semaphore = asyncio.Semaphore(concurrency)
+        for batch in batch_jobs:
+            prompt_task = asyncio.create_task(
+                _wait_and_create_prompt_responses(
+                    batch=batch,
+                    client=open_ai_client,
+                    semaphore=process_semaphore,
+                    response_model=response_model,
+                    deadline_policy=deadline_policy,
+                )
+            )
+            prompt_tasks.append(prompt_task)
+        prompt_response_groups = await asyncio.gather(*prompt_tasks)
+
+        flat_responses = [
+            response for batch in prompt_response_groups for response in batch
+        ]
+
+        sorted_responses = sorted(flat_responses, key=lambda x: x.prompt_index)
+
+        await _delete_associated_files(open_ai_client, remote_file_handler)
+
+        return sorted_responses
+
+    def _open_ai_client(self, remote_file_handler: RemoteFileHandler) -> OpenAIClient:
+        """A client for one call, tracking that call's files on the session's connections"""
+        if self._openai is None:
+            raise RuntimeError("The Parallex session is not open. Use 'async with'.")
+        return OpenAIClient(
+            remote_file_handler=remote_file_handler,
+            api_key_env_name=self.api_key_env_name,
+            limiter=self.limiter,
+            openai_client=self._openai,
+        )
 
 
 async def parallex(
@@ -50,6 +585,13 @@ async def parallex(
     response_model: Optional[type[BaseModel]] = None,
     api_key_env_name: str = "OPENAI_API_KEY",
     temperature: float = DEFAULT_TEMPERATURE,
+    render_profile: str | RenderProfile = DEFAULT_RENDER_PROFILE,
+    image_encoding: str | ImageEncoding = DEFAULT_IMAGE_ENCODING,
+    shard_planner: Optional[ShardPlanner] = None,
+    deadline_policy: Optional[DeadlinePolicy] = None,
+    execution_mode: ExecutionMode = "batch",
+    priority: int = 0,
+    result_cache: Optional[ResultCache] = None,
 ) -> ParallexCallableOutput | List[UploadBatch] | None:
     """
     Orchestrates the process of extracting information from a PDF document using OpenAI's API.
@@ -64,32 +606,35 @@ async def parallex(
         response_model: Pydantic model for structured output.
         api_key_env_name: The environment variable name containing the OpenAI API key.
         temperature: The temperature to use for the OpenAI API.
+        render_profile: Name of a render profile ("standard", "draft", "detailed") or a RenderProfile.
+        image_encoding: Name of an image encoding ("lossless", "high", "balanced", "compact") or an ImageEncoding.
+        shard_planner: Policy for splitting requests into batches. Defaults to 180 MB / 50,000 request batches.
+        deadline_policy: How long to wait for each batch and whether to hedge batches past that. Defaults to a 30 minute timeout without hedging.
+        execution_mode: "batch" for the Batch API, "realtime" for concurrent Chat Completions requests, or "auto" to pick realtime for small jobs and short deadlines.
+        priority: Batches of higher priority calls are created first while the enqueued token quota is full.
+        result_cache: Cache of earlier responses. Cached pages or prompts are not sent again, and new responses are cached. Used in batch mode when waiting for results.
 
     Returns:
         ParallexCallableOutput: Processed output containing extracted information.
     """
     setup_logger(log_level)
-    remote_file_handler = RemoteFileHandler()
-    open_ai_client = OpenAIClient(
-        remote_file_handler=remote_file_handler,
-        api_key_env_name=api_key_env_name,
-    )
-    try:
-        return await _execute(
-            open_ai_client=open_ai_client,
+    async with Parallex(api_key_env_name=api_key_env_name) as session:
+        return await session.parallex(
+            model_name=model_name,
             pdf_source=pdf_source,
             post_process_callable=post_process_callable,
             concurrency=concurrency,
             prompt_text=prompt_text,
-            model_name=model_name,
             response_model=response_model,
             temperature=temperature,
+            render_profile=render_profile,
+            image_encoding=image_encoding,
+            shard_planner=shard_planner,
+            deadline_policy=deadline_policy,
+            execution_mode=execution_mode,
+            priority=priority,
+            result_cache=result_cache,
         )
-    except Exception as e:
-        logger.error(f"Error occurred: {e}")
-        raise e
-    finally:
-        await _delete_associated_files(open_ai_client, remote_file_handler)
 
 
 async def parallex_async(
@@ -101,6 +646,12 @@ async def parallex_async(
     response_model: Optional[type[BaseModel]] = None,
     api_key_env_name: str = "OPENAI_API_KEY",
     temperature: float = DEFAULT_TEMPERATURE,
+    render_profile: str | RenderProfile = DEFAULT_RENDER_PROFILE,
+    image_encoding: str | ImageEncoding = DEFAULT_IMAGE_ENCODING,
+    shard_planner: Optional[ShardPlanner] = None,
+    deadline_policy: Optional[DeadlinePolicy] = None,
+    execution_mode: ExecutionMode = "batch",
+    priority: int = 0,
 ) -> ParallexCallableOutput | List[UploadBatch] | None:
     """
     Orchestrates the process of extracting information from a PDF document using OpenAI's API.
@@ -114,30 +665,150 @@ async def parallex_async(
         response_model: Pydantic model for structured output.
         api_key_env_name: The environment variable name containing the OpenAI API key.
         temperature: The temperature to use for the OpenAI API.
+        render_profile: Name of a render profile ("standard", "draft", "detailed") or a RenderProfile.
+        image_encoding: Name of an image encoding ("lossless", "high", "balanced", "compact") or an ImageEncoding.
+        shard_planner: Policy for splitting requests into batches. Defaults to 180 MB / 50,000 request batches.
+        deadline_policy: How long to wait for each batch and whether to hedge batches past that. Defaults to a 30 minute timeout without hedging.
+        execution_mode: "batch" for the Batch API, "realtime" for concurrent Chat Completions requests, or "auto" to pick realtime for small jobs and short deadlines.
+        priority: Batches of higher priority calls are created first while the enqueued token quota is full.
 
     Returns:
         ParallexCallableOutput: Processed output containing extracted information.
     """
     setup_logger(log_level)
-    remote_file_handler = RemoteFileHandler()
-    open_ai_client = OpenAIClient(
-        remote_file_handler=remote_file_handler,
-        api_key_env_name=api_key_env_name,
-    )
-    try:
-        return await _execute(
-            open_ai_client=open_ai_client,
+    async with Parallex(api_key_env_name=api_key_env_name) as session:
+        return await session.parallex_async(
+            model_name=model_name,
             pdf_source=pdf_source,
-            post_process_callable=None,
             concurrency=concurrency,
             prompt_text=prompt_text,
+            response_model=response_model,
+            temperature=temperature,
+            render_profile=render_profile,
+            image_encoding=image_encoding,
+            shard_planner=shard_planner,
+            deadline_policy=deadline_policy,
+            execution_mode=execution_mode,
+            priority=priority,
+        )
+
+
+async def parallex_many(
+    model_name: str,
+    pdf_sources: Sequence[Union[str, Path]],
+    post_process_callable: Optional[PostProcessCallable] = None,
+    concurrency: Optional[int] = 20,
+    document_concurrency: int = DEFAULT_DOCUMENT_CONCURRENCY,
+    prompt_text: Optional[str] = DEFAULT_PROMPT,
+    log_level: Optional[str] = "ERROR",
+    response_model: Optional[type[BaseModel]] = None,
+    api_key_env_name: str = "OPENAI_API_KEY",
+    temperature: float = DEFAULT_TEMPERATURE,
+    render_profile: str | RenderProfile = DEFAULT_RENDER_PROFILE,
+    image_encoding: str | ImageEncoding = DEFAULT_IMAGE_ENCODING,
+    shard_planner: Optional[ShardPlanner] = None,
+    deadline_policy: Optional[DeadlinePolicy] = None,
+    priority: int = 0,
+) -> List[ParallexCallableOutput]:
+    """
+    Extracts information from many PDF documents, packing their pages into shared batches.
+
+    Args:
+        model_name: The name of the OpenAI model to use.
+        pdf_sources: URLs or file paths of the PDF documents.
+        post_process_callable: Optional callable for post-processing the output of each document.
+        concurrency: Maximum number of concurrent API requests.
+        document_concurrency: Maximum number of documents downloaded and rendered at once.
+        prompt_text: Default prompt text to use for image processing.
+        log_level: Logging level.
+        response_model: Pydantic model for structured output.
+        api_key_env_name: The environment variable name containing the OpenAI API key.
+        temperature: The temperature to use for the OpenAI API.
+        render_profile: Name of a render profile ("standard", "draft", "detailed") or a RenderProfile.
+        image_encoding: Name of an image encoding ("lossless", "high", "balanced", "compact") or an ImageEncoding.
+        shard_planner: Policy for splitting requests into batches. Defaults to 180 MB / 50,000 request batches.
+        deadline_policy: How long to wait for each batch and whether to hedge batches past that. Defaults to a 30 minute timeout without hedging.
+        priority: Batches of higher priority calls are created first while the enqueued token quota is full.
+
+    Returns:
+        List[ParallexCallableOutput]: Output of each document, in the order of pdf_sources. Documents that could not be read or rendered in full are marked partial, with the error.
+    """
+    setup_logger(log_level)
+    async with Parallex(api_key_env_name=api_key_env_name) as session:
+        return await session.parallex_many(
             model_name=model_name,
+            pdf_sources=pdf_sources,
+            post_process_callable=post_process_callable,
+            concurrency=concurrency,
+            document_concurrency=document_concurrency,
+            prompt_text=prompt_text,
             response_model=response_model,
             temperature=temperature,
+            render_profile=render_profile,
+            image_encoding=image_encoding,
+            shard_planner=shard_planner,
+            deadline_policy=deadline_policy,
+            priority=priority,
         )
-    except Exception as e:
-        logger.error(f"Error occurred: {e}")
-        raise e
+
+
+async def parallex_stream(
+    model_name: str,
+    pdf_source: Union[str, Path],
+    concurrency: Optional[int] = 20,
+    prompt_text: Optional[str] = DEFAULT_PROMPT,
+    log_level: Optional[str] = "ERROR",
+    response_model: Optional[type[BaseModel]] = None,
+    api_key_env_name: str = "OPENAI_API_KEY",
+    temperature: float = DEFAULT_TEMPERATURE,
+    render_profile: str | RenderProfile = DEFAULT_RENDER_PROFILE,
+    image_encoding: str | ImageEncoding = DEFAULT_IMAGE_ENCODING,
+    shard_planner: Optional[ShardPlanner] = None,
+    deadline_policy: Optional[DeadlinePolicy] = None,
+    priority: int = 0,
+) -> AsyncIterator[PageResponse]:
+    """
+    Extracts information from a PDF document, yielding pages as each batch completes.
+
+    Pages of a batch are yielded in page order as soon as that batch is done, so pages
+    of different batches can arrive out of order. Close the iterator (for example with
+    contextlib.aclosing) when stopping early, so remaining batches are abandoned and
+    uploaded files are deleted.
+
+    Args:
+        model_name: The name of the OpenAI model to use.
+        pdf_source: URL or file path to the PDF document.
+        concurrency: Maximum number of concurrent API requests.
+        prompt_text: Default prompt text to use for image processing.
+        log_level: Logging level.
+        response_model: Pydantic model for structured output.
+        api_key_env_name: The environment variable name containing the OpenAI API key.
+        temperature: The temperature to use for the OpenAI API.
+        render_profile: Name of a render profile ("standard", "draft", "detailed") or a RenderProfile.
+        image_encoding: Name of an image encoding ("lossless", "high", "balanced", "compact") or an ImageEncoding.
+        shard_planner: Policy for splitting requests into batches. Defaults to 180 MB / 50,000 request batches.
+        deadline_policy: How long to wait for each batch and whether to hedge batches past that. Defaults to a 30 minute timeout without hedging.
+        priority: Batches of higher priority calls are created first while the enqueued token quota is full.
+
+    Returns:
+        AsyncIterator[PageResponse]: Pages of the document as their batches complete.
+    """
+    setup_logger(log_level)
+    async with Parallex(api_key_env_name=api_key_env_name) as session:
+        async for page in session.parallex_stream(
+            model_name=model_name,
+            pdf_source=pdf_source,
+            concurrency=concurrency,
+            prompt_text=prompt_text,
+            response_model=response_model,
+            temperature=temperature,
+            render_profile=render_profile,
+            image_encoding=image_encoding,
+            shard_planner=shard_planner,
+            deadline_policy=deadline_policy,
+            priority=priority,
+        ):
+            yield page
 
 
 async def parallex_simple_prompts(
@@ -149,6 +820,11 @@ async def parallex_simple_prompts(
     response_model: Optional[type[BaseModel]] = None,
     api_key_env_name: str = "OPENAI_API_KEY",
     temperature: float = DEFAULT_TEMPERATURE,
+    shard_planner: Optional[ShardPlanner] = None,
+    deadline_policy: Optional[DeadlinePolicy] = None,
+    execution_mode: ExecutionMode = "batch",
+    priority: int = 0,
+    result_cache: Optional[ResultCache] = None,
 ) -> ParallexPromptsCallableOutput | None:
     """
     Processes a list of prompts using OpenAI's API.
@@ -162,31 +838,30 @@ async def parallex_simple_prompts(
         response_model: Pydantic model for structured output.
         api_key_env_name: The environment variable name containing the OpenAI API key.
         temperature: The temperature to use for the OpenAI API.
+        shard_planner: Policy for splitting requests into batches. Defaults to 180 MB / 50,000 request batches.
+        deadline_policy: How long to wait for each batch and whether to hedge batches past that. Defaults to a 30 minute timeout without hedging.
+        execution_mode: "batch" for the Batch API, "realtime" for concurrent Chat Completions requests, or "auto" to pick realtime for small jobs and short deadlines.
+        priority: Batches of higher priority calls are created first while the enqueued token quota is full.
+        result_cache: Cache of earlier responses. Cached pages or prompts are not sent again, and new responses are cached. Used in batch mode when waiting for results.
 
     Returns:
         ParallexPromptsCallableOutput: Processed output containing responses to the prompts.
     """
     setup_logger(log_level)
-    remote_file_handler = RemoteFileHandler()
-    open_ai_client = OpenAIClient(
-        remote_file_handler=remote_file_handler,
-        api_key_env_name=api_key_env_name,
-    )
-    try:
-        return await _prompts_execute(
-            open_ai_client=open_ai_client,
+    async with Parallex(api_key_env_name=api_key_env_name) as session:
+        return await session.parallex_simple_prompts(
+            model_name=model_name,
             prompts=prompts,
             post_process_callable=post_process_callable,
             concurrency=concurrency,
-            model_name=model_name,
             response_model=response_model,
             temperature=temperature,
+            shard_planner=shard_planner,
+            deadline_policy=deadline_policy,
+            execution_mode=execution_mode,
+            priority=priority,
+            result_cache=result_cache,
         )
-    except Exception as e:
-        logger.error(f"Error occurred: {e}")
-        raise e
-    finally:
-        await _delete_associated_files(open_ai_client, remote_file_handler)
 
 
 async def parallex_simple_prompts_async(
@@ -197,7 +872,11 @@ async def parallex_simple_prompts_async(
     response_model: Optional[type[BaseModel]] = None,
     api_key_env_name: str = "OPENAI_API_KEY",
     temperature: float = DEFAULT_TEMPERATURE,
-) -> ParallexPromptsCallableOutput | None:
+    shard_planner: Optional[ShardPlanner] = None,
+    deadline_policy: Optional[DeadlinePolicy] = None,
+    execution_mode: ExecutionMode = "batch",
+    priority: int = 0,
+) -> ParallexPromptsCallableOutput | List[UploadBatch] | None:
     """
     Processes a list of prompts using OpenAI's API.
 
@@ -209,29 +888,75 @@ async def parallex_simple_prompts_async(
         response_model: Pydantic model for structured output.
         api_key_env_name: The environment variable name containing the OpenAI API key.
         temperature: The temperature to use for the OpenAI API.
+        shard_planner: Policy for splitting requests into batches. Defaults to 180 MB / 50,000 request batches.
+        deadline_policy: How long to wait for each batch and whether to hedge batches past that. Defaults to a 30 minute timeout without hedging.
+        execution_mode: "batch" for the Batch API, "realtime" for concurrent Chat Completions requests, or "auto" to pick realtime for small jobs and short deadlines.
+        priority: Batches of higher priority calls are created first while the enqueued token quota is full.
 
     Returns:
         ParallexPromptsCallableOutput: Processed output containing responses to the prompts.
     """
     setup_logger(log_level)
-    remote_file_handler = RemoteFileHandler()
-    open_ai_client = OpenAIClient(
-        remote_file_handler=remote_file_handler,
-        api_key_env_name=api_key_env_name,
-    )
-    try:
-        return await _prompts_execute(
-            open_ai_client=open_ai_client,
+    async with Parallex(api_key_env_name=api_key_env_name) as session:
+        return await session.parallex_simple_prompts_async(
+            model_name=model_name,
             prompts=prompts,
-            post_process_callable=None,
             concurrency=concurrency,
-            model_name=model_name,
             response_model=response_model,
             temperature=temperature,
+            shard_planner=shard_planner,
+            deadline_policy=deadline_policy,
+            execution_mode=execution_mode,
+            priority=priority,
         )
-    except Exception as e:
-        logger.error(f"Error occurred: {e}")
-        raise e
+
+
+async def parallex_simple_prompts_stream(
+    model_name: str,
+    prompts: List[str],
+    log_level: Optional[str] = "ERROR",
+    concurrency: Optional[int] = 20,
+    response_model: Optional[type[BaseModel]] = None,
+    api_key_env_name: str = "OPENAI_API_KEY",
+    temperature: float = DEFAULT_TEMPERATURE,
+    shard_planner: Optional[ShardPlanner] = None,
+    deadline_policy: Optional[DeadlinePolicy] = None,
+    priority: int = 0,
+) -> AsyncIterator[PromptResponse]:
+    """
+    Processes a list of prompts, yielding responses as each batch completes.
+
+    Responses of a batch are yielded in prompt order as soon as that batch is done, so
+    responses of different batches can arrive out of order.
+
+    Args:
+        model_name: The name of the OpenAI model to use.
+        prompts: List of prompt strings to process.
+        log_level: Logging level.
+        concurrency: Maximum number of concurrent API requests.
+        response_model: Pydantic model for structured output.
+        api_key_env_name: The environment variable name containing the OpenAI API key.
+        temperature: The temperature to use for the OpenAI API.
+        shard_planner: Policy for splitting requests into batches. Defaults to 180 MB / 50,000 request batches.
+        deadline_policy: How long to wait for each batch and whether to hedge batches past that. Defaults to a 30 minute timeout without hedging.
+        priority: Batches of higher priority calls are created first while the enqueued token quota is full.
+
+    Returns:
+        AsyncIterator[PromptResponse]: Responses to the prompts as their batches complete.
+    """
+    setup_logger(log_level)
+    async with Parallex(api_key_env_name=api_key_env_name) as session:
+        async for response in session.parallex_simple_prompts_stream(
+            model_name=model_name,
+            prompts=prompts,
+            concurrency=concurrency,
+            response_model=response_model,
+            temperature=temperature,
+            shard_planner=shard_planner,
+            deadline_policy=deadline_policy,
+            priority=priority,
+        ):
+            yield response
 
 
 async def _prompts_execute(
@@ -242,6 +967,11 @@ async def _prompts_execute(
     concurrency: Optional[int] = 20,
     response_model: Optional[type[BaseModel]] = None,
     temperature: float = DEFAULT_TEMPERATURE,
+    shard_planner: Optional[ShardPlanner] = None,
+    deadline_policy: Optional[DeadlinePolicy] = None,
+    execution_mode: ExecutionMode = "batch",
+    priority: int = 0,
+    result_cache: Optional[ResultCache] = None,
 ) -> ParallexPromptsCallableOutput | List[UploadBatch] | None:
     """
     Executes the prompt processing workflow.
@@ -254,59 +984,84 @@ async def _prompts_execute(
         concurrency: Maximum number of concurrent API requests.
         response_model: Pydantic model for structured output.
         temperature: The temperature to use for the OpenAI API.
+        shard_planner: Policy for splitting requests into batches.
+        deadline_policy: How long to wait for each batch and whether to hedge batches past that.
+        execution_mode: "batch", "realtime" or "auto".
+        priority: Priority of the batches while the enqueued token quota is full.
+        result_cache: Cache of earlier responses, consulted in batch mode when waiting for results.
 
     Returns:
         ParallexPromptsCallableOutput: Processed output containing responses to the prompts.
     """
-    with tempfile.TemporaryDirectory() as temp_directory:
+    async with working_directories.job() as temp_directory:
         trace_id = uuid.uuid4()
         try:
-            batch_files = await upload_prompts_for_processing(
-                client=open_ai_client,
-                prompts=prompts,
-                temp_directory=temp_directory,
-                trace_id=trace_id,
-                model_name=model_name,
-                response_model=response_model,
-                temperature=temperature,
-            )
-            start_batch_semaphore = asyncio.Semaphore(concurrency)
-            start_batch_tasks = []
-            for file in batch_files:
-                batch_task = asyncio.create_task(
-                    _create_batch_jobs(
-                        batch_file=file,
+            mode = select_execution_mode(execution_mode, len(prompts), deadline_policy)
+            if mode == "realtime":
+                output_records = await process_prompts_realtime(
+                    client=open_ai_client,
+                    prompts=prompts,
+                    trace_id=trace_id,
+                    model_name=model_name,
+                    concurrency=concurrency,
+                    response_model=response_model,
+                    temperature=temperature,
+                )
+                flat_responses = build_prompt_responses(output_records, response_model)
+            else:
+                cache_lookup = None
+                if result_cache is not None and post_process_callable is not None:
+                    cache_lookup = ResultCacheLookup(result_cache, response_model)
+                batch_jobs = await _upload_and_create_batches(
+                    upload=partial(
+                        upload_prompts_for_processing,
                         client=open_ai_client,
+                        prompts=prompts,
+                        temp_directory=temp_directory,
                         trace_id=trace_id,
-                        semaphore=start_batch_semaphore,
-                    )
+                        model_name=model_name,
+                        response_model=response_model,
+                        temperature=temperature,
+                        shard_planner=shard_planner,
+                        cache_lookup=cache_lookup,
+                        keep_shards=_keeps_shards(deadline_policy),
+                    ),
+                    client=open_ai_client,
+                    trace_id=trace_id,
+                    concurrency=concurrency,
+                    priority=priority,
                 )
-                start_batch_tasks.append(batch_task)
-            batch_jobs = await asyncio.gather(*start_batch_tasks)
 
-            if post_process_callable is None:
-                return batch_jobs
+                if post_process_callable is None:
+                    return batch_jobs
 
-            process_semaphore = asyncio.Semaphore(concurrency)
-            prompt_tasks = []
-            for batch in batch_jobs:
-                logger.info(
-                    f"waiting for batch to complete - {batch.id} - {batch.trace_id}"
-                )
-                prompt_task = asyncio.create_task(
-                    _wait_and_create_prompt_responses(
-                        batch=batch,
-                        client=open_ai_client,
-                        semaphore=process_semaphore,
-                        response_model=response_model,
+                process_semaphore = asyncio.Semaphore(concurrency)
+                prompt_tasks = []
+                for batch in batch_jobs:
+                    logger.info(
+                        f"waiting for batch to complete - {batch.id} - {batch.trace_id}"
+                    )
+                    prompt_task = asyncio.create_task(
+                        _wait_and_create_prompt_responses(
+                            batch=batch,
+                            client=open_ai_client,
+                            semaphore=process_semaphore,
+                            response_model=response_model,
+                            deadline_policy=deadline_policy,
+                            cache_lookup=cache_lookup,
+                        )
+                    )
+                    prompt_tasks.append(prompt_task)
+                prompt_response_groups = await asyncio.gather(*prompt_tasks)
+
+                flat_responses = [
+                    response for batch in prompt_response_groups for response in batch
+                ]
+                if cache_lookup is not None:
+                    logger.info(f"{len(cache_lookup.hits)} prompts cached - {trace_id}")
+                    flat_responses += build_prompt_responses(
+                        cache_lookup.hits, response_model
                     )
-                )
-                prompt_tasks.append(prompt_task)
-            prompt_response_groups = await asyncio.gather(*prompt_tasks)
-
-            flat_responses = [
-                response for batch in prompt_response_groups for response in batch
-            ]
 
             sorted_responses = sorted(flat_responses, key=lambda x: x.prompt_index)
 
@@ -316,7 +1071,8 @@ async def _prompts_execute(
                 responses=sorted_responses,
             )
 
-            post_process_callable(output=callable_output)
+            if post_process_callable is not None:
+                post_process_callable(output=callable_output)
 
             return callable_output
         except (BatchCreationError, BatchProcessingError, APIError) as e:
@@ -327,6 +1083,80 @@ async def _prompts_execute(
             raise
 
 
+async def _prompts_execute_stream(
+    open_ai_client: OpenAIClient,
+    prompts: List[str],
+    model_name: str,
+    concurrency: Optional[int] = 20,
+    response_model: Optional[type[BaseModel]] = None,
+    temperature: float = DEFAULT_TEMPERATURE,
+    shard_planner: Optional[ShardPlanner] = None,
+    deadline_policy: Optional[DeadlinePolicy] = None,
+    priority: int = 0,
+) -> AsyncIterator[PromptResponse]:
+    """
+    Executes the prompt processing workflow, yielding the responses of each batch as it completes.
+
+    Args:
+        open_ai_client: OpenAI client instance.
+        prompts: List of prompts to process.
+        model_name: The name of the OpenAI model to use.
+        concurrency: Maximum number of concurrent API requests.
+        response_model: Pydantic model for structured output.
+        temperature: The temperature to use for the OpenAI API.
+        shard_planner: Policy for splitting requests into batches.
+        deadline_policy: How long to wait for each batch and whether to hedge batches past that.
+        priority: Priority of the batches while the enqueued token quota is full.
+
+    Returns:
+        AsyncIterator[PromptResponse]: Responses to the prompts as their batches complete.
+    """
+    async with working_directories.job() as temp_directory:
+        trace_id = uuid.uuid4()
+        try:
+            batch_jobs = await _upload_and_create_batches(
+                upload=partial(
+                    upload_prompts_for_processing,
+                    client=open_ai_client,
+                    prompts=prompts,
+                    temp_directory=temp_directory,
+                    trace_id=trace_id,
+                    model_name=model_name,
+                    response_model=response_model,
+                    temperature=temperature,
+                    shard_planner=shard_planner,
+                    keep_shards=_keeps_shards(deadline_policy),
+                ),
+                client=open_ai_client,
+                trace_id=trace_id,
+                concurrency=concurrency,
+                priority=priority,
+            )
+
+            process_semaphore = asyncio.Semaphore(concurrency)
+            prompt_tasks = [
+                asyncio.create_task(
+                    _wait_and_create_prompt_responses(
+                        batch=batch,
+                        client=open_ai_client,
+                        semaphore=process_semaphore,
+                        response_model=response_model,
+                        deadline_policy=deadline_policy,
+                    )
+                )
+                for batch in batch_jobs
+            ]
+            async for prompt_responses in _as_completed(prompt_tasks):
+                for response in sorted(prompt_responses, key=lambda x: x.prompt_index):
+                    yield response
+        except (BatchCreationError, BatchProcessingError, APIError) as e:
+            logger.error(f"Error during prompt processing: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error during prompt processing: {e}")
+            raise
+
+
 async def _execute(
     open_ai_client: OpenAIClient,
     pdf_source: Union[str, Path],
@@ -336,10 +1166,21 @@ async def _execute(
     prompt_text: Optional[str] = DEFAULT_PROMPT,
     response_model: Optional[type[BaseModel]] = None,
     temperature: float = DEFAULT_TEMPERATURE,
+    render_profile: RenderProfile = RENDER_PROFILES[DEFAULT_RENDER_PROFILE],
+    image_encoding: ImageEncoding = IMAGE_ENCODINGS[DEFAULT_IMAGE_ENCODING],
+    shard_planner: Optional[ShardPlanner] = None,
+    deadline_policy: Optional[DeadlinePolicy] = None,
+    execution_mode: ExecutionMode = "batch",
+    priority: int = 0,
+    http_client: Optional[httpx.AsyncClient] = None,
+    result_cache: Optional[ResultCache] = None,
 ) -> ParallexCallableOutput | List[UploadBatch] | None:
     """
     Executes the core workflow of extracting information from a PDF document.
 
+    Concurrent calls that wait for the results of identical documents with the same
+    settings share one processing run, and each gets its own copy of the output.
+
     Args:
         open_ai_client: OpenAI client instance.
         pdf_source: URL or file path to the PDF document.
@@ -349,74 +1190,465 @@ async def _execute(
         prompt_text: Default prompt text to use for image processing.
         response_model: Pydantic model for structured output.
         temperature: The temperature to use for the OpenAI API.
+        render_profile: Profile used to rasterize the PDF pages.
+        image_encoding: Encoding applied to the rendered pages before upload.
+        shard_planner: Policy for splitting requests into batches.
+        deadline_policy: How long to wait for each batch and whether to hedge batches past that.
+        execution_mode: "batch", "realtime" or "auto".
+        priority: Priority of the batches while the enqueued token quota is full.
+        http_client: HTTP client used to download pdf_source. The shared download pool is used if None.
+        result_cache: Cache of earlier responses, consulted in batch mode when waiting for results.
 
     Returns:
         ParallexCallableOutput: Processed output containing extracted information.
     """
-    with tempfile.TemporaryDirectory() as temp_directory:
+    async with working_directories.job() as temp_directory:
         try:
             raw_file = await add_file_to_temp_directory(
-                file_source=pdf_source, temp_directory=temp_directory
+                file_source=pdf_source,
+                temp_directory=temp_directory,
+                http_client=http_client,
             )
-            trace_id = raw_file.trace_id
-            image_files = await convert_pdf_to_images(
-                raw_file=raw_file, temp_directory=temp_directory
+            execute_document = partial(
+                _execute_document,
+                open_ai_client=open_ai_client,
+                raw_file=raw_file,
+                temp_directory=temp_directory,
+                model_name=model_name,
+                wait_for_results=post_process_callable is not None,
+                concurrency=concurrency,
+                prompt_text=prompt_text,
+                response_model=response_model,
+                temperature=temperature,
+                render_profile=render_profile,
+                image_encoding=image_encoding,
+                shard_planner=shard_planner,
+                deadline_policy=deadline_policy,
+                execution_mode=execution_mode,
+                priority=priority,
+                result_cache=result_cache,
             )
+            if post_process_callable is None or raw_file.content_hash is None:
+                callable_output = await execute_document()
+            else:
+                document_key = (
+                    raw_file.content_hash,
+                    _account_key(open_ai_client),
+                    model_name,
+                    prompt_text,
+                    response_model,
+                    temperature,
+                    render_profile.model_dump_json(),
+                    image_encoding.model_dump_json(),
+                    execution_mode,
+                    deadline_policy.model_dump_json() if deadline_policy else None,
+                    _settings_key(shard_planner),
+                    _settings_key(result_cache),
+                )
+                if _document_flights.in_flight(document_key):
+                    logger.info(
+                        f"joining processing of an identical document - {raw_file.trace_id}"
+                    )
+                    # The call being joined renders its own copy
+                    working_directories.discard(raw_file.path)
+                shared_output = await _document_flights.run(
+                    document_key, execute_document
+                )
+                callable_output = shared_output.model_copy(
+                    update={
+                        "file_name": raw_file.given_name,
+                        "pdf_source_url": raw_file.pdf_source_url,
+                        "trace_id": raw_file.trace_id,
+                    },
+                    deep=True,
+                )
+
+            if post_process_callable is not None:
+                post_process_callable(output=callable_output)
+
+            return callable_output
+        except (BatchCreationError, BatchProcessingError, APIError) as e:
+            logger.error(f"Error during PDF processing: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error during PDF processing: {e}")
+            raise
+
+
+def _account_key(client: OpenAIClient) -> tuple:
+    """The account and endpoint requests are sent to, which every session of that account shares"""
+    connection = client.connection
+    return (
+        connection.api_key,
+        str(connection.base_url),
+        connection.organization,
+        connection.project,
+    )
+
+
+def _settings_key(settings: Optional[object]) -> Optional[tuple]:
+    """Planners and caches are compared by type and public attributes, since each call may create its own"""
+    if settings is None:
+        return None
+    attributes = sorted(
+        (name, repr(value))
+        for name, value in vars(settings).items()
+        if not name.startswith("_")
+    )
+    return type(settings), tuple(attributes)
+
 
-            batch_files = await upload_images_for_processing(
+async def _execute_document(
+    open_ai_client: OpenAIClient,
+    raw_file: RawFile,
+    temp_directory: str,
+    model_name: str,
+    wait_for_results: bool = True,
+    concurrency: Optional[int] = 20,
+    prompt_text: Optional[str] = DEFAULT_PROMPT,
+    response_model: Optional[type[BaseModel]] = None,
+    temperature: float = DEFAULT_TEMPERATURE,
+    render_profile: RenderProfile = RENDER_PROFILES[DEFAULT_RENDER_PROFILE],
+    image_encoding: ImageEncoding = IMAGE_ENCODINGS[DEFAULT_IMAGE_ENCODING],
+    shard_planner: Optional[ShardPlanner] = None,
+    deadline_policy: Optional[DeadlinePolicy] = None,
+    execution_mode: ExecutionMode = "batch",
+    priority: int = 0,
+    result_cache: Optional[ResultCache] = None,
+) -> ParallexCallableOutput | List[UploadBatch]:
+    """
+    Renders, encodes and sends the pages of a document that is in the temp directory.
+
+    Args:
+        open_ai_client: OpenAI client instance.
+        raw_file: The document in the temp directory.
+        temp_directory: Directory for rendered pages and batch files.
+        model_name: The name of the OpenAI model to use.
+        wait_for_results: Whether to wait for the batches, or return them once created.
+        concurrency: Maximum number of concurrent API requests.
+        prompt_text: Default prompt text to use for image processing.
+        response_model: Pydantic model for structured output.
+        temperature: The temperature to use for the OpenAI API.
+        render_profile: Profile used to rasterize the PDF pages.
+        image_encoding: Encoding applied to the rendered pages before upload.
+        shard_planner: Policy for splitting requests into batches.
+        deadline_policy: How long to wait for each batch and whether to hedge batches past that.
+        execution_mode: "batch", "realtime" or "auto".
+        priority: Priority of the batches while the enqueued token quota is full.
+        result_cache: Cache of earlier responses, consulted in batch mode when waiting for results.
+
+    Returns:
+        ParallexCallableOutput: Output of the document, or its batches when not waiting for results.
+    """
+    trace_id = raw_file.trace_id
+    encoding_stats = EncodingStats(encoding=image_encoding.name)
+    image_files = render_pages(
+        raw_file=raw_file,
+        temp_directory=temp_directory,
+        render_profile=render_profile,
+        image_encoding=image_encoding,
+        stats=encoding_stats,
+    )
+
+    page_count = None
+    if execution_mode == "auto":
+        image_files, page_count = await _peek_page_count(image_files)
+    mode = select_execution_mode(execution_mode, page_count, deadline_policy)
+
+    if mode == "realtime":
+        output_records = await process_images_realtime(
+            client=open_ai_client,
+            image_files=image_files,
+            prompt_text=prompt_text,
+            model_name=model_name,
+            concurrency=concurrency,
+            response_model=response_model,
+            temperature=temperature,
+            image_detail=image_encoding.detail,
+        )
+        pages = build_page_responses(output_records, response_model)
+    else:
+        cache_lookup = None
+        if result_cache is not None and wait_for_results:
+            cache_lookup = ResultCacheLookup(result_cache, response_model)
+        batch_jobs = await _upload_and_create_batches(
+            upload=partial(
+                upload_images_for_processing,
                 client=open_ai_client,
                 image_files=image_files,
                 temp_directory=temp_directory,
+                trace_id=trace_id,
                 prompt_text=prompt_text,
                 model_name=model_name,
                 response_model=response_model,
                 temperature=temperature,
-            )
-            start_batch_semaphore = asyncio.Semaphore(concurrency)
-            start_batch_tasks = []
-            for file in batch_files:
-                batch_task = asyncio.create_task(
-                    _create_batch_jobs(
-                        batch_file=file,
-                        client=open_ai_client,
-                        trace_id=trace_id,
-                        semaphore=start_batch_semaphore,
-                    )
+                image_detail=image_encoding.detail,
+                shard_planner=shard_planner,
+                cache_lookup=cache_lookup,
+                keep_shards=_keeps_shards(deadline_policy),
+            ),
+            client=open_ai_client,
+            trace_id=trace_id,
+            concurrency=concurrency,
+            priority=priority,
+        )
+    logger.info(
+        f"pages encoded. {encoding_stats.pages} pages, "
+        f"{encoding_stats.bytes_saved} bytes saved - {trace_id}"
+    )
+
+    if mode == "batch":
+        if not wait_for_results:
+            return batch_jobs
+
+        pages_tasks = []
+        process_semaphore = asyncio.Semaphore(concurrency)
+        for batch in batch_jobs:
+            page_task = asyncio.create_task(
+                _wait_and_create_pages(
+                    batch=batch,
+                    client=open_ai_client,
+                    semaphore=process_semaphore,
+                    response_model=response_model,
+                    deadline_policy=deadline_policy,
+                    cache_lookup=cache_lookup,
                 )
-                start_batch_tasks.append(batch_task)
-            batch_jobs = await asyncio.gather(*start_batch_tasks)
+            )
+            pages_tasks.append(page_task)
+        page_groups = await asyncio.gather(*pages_tasks)
+        pages = [page for batch_pages in page_groups for page in batch_pages]
+        if cache_lookup is not None:
+            logger.info(f"{len(cache_lookup.hits)} pages cached - {trace_id}")
+            pages += build_page_responses(cache_lookup.hits, response_model)
+
+    logger.info(f"pages done. total pages- {len(pages)} - {trace_id}")
+    sorted_pages = sorted(pages, key=lambda x: x.page_number)
+
+    return ParallexCallableOutput(
+        file_name=raw_file.given_name,
+        pdf_source_url=raw_file.pdf_source_url,
+        trace_id=trace_id,
+        pages=sorted_pages,
+        encoding_stats=encoding_stats,
+    )
+
+
+async def _execute_stream(
+    open_ai_client: OpenAIClient,
+    pdf_source: Union[str, Path],
+    model_name: str,
+    concurrency: Optional[int] = 20,
+    prompt_text: Optional[str] = DEFAULT_PROMPT,
+    response_model: Optional[type[BaseModel]] = None,
+    temperature: float = DEFAULT_TEMPERATURE,
+    render_profile: RenderProfile = RENDER_PROFILES[DEFAULT_RENDER_PROFILE],
+    image_encoding: ImageEncoding = IMAGE_ENCODINGS[DEFAULT_IMAGE_ENCODING],
+    shard_planner: Optional[ShardPlanner] = None,
+    deadline_policy: Optional[DeadlinePolicy] = None,
+    priority: int = 0,
+    http_client: Optional[httpx.AsyncClient] = None,
+) -> AsyncIterator[PageResponse]:
+    """
+    Executes the PDF workflow, yielding the pages of each batch as it completes.
 
-            if post_process_callable is None:
-                return batch_jobs
+    Args:
+        open_ai_client: OpenAI client instance.
+        pdf_source: URL or file path to the PDF document.
+        model_name: The name of the OpenAI model to use.
+        concurrency: Maximum number of concurrent API requests.
+        prompt_text: Default prompt text to use for image processing.
+        response_model: Pydantic model for structured output.
+        temperature: The temperature to use for the OpenAI API.
+        render_profile: Profile used to rasterize the PDF pages.
+        image_encoding: Encoding applied to the rendered pages before upload.
+        shard_planner: Policy for splitting requests into batches.
+        deadline_policy: How long to wait for each batch and whether to hedge batches past that.
+        priority: Priority of the batches while the enqueued token quota is full.
+        http_client: HTTP client used to download pdf_source. The shared download pool is used if None.
+
+    Returns:
+        AsyncIterator[PageResponse]: Pages of the document as their batches complete.
+    """
+    async with working_directories.job() as temp_directory:
+        try:
+            raw_file = await add_file_to_temp_directory(
+                file_source=pdf_source,
+                temp_directory=temp_directory,
+                http_client=http_client,
+            )
+            trace_id = raw_file.trace_id
+            encoding_stats = EncodingStats(encoding=image_encoding.name)
+            batch_jobs = await _upload_and_create_batches(
+                upload=partial(
+                    upload_images_for_processing,
+                    client=open_ai_client,
+                    image_files=render_pages(
+                        raw_file=raw_file,
+                        temp_directory=temp_directory,
+                        render_profile=render_profile,
+                        image_encoding=image_encoding,
+                        stats=encoding_stats,
+                    ),
+                    temp_directory=temp_directory,
+                    trace_id=trace_id,
+                    prompt_text=prompt_text,
+                    model_name=model_name,
+                    response_model=response_model,
+                    temperature=temperature,
+                    image_detail=image_encoding.detail,
+                    shard_planner=shard_planner,
+                    keep_shards=_keeps_shards(deadline_policy),
+                ),
+                client=open_ai_client,
+                trace_id=trace_id,
+                concurrency=concurrency,
+                priority=priority,
+            )
+            logger.info(
+                f"pages encoded. {encoding_stats.pages} pages, "
+                f"{encoding_stats.bytes_saved} bytes saved - {trace_id}"
+            )
 
-            pages_tasks = []
             process_semaphore = asyncio.Semaphore(concurrency)
-            for batch in batch_jobs:
-                page_task = asyncio.create_task(
+            pages_tasks = [
+                asyncio.create_task(
                     _wait_and_create_pages(
                         batch=batch,
                         client=open_ai_client,
                         semaphore=process_semaphore,
                         response_model=response_model,
+                        deadline_policy=deadline_policy,
                     )
                 )
-                pages_tasks.append(page_task)
-            page_groups = await asyncio.gather(*pages_tasks)
+                for batch in batch_jobs
+            ]
+            async for batch_pages in _as_completed(pages_tasks):
+                logger.info(f"batch pages done. {len(batch_pages)} pages - {trace_id}")
+                for page in sorted(batch_pages, key=lambda x: x.page_number):
+                    yield page
+        except (BatchCreationError, BatchProcessingError, APIError) as e:
+            logger.error(f"Error during PDF processing: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error during PDF processing: {e}")
+            raise
 
-            pages = [page for batch_pages in page_groups for page in batch_pages]
-            logger.info(f"pages done. total pages- {len(pages)} - {trace_id}")
-            sorted_pages = sorted(pages, key=lambda x: x.page_number)
 
-            callable_output = ParallexCallableOutput(
-                file_name=raw_file.given_name,
-                pdf_source_url=raw_file.pdf_source_url,
+async def _execute_many(
+    open_ai_client: OpenAIClient,
+    pdf_sources: Sequence[Union[str, Path]],
+    model_name: str,
+    post_process_callable: Optional[PostProcessCallable] = None,
+    concurrency: Optional[int] = 20,
+    document_concurrency: int = DEFAULT_DOCUMENT_CONCURRENCY,
+    prompt_text: Optional[str] = DEFAULT_PROMPT,
+    response_model: Optional[type[BaseModel]] = None,
+    temperature: float = DEFAULT_TEMPERATURE,
+    render_profile: RenderProfile = RENDER_PROFILES[DEFAULT_RENDER_PROFILE],
+    image_encoding: ImageEncoding = IMAGE_ENCODINGS[DEFAULT_IMAGE_ENCODING],
+    shard_planner: Optional[ShardPlanner] = None,
+    deadline_policy: Optional[DeadlinePolicy] = None,
+    priority: int = 0,
+    http_client: Optional[httpx.AsyncClient] = None,
+) -> List[ParallexCallableOutput]:
+    """
+    Executes the workflow for many PDF documents sharing batch files.
+
+    Pages of all documents are written into the same shards, each request carrying the
+    trace ID of its document in the custom_id, and the batch outputs are split back into
+    one output per document.
+
+    Args:
+        open_ai_client: OpenAI client instance.
+        pdf_sources: URLs or file paths of the PDF documents.
+        model_name: The name of the OpenAI model to use.
+        post_process_callable: Optional callable for post-processing the output of each document.
+        concurrency: Maximum number of concurrent API requests.
+        document_concurrency: Maximum number of documents downloaded and rendered at once.
+        prompt_text: Default prompt text to use for image processing.
+        response_model: Pydantic model for structured output.
+        temperature: The temperature to use for the OpenAI API.
+        render_profile: Profile used to rasterize the PDF pages.
+        image_encoding: Encoding applied to the rendered pages before upload.
+        shard_planner: Policy for splitting requests into batches.
+        deadline_policy: How long to wait for each batch and whether to hedge batches past that.
+        priority: Priority of the batches while the enqueued token quota is full.
+        http_client: HTTP client used to download pdf_sources. The shared download pool is used if None.
+
+    Returns:
+        List[ParallexCallableOutput]: Output of each document, in the order of pdf_sources.
+    """
+    async with working_directories.job() as temp_directory:
+        trace_id = uuid.uuid4()
+        documents: List[PackedDocument] = []
+
+        try:
+            batch_jobs = await _upload_and_create_batches(
+                upload=partial(
+                    upload_images_for_processing,
+                    client=open_ai_client,
+                    image_files=stream_documents_to_images(
+                        pdf_sources=pdf_sources,
+                        temp_directory=temp_directory,
+                        on_document=documents.append,
+                        render_profile=render_profile,
+                        image_encoding=image_encoding,
+                        http_client=http_client,
+                        document_concurrency=document_concurrency,
+                    ),
+                    temp_directory=temp_directory,
+                    trace_id=trace_id,
+                    prompt_text=prompt_text,
+                    model_name=model_name,
+                    response_model=response_model,
+                    temperature=temperature,
+                    image_detail=image_encoding.detail,
+                    shard_planner=shard_planner,
+                    keep_shards=_keeps_shards(deadline_policy),
+                ),
+                client=open_ai_client,
                 trace_id=trace_id,
-                pages=sorted_pages,
+                concurrency=concurrency,
+                priority=priority,
+            )
+            logger.info(
+                f"{len(documents)} documents packed into {len(batch_jobs)} batches - {trace_id}"
             )
 
-            post_process_callable(output=callable_output)
-
-            return callable_output
+            process_semaphore = asyncio.Semaphore(concurrency)
+            page_groups = await asyncio.gather(
+                *(
+                    _wait_and_collect(
+                        batch=batch,
+                        client=open_ai_client,
+                        semaphore=process_semaphore,
+                        collect=partial(
+                            collect_page_responses_by_trace,
+                            response_model=response_model,
+                        ),
+                        deadline_policy=deadline_policy,
+                    )
+                    for batch in batch_jobs
+                )
+            )
+            pages_by_trace: dict[str, List[PageResponse]] = defaultdict(list)
+            for batch_pages in page_groups:
+                for document_trace_id, pages in batch_pages.items():
+                    pages_by_trace[document_trace_id].extend(pages)
+
+            outputs = []
+            for document in sorted(documents, key=lambda d: d.index):
+                callable_output = _packed_document_output(document, pages_by_trace)
+                if callable_output.partial:
+                    logger.warning(
+                        f"document {document.pdf_source} is partial, "
+                        f"{document.pages_read} of {document.page_count} pages read: "
+                        f"{document.error}"
+                    )
+                if post_process_callable is not None:
+                    post_process_callable(output=callable_output)
+                outputs.append(callable_output)
+            return outputs
         except (BatchCreationError, BatchProcessingError, APIError) as e:
             logger.error(f"Error during PDF processing: {e}")
             raise
@@ -425,11 +1657,70 @@ async def _execute(
             raise
 
 
+def _packed_document_output(
+    document: PackedDocument, pages_by_trace: dict[str, List[PageResponse]]
+) -> ParallexCallableOutput:
+    """The output of one document of parallex_many(), marked partial if it failed"""
+    raw_file = document.raw_file
+    if raw_file is None:
+        is_url = document.pdf_source.startswith(("http://", "https://"))
+        return ParallexCallableOutput(
+            file_name=document.pdf_source.split("/")[-1],
+            pdf_source_url=document.pdf_source if is_url else None,
+            trace_id=uuid.uuid4(),
+            pages=[],
+            partial=True,
+            error=document.error,
+        )
+    pages = pages_by_trace.get(str(raw_file.trace_id), [])
+    return ParallexCallableOutput(
+        file_name=raw_file.given_name,
+        pdf_source_url=raw_file.pdf_source_url,
+        trace_id=raw_file.trace_id,
+        pages=sorted(pages, key=lambda x: x.page_number),
+        encoding_stats=document.encoding_stats,
+        partial=document.partial,
+        error=document.error,
+    )
+
+
+async def _peek_page_count(
+    image_files: AsyncIterator[ImageFile],
+) -> tuple[AsyncIterator[ImageFile], Optional[int]]:
+    """
+    Waits for the first page to learn the page count of the document.
+
+    Returns a stream that still starts with that page, and the page count.
+    """
+    first_page = await anext(image_files, None)
+    if first_page is None:
+        return image_files, 0
+
+    async def pages() -> AsyncIterator[ImageFile]:
+        yield first_page
+        async for image_file in image_files:
+            yield image_file
+
+    return pages(), first_page.page_count
+
+
+async def _as_completed(tasks: List[asyncio.Task]) -> AsyncIterator:
+    """Yields the results of tasks as they finish, cancelling the rest when closed early"""
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
 async def _wait_and_create_pages(
     batch: UploadBatch,
     client: OpenAIClient,
     semaphore: asyncio.Semaphore,
     response_model: Optional[type[BaseModel]] = None,
+    deadline_policy: Optional[DeadlinePolicy] = None,
+    cache_lookup: Optional[ResultCacheLookup] = None,
 ) -> List[BaseModel]:
     """
     Waits for a batch to complete and processes the output to create page responses.
@@ -437,26 +1728,23 @@ async def _wait_and_create_pages(
     Args:
         batch: The batch to wait for.
         client: OpenAI client instance.
-        semaphore: Semaphore to limit concurrency.
+        semaphore: Semaphore to limit concurrent output downloads.
         response_model: Pydantic model for structured output.
+        deadline_policy: How long to wait for the batch and whether to hedge it past that.
+        cache_lookup: Cache lookups of the call, which the new responses are added to.
 
     Returns:
         List: List of page responses.
     """
-    async with semaphore:
-        logger.info(f"waiting for batch to complete - {batch.id} - {batch.trace_id}")
-        try:
-            output_file_id = await wait_for_batch_completion(client=client, batch=batch)
-            logger.info(f"batch completed - {batch.id} - {batch.trace_id}")
-            page_responses = await process_images_output(
-                client=client,
-                output_file_id=output_file_id,
-                response_model=response_model,
-            )
-            return page_responses
-        except (BatchProcessingError, APIError) as e:
-            logger.error(f"Error processing batch {batch.id}: {e}")
-            raise
+    return await _wait_and_collect(
+        batch=batch,
+        client=client,
+        semaphore=semaphore,
+        collect=_storing_results(
+            partial(collect_page_responses, response_model=response_model), cache_lookup
+        ),
+        deadline_policy=deadline_policy,
+    )
 
 
 async def _wait_and_create_prompt_responses(
@@ -464,6 +1752,8 @@ async def _wait_and_create_prompt_responses(
     client: OpenAIClient,
     semaphore: asyncio.Semaphore,
     response_model: Optional[type[BaseModel]] = None,
+    deadline_policy: Optional[DeadlinePolicy] = None,
+    cache_lookup: Optional[ResultCacheLookup] = None,
 ) -> List[BaseModel]:
     """
     Waits for a batch to complete and processes the output to create prompt responses.
@@ -471,26 +1761,132 @@ async def _wait_and_create_prompt_responses(
     Args:
         batch: The batch to wait for.
         client: OpenAI client instance.
-        semaphore: Semaphore to limit concurrency.
+        semaphore: Semaphore to limit concurrent output downloads.
         response_model: Pydantic model for structured output.
+        deadline_policy: How long to wait for the batch and whether to hedge it past that.
+        cache_lookup: Cache lookups of the call, which the new responses are added to.
 
     Returns:
         List: List of prompt responses.
     """
-    async with semaphore:
-        logger.info(f"waiting for batch to complete - {batch.id} - {batch.trace_id}")
-        try:
-            output_file_id = await wait_for_batch_completion(client=client, batch=batch)
-            logger.info(f"batch completed - {batch.id} - {batch.trace_id}")
-            prompt_responses = await process_prompts_output(
-                client=client,
-                output_file_id=output_file_id,
-                response_model=response_model,
-            )
-            return prompt_responses
-        except (BatchProcessingError, APIError) as e:
+    return await _wait_and_collect(
+        batch=batch,
+        client=client,
+        semaphore=semaphore,
+        collect=_storing_results(
+            partial(collect_prompt_responses, response_model=response_model),
+            cache_lookup,
+        ),
+        deadline_policy=deadline_policy,
+    )
+
+
+def _storing_results(
+    collect: Callable[[OutputRecords], Awaitable[CollectedType]],
+    cache_lookup: Optional[ResultCacheLookup],
+) -> Callable[[OutputRecords], Awaitable[CollectedType]]:
+    if cache_lookup is None:
+        return collect
+    return cache_lookup.storing(collect)
+
+
+async def _wait_and_collect(
+    batch: UploadBatch,
+    client: OpenAIClient,
+    semaphore: asyncio.Semaphore,
+    collect: Callable[[OutputRecords], Awaitable[CollectedType]],
+    deadline_policy: Optional[DeadlinePolicy] = None,
+) -> CollectedType:
+    """
+    Waits for a batch to complete and streams the lines of its output file into collect.
+    The input file of the batch is deleted once the batch is collected.
+
+    Args:
+        batch: The batch to wait for.
+        client: OpenAI client instance.
+        semaphore: Semaphore to limit concurrent output downloads.
+        collect: Builds the result from the output lines, which arrive as they are parsed.
+        deadline_policy: How long to wait for the batch and whether to hedge it past that.
+
+    Returns:
+        The result of collect, including hedged requests.
+    """
+    deadline_policy = deadline_policy or DeadlinePolicy()
+    logger.info(f"waiting for batch to complete - {batch.id} - {batch.trace_id}")
+    try:
+        output_file_id = await wait_for_batch_completion(
+            client=client, batch=batch, timeout=deadline_policy.timeout
+        )
+        logger.info(f"batch completed - {batch.id} - {batch.trace_id}")
+        # Only downloading and parsing is limited, so a finished batch never waits
+        # behind batches that are still running
+        async with semaphore:
+            return await collect(iter_output_records(client, output_file_id))
+    except BatchDeadlineError as e:
+        if not deadline_policy.hedge:
             logger.error(f"Error processing batch {batch.id}: {e}")
             raise
+        output_records = await hedge_batch(
+            client=client, batch=batch, policy=deadline_policy
+        )
+        return await collect(output_records)
+    except (BatchProcessingError, APIError) as e:
+        logger.error(f"Error processing batch {batch.id}: {e}")
+        raise
+    finally:
+        if batch.input_file_path is not None:
+            # The shard was only kept in case the batch had to be hedged
+            working_directories.discard(batch.input_file_path)
+
+
+def _keeps_shards(deadline_policy: Optional[DeadlinePolicy]) -> bool:
+    """Whether shards stay on disk after upload, to hedge their batches from"""
+    return deadline_policy is not None and deadline_policy.hedge
+
+
+async def _upload_and_create_batches(
+    upload: Callable[..., Awaitable[List[BatchFile]]],
+    client: OpenAIClient,
+    trace_id: UUID,
+    concurrency: int,
+    priority: int = 0,
+) -> List[UploadBatch]:
+    """
+    Runs an upload and creates a batch for each batch file as soon as it is uploaded,
+    while the remaining shards are still being encoded and uploaded.
+
+    Args:
+        upload: Upload function accepting an on_batch_file callback.
+        client: OpenAI client instance.
+        trace_id: Trace ID for tracking.
+        concurrency: Maximum number of concurrent batch creations.
+        priority: Priority of the batches while the enqueued token quota is full.
+
+    Returns:
+        List[UploadBatch]: The created batches.
+    """
+    start_batch_semaphore = asyncio.Semaphore(concurrency)
+    start_batch_tasks = []
+
+    def create_batch_for_file(batch_file: BatchFile) -> None:
+        batch_task = asyncio.create_task(
+            _create_batch_jobs(
+                batch_file=batch_file,
+                client=client,
+                trace_id=trace_id,
+                semaphore=start_batch_semaphore,
+                priority=priority,
+            )
+        )
+        start_batch_tasks.append(batch_task)
+
+    try:
+        await upload(on_batch_file=create_batch_for_file)
+    except BaseException:
+        for batch_task in start_batch_tasks:
+            batch_task.cancel()
+        raise
+    return await asyncio.gather(*start_batch_tasks)
 
 
 async def _create_batch_jobs(
@@ -498,6 +1894,7 @@ async def _create_batch_jobs(
     client: OpenAIClient,
     trace_id: UUID,
     semaphore: asyncio.Semaphore,
+    priority: int = 0,
 ) -> UploadBatch:
     """
     Creates a batch processing job.
@@ -507,6 +1904,7 @@ async def _create_batch_jobs(
         client: OpenAI client instance.
         trace_id: Trace ID for tracking.
         semaphore: Semaphore to limit concurrency.
+        priority: Priority of the batch while the enqueued token quota is full.
 
     Returns:
         UploadBatch: Information about the created batch.
@@ -514,8 +1912,14 @@ async def _create_batch_jobs(
     async with semaphore:
         try:
             upload_batch = await create_batch(
-                client=client, file_id=batch_file.id, trace_id=trace_id
+                client=client,
+                file_id=batch_file.id,
+                trace_id=trace_id,
+                model_name=batch_file.model_name,
+                estimated_tokens=batch_file.estimated_tokens,
+                priority=priority,
             )
+            upload_batch.input_file_path = batch_file.path
             return upload_batch
         except (BatchCreationError, APIError) as e:
             logger.error(f"Error creating batch for file {batch_file.id}: {e}")
@@ -552,62 +1956,20 @@ async def retrieve_image_batch(
     api_key_env_name: str = "OPENAI_API_KEY",
     log_level: Optional[str] = "ERROR",
     response_model: Optional[type[BaseModel]] = None,
+    deadline_policy: Optional[DeadlinePolicy] = None,
 ) -> list[PageResponse]:
     setup_logger(log_level)
-    remote_file_handler = RemoteFileHandler()
-    open_ai_client = OpenAIClient(
-        remote_file_handler=remote_file_handler,
-        api_key_env_name=api_key_env_name,
-    )
-
-    remote_file_handler.add_file(error_file_id)
-    remote_file_handler.add_file(input_file_id)
-    remote_file_handler.add_file(output_file_id)
-
-    batch_jobs = [
-        UploadBatch(
-            id=batch_id,
+    async with Parallex(api_key_env_name=api_key_env_name) as session:
+        return await session.retrieve_image_batch(
+            batch_id=batch_id,
             trace_id=trace_id,
-            error_file_id=error_file_id,
             input_file_id=input_file_id,
             output_file_id=output_file_id,
-            failed_at=None,
-            endpoint="",
-            created_at=0,
-            expired_at=None,
-            expires_at=None,
-            cancelling_at=None,
-            finalizing_at=None,
-            cancelled_at=None,
-            completed_at=None,
-            in_progress_at=None,
-            completion_window="24hrs",
-            errors=None,
-            status="",
-        )
-    ]
-
-    pages_tasks = []
-    process_semaphore = asyncio.Semaphore(concurrency)
-    for batch in batch_jobs:
-        page_task = asyncio.create_task(
-            _wait_and_create_pages(
-                batch=batch,
-                client=open_ai_client,
-                semaphore=process_semaphore,
-                response_model=response_model,
-            )
+            error_file_id=error_file_id,
+            concurrency=concurrency,
+            response_model=response_model,
+            deadline_policy=deadline_policy,
         )
-        pages_tasks.append(page_task)
-    page_groups = await asyncio.gather(*pages_tasks)
-
-    pages = [page for batch_pages in page_groups for page in batch_pages]
-    logger.info(f"pages done. total pages- {len(pages)} - {trace_id}")
-    sorted_pages = sorted(pages, key=lambda x: x.page_number)
-
-    await _delete_associated_files(open_ai_client, remote_file_handler)
-
-    return sorted_pages
 
 
 async def retrieve_prompt_batch(
@@ -620,61 +1982,17 @@ async def retrieve_prompt_batch(
     api_key_env_name: str = "OPENAI_API_KEY",
     log_level: Optional[str] = "ERROR",
     response_model: Optional[type[BaseModel]] = None,
+    deadline_policy: Optional[DeadlinePolicy] = None,
 ) -> list[BaseModel]:
     setup_logger(log_level)
-    remote_file_handler = RemoteFileHandler()
-    open_ai_client = OpenAIClient(
-        remote_file_handler=remote_file_handler,
-        api_key_env_name=api_key_env_name,
-    )
-
-    remote_file_handler.add_file(error_file_id)
-    remote_file_handler.add_file(input_file_id)
-    remote_file_handler.add_file(output_file_id)
-
-    batch_jobs = [
-        UploadBatch(
-            id=batch_id,
+    async with Parallex(api_key_env_name=api_key_env_name) as session:
+        return await session.retrieve_prompt_batch(
+            batch_id=batch_id,
             trace_id=trace_id,
-            error_file_id=error_file_id,
             input_file_id=input_file_id,
             output_file_id=output_file_id,
-            failed_at=None,
-            endpoint="",
-            created_at=0,
-            expired_at=None,
-            expires_at=None,
-            cancelling_at=None,
-            finalizing_at=None,
-            cancelled_at=None,
-            completed_at=None,
-            in_progress_at=None,
-            completion_window="24hrs",
-            errors=None,
-            status="",
-        )
-    ]
-
-    prompt_tasks = []
-    process_semaphore = asyncio.Semaphore(concurrency)
-    for batch in batch_jobs:
-        prompt_task = asyncio.create_task(
-            _wait_and_create_prompt_responses(
-                batch=batch,
-                client=open_ai_client,
-                semaphore=process_semaphore,
-                response_model=response_model,
-            )
+            error_file_id=error_file_id,
+            concurrency=concurrency,
+            response_model=response_model,
+            deadline_policy=deadline_policy,
         )
-        prompt_tasks.append(prompt_task)
-    prompt_response_groups = await asyncio.gather(*prompt_tasks)
-
-    flat_responses = [
-        response for batch in prompt_response_groups for response in batch
-    ]
-
-    sorted_responses = sorted(flat_responses, key=lambda x: x.prompt_index)
-
-    await _delete_associated_files(open_ai_client, remote_file_handler)
-
-    return sorted_responses
@@ -0,0 +1,15 @@
+from typing import AsyncIterable, AsyncIterator, Iterable, TypeVar
+
+ItemType = TypeVar("ItemType")
+
+
+async def as_async_iterator(
+    items: Iterable[ItemType] | AsyncIterable[ItemType],
+) -> AsyncIterator[ItemType]:
+    """Iterates a sync or async iterable asynchronously"""
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
@@ -0,0 +1,46 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+ResultType = TypeVar("ResultType")
+
+
+class Singleflight:
+    """
+    Lets concurrent callers with the same key share one execution of their work.
+
+    The first caller runs the work and the others wait for its result or error. If the
+    first caller is cancelled, a waiting caller runs the work instead.
+    """
+
+    def __init__(self):
+        self._flights: dict[Hashable, asyncio.Future] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._flights
+
+    async def run(
+        self, key: Hashable, work: Callable[[], Awaitable[ResultType]]
+    ) -> ResultType:
+        while (flight := self._flights.get(key)) is not None:
+            try:
+                return await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                if not flight.cancelled():
+                    raise
+
+        flight = asyncio.get_running_loop().create_future()
+        # Waiters retrieve errors. This keeps an error nobody waited for from being reported as unretrieved.
+        flight.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._flights[key] = flight
+        try:
+            result = await work()
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        finally:
+            del self._flights[key]
+        flight.set_result(result)
+        return result
@@ -0,0 +1,9 @@
+import pytest
+
+from parallex.utils.logger import logger
+
+
+@pytest.fixture(autouse=True)
+def quiet_logger(monkeypatch):
+    # aiologger opens stdout as a pipe, which fails while pytest captures output
+    monkeypatch.setattr(logger, "disabled", True)
@@ -0,0 +1,96 @@
+from types import SimpleNamespace
+import json
+from typing import AsyncIterator, Optional
+
+from openai.types import Batch
+
+
+def make_batch(
+    batch_id: str,
+    status: str,
+    completed: int = 0,
+    total: int = 10,
+    output_file_id: Optional[str] = None,
+) -> Batch:
+    return Batch(
+        id=batch_id,
+        completion_window="24h",
+        created_at=0,
+        endpoint="/v1/chat/completions",
+        input_file_id=f"{batch_id}-input",
+        object="batch",
+        status=status,
+        output_file_id=output_file_id,
+        request_counts={"total": total, "completed": completed, "failed": 0},
+    )
+
+
+class FakeOpenAIClient:
+    """
+    Stands in for OpenAIClient. Each batch reports the next of its statuses on every poll.
+
+    files maps file IDs to their content and output_file_ids batch IDs to the file
+    reported once the batch is finished. Chat completions answer with the request's
+    last message.
+    """
+
+    def __init__(self, statuses: Optional[dict[str, list[str]]] = None):
+        self.statuses = statuses or {}
+        self.files: dict[str, bytes] = {}
+        self.output_file_ids: dict[str, str] = {}
+        self.retrieved: list[str] = []
+        self.cancelled: list[str] = []
+        self.completions: list[dict] = []
+        self.listings = 0
+        self.closed = False
+        self.limiter = None
+        self.file_handler = SimpleNamespace(add_file=lambda file_id: None)
+
+    @property
+    def connection(self) -> "FakeOpenAIClient":
+        return self
+
+    async def retrieve_batch(self, batch_id: str) -> Batch:
+        if self.closed:
+            raise RuntimeError("Cannot send a request, as the client has been closed.")
+        self.retrieved.append(batch_id)
+        return self._next(batch_id)
+
+    async def list_batches(
+        self, limit: int = 100, after: Optional[str] = None
+    ) -> tuple[list[Batch], bool]:
+        if self.closed:
+            raise RuntimeError("Cannot send a request, as the client has been closed.")
+        self.listings += 1
+        return [self._next(batch_id) for batch_id in self.statuses], False
+
+    async def cancel_batch(self, batch_id: str) -> Batch:
+        self.cancelled.append(batch_id)
+        self.statuses[batch_id] = ["cancelled"]
+        return self._next(batch_id)
+
+    async def stream_file(self, file_id: str) -> AsyncIterator[bytes]:
+        content = self.files[file_id]
+        for start in range(0, len(content), 7):
+            yield content[start : start + 7]
+
+    async def create_chat_completion(self, body: dict) -> SimpleNamespace:
+        self.completions.append(body)
+        content = json.dumps(body["messages"][-1]["content"])
+        return SimpleNamespace(
+            model_dump=lambda: {"choices": [{"message": {"content": content}}]}
+        )
+
+    def track_batch_files(self, batch: Batch) -> None:
+        pass
+
+    async def close(self) -> None:
+        self.closed = True
+
+    def _next(self, batch_id: str) -> Batch:
+        statuses = self.statuses[batch_id]
+        status = statuses.pop(0) if len(statuses) > 1 else statuses[0]
+        output_file_id = None
+        if status in ("completed", "cancelled"):
+            output_file_id = self.output_file_ids.get(batch_id)
+        return make_batch(batch_id, status, output_file_id=output_file_id)
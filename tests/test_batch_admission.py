@@ -0,0 +1,164 @@
+import asyncio
+
+import httpx
+import pytest
+from openai import BadRequestError
+
+import parallex.ai.batch_admission as batch_admission_module
+import parallex.ai.batch_poller as batch_poller_module
+from parallex.ai.batch_admission import BatchAdmission, enqueued_token_limit
+from tests.fakes import FakeOpenAIClient
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(batch_poller_module, "MIN_POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(batch_poller_module, "MAX_POLL_INTERVAL", 0.05)
+    monkeypatch.setattr(batch_admission_module, "QUOTA_RECHECK_INTERVAL", 0.05)
+
+
+def quota_error(limit: str) -> BadRequestError:
+    response = httpx.Response(400, request=httpx.Request("POST", "https://api"))
+    return BadRequestError(
+        f"Enqueued token limit reached for gpt-4o-mini. Limit: {limit} enqueued tokens.",
+        response=response,
+        body=None,
+    )
+
+
+def test_reads_the_limit_from_quota_errors():
+    assert enqueued_token_limit(quota_error("2,000,000")) == 2_000_000
+
+
+def test_holds_batches_past_the_limit_and_admits_them_by_priority():
+    admission = BatchAdmission()
+    admission.configure("m", enqueued_token_limit=100)
+    admitted = []
+
+    async def admit(name: str, tokens: int, priority: int) -> None:
+        await admission.admit("m", tokens, priority)
+        admitted.append(name)
+
+    async def run():
+        await admission.admit("m", 80)
+        held = [
+            asyncio.create_task(admit("low", 60, priority=0)),
+            asyncio.create_task(admit("high", 60, priority=5)),
+        ]
+        await asyncio.sleep(0)
+        assert admitted == []
+        assert admission.enqueued_tokens("m") == 80
+
+        admission.release("m", 80)
+        await asyncio.sleep(0)
+        assert admitted == ["high"]
+        assert admission.enqueued_tokens("m") == 60
+
+        admission.release("m", 60)
+        await asyncio.gather(*held)
+        assert admitted == ["high", "low"]
+        assert admission.enqueued_tokens("m") == 60
+
+    asyncio.run(run())
+
+
+def test_a_batch_larger_than_the_limit_is_admitted_alone():
+    admission = BatchAdmission()
+    admission.configure("m", enqueued_token_limit=100)
+
+    asyncio.run(admission.admit("m", 500))
+
+    assert admission.enqueued_tokens("m") == 500
+
+
+def test_cancelled_waiters_leave_the_queue():
+    admission = BatchAdmission()
+    admission.configure("m", enqueued_token_limit=100)
+
+    async def run():
+        await admission.admit("m", 100)
+        held = asyncio.create_task(admission.admit("m", 50))
+        await asyncio.sleep(0)
+        held.cancel()
+        await asyncio.gather(held, return_exceptions=True)
+        admission.release("m", 100)
+        assert admission.enqueued_tokens("m") == 0
+
+    asyncio.run(run())
+
+
+def test_tracked_batches_release_their_tokens_when_finished(monkeypatch):
+    client = FakeOpenAIClient({"batch-1": ["in_progress", "in_progress", "completed"]})
+    monkeypatch.setattr(
+        BatchAdmission, "_open_tracking_client", staticmethod(lambda caller: client)
+    )
+    admission = BatchAdmission()
+
+    async def run():
+        await admission.admit("m", 100)
+        await admission.track(client, "batch-1", "m", 100)
+
+    asyncio.run(run())
+
+    assert admission.enqueued_tokens("m") == 0
+    assert client.closed
+
+
+def test_tokens_are_held_while_the_callers_client_is_closed(monkeypatch):
+    caller = FakeOpenAIClient({"batch-1": ["in_progress"]})
+    tracking_client = FakeOpenAIClient({"batch-1": ["in_progress"] * 5 + ["completed"]})
+    monkeypatch.setattr(
+        BatchAdmission,
+        "_open_tracking_client",
+        staticmethod(lambda client: tracking_client),
+    )
+    admission = BatchAdmission()
+
+    async def run():
+        await admission.admit("m", 100)
+        await caller.close()
+        tracking = admission.track(caller, "batch-1", "m", 100)
+        await asyncio.sleep(0.02)
+        assert admission.enqueued_tokens("m") == 100
+        await tracking
+
+    asyncio.run(run())
+
+    assert admission.enqueued_tokens("m") == 0
+    assert tracking_client.retrieved
+
+
+def test_tokens_are_released_when_no_tracking_client_can_be_opened(monkeypatch):
+    def fail(client):
+        raise RuntimeError("no connection")
+
+    monkeypatch.setattr(BatchAdmission, "_open_tracking_client", staticmethod(fail))
+    admission = BatchAdmission()
+
+    async def run():
+        await admission.admit("m", 100)
+        await admission.track(FakeOpenAIClient(), "batch-1", "m", 100)
+
+    asyncio.run(run())
+
+    assert admission.enqueued_tokens("m") == 0
+    assert admission._tracking_clients == {}
+
+
+def test_tracking_tasks_are_referenced_until_they_finish(monkeypatch):
+    client = FakeOpenAIClient({"batch-1": ["in_progress", "completed"]})
+    monkeypatch.setattr(
+        BatchAdmission, "_open_tracking_client", staticmethod(lambda caller: client)
+    )
+    admission = BatchAdmission()
+
+    async def run():
+        await admission.admit("m", 100)
+        admission.track(client, "batch-1", "m", 100)
+        assert len(admission._tracking_tasks) == 1
+        while admission._tracking_tasks:
+            await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+
+    assert admission.enqueued_tokens("m") == 0
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+import parallex.ai.batch_poller as batch_poller_module
+from parallex.ai.batch_poller import BatchPoller, _WatchedBatch
+from parallex.exceptions.BatchProcessingError import BatchProcessingError
+from tests.fakes import FakeOpenAIClient, make_batch
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(batch_poller_module, "MIN_POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(batch_poller_module, "MAX_POLL_INTERVAL", 0.05)
+
+
+def test_quick_statuses_poll_at_the_minimum_interval():
+    watched = _WatchedBatch(client=None, batch_id="batch-1")
+    watched.interval = 0.04
+
+    watched.schedule(make_batch("batch-1", "validating"), now=100)
+
+    assert watched.interval == 0.01
+    assert watched.next_poll_at == 100.01
+
+
+def test_interval_backs_off_without_progress_and_follows_the_rate_with_it():
+    watched = _WatchedBatch(client=None, batch_id="batch-1")
+    batch = make_batch("batch-1", "in_progress", completed=0, total=100)
+
+    watched.schedule(batch, now=0)
+    assert watched.interval == pytest.approx(0.015)
+    watched.schedule(batch, now=1)
+    assert watched.interval == pytest.approx(0.0225)
+
+    # 10 requests a second with 80 left: half of the 8 seconds remaining, capped
+    batch = make_batch("batch-1", "in_progress", completed=10, total=100)
+    watched.schedule(batch, now=2)
+    assert watched.interval == 0.05
+
+
+def test_waits_until_a_terminal_status():
+    client = FakeOpenAIClient({"batch-1": ["validating", "in_progress", "completed"]})
+
+    finished = asyncio.run(BatchPoller().wait_until_finished(client, "batch-1"))
+
+    assert finished.status == "completed"
+    assert client.retrieved == ["batch-1"] * 3
+
+
+def test_watch_raises_for_failed_batches():
+    client = FakeOpenAIClient({"batch-1": ["failed"]})
+    batch = make_batch("batch-1", "validating")
+
+    with pytest.raises(BatchProcessingError):
+        asyncio.run(BatchPoller().watch(client, batch))
+
+
+def test_due_batches_of_one_connection_are_listed_together():
+    client = FakeOpenAIClient(
+        {f"batch-{index}": ["in_progress", "completed"] for index in range(3)}
+    )
+
+    async def wait_for_all():
+        poller = BatchPoller()
+        return await asyncio.gather(
+            *(
+                poller.wait_until_finished(client, batch_id)
+                for batch_id in client.statuses
+            )
+        )
+
+    finished = asyncio.run(wait_for_all())
+
+    assert [batch.status for batch in finished] == ["completed"] * 3
+    assert client.listings == 2
+    assert client.retrieved == []
+
+
+def test_poll_errors_fail_the_waiters():
+    client = FakeOpenAIClient({"batch-1": ["in_progress"]})
+    client.closed = True
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(BatchPoller().wait_until_finished(client, "batch-1"))
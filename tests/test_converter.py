@@ -0,0 +1,110 @@
+import asyncio
+import os
+import uuid
+
+import pytest
+
+import parallex.file_management.converter as converter_module
+from parallex.file_management.converter import stream_pdf_to_images
+from parallex.file_management.rasterizer import rasterization_engine
+from parallex.models.raw_file import RawFile
+
+PAGE_COUNT = 10
+
+
+class FakeRenderer:
+    """Writes one file per page instead of calling pdftocairo. Chunks after the first wait for release."""
+
+    def __init__(self, fail_at_page: int = 0):
+        self.fail_at_page = fail_at_page
+        self.ranges: list[tuple[int, int]] = []
+        self.release = asyncio.Event()
+
+    async def render(self, **options) -> list[str]:
+        first_page, last_page = options["first_page"], options["last_page"]
+        self.ranges.append((first_page, last_page))
+        if first_page > 1:
+            await self.release.wait()
+        if first_page <= self.fail_at_page <= last_page:
+            raise RuntimeError("pdftocairo failed")
+        paths = []
+        for page_number in range(first_page, last_page + 1):
+            path = os.path.join(
+                options["output_folder"], f"{options['output_file']}{page_number}.png"
+            )
+            with open(path, "wb") as page:
+                page.write(b"page")
+            paths.append(path)
+        return paths
+
+
+@pytest.fixture
+def renderer(monkeypatch):
+    async def page_count(raw_file: RawFile) -> int:
+        return PAGE_COUNT
+
+    monkeypatch.setattr(converter_module, "_page_count", page_count)
+    monkeypatch.setattr(rasterization_engine, "max_workers", 2)
+
+    def install(**settings) -> FakeRenderer:
+        fake = FakeRenderer(**settings)
+        monkeypatch.setattr(rasterization_engine, "render", fake.render)
+        return fake
+
+    return install
+
+
+def raw_file(tmp_path) -> RawFile:
+    return RawFile(
+        name="document.pdf",
+        path=str(tmp_path / "document.pdf"),
+        content_type="application/pdf",
+        given_name="document.pdf",
+        trace_id=uuid.uuid4(),
+    )
+
+
+def test_yields_every_page_in_order_across_chunks(renderer, tmp_path):
+    fake = renderer()
+    fake.release.set()
+
+    async def read() -> list[int]:
+        return [
+            image_file.page_number
+            async for image_file in stream_pdf_to_images(
+                raw_file(tmp_path), str(tmp_path), pages_per_chunk=3
+            )
+        ]
+
+    assert asyncio.run(read()) == list(range(1, PAGE_COUNT + 1))
+    assert sorted(fake.ranges) == [(1, 3), (4, 6), (7, 9), (10, 10)]
+
+
+def test_yields_the_first_chunk_before_the_rest_is_rendered(renderer, tmp_path):
+    fake = renderer()
+
+    async def read() -> list[int]:
+        pages = stream_pdf_to_images(
+            raw_file(tmp_path), str(tmp_path), pages_per_chunk=3
+        )
+        first = [(await anext(pages)).page_number for _ in range(3)]
+        fake.release.set()
+        return first + [image_file.page_number async for image_file in pages]
+
+    assert asyncio.run(read()) == list(range(1, PAGE_COUNT + 1))
+
+
+def test_render_errors_reach_the_consumer(renderer, tmp_path):
+    fake = renderer(fail_at_page=5)
+    fake.release.set()
+
+    async def read() -> list[int]:
+        return [
+            image_file.page_number
+            async for image_file in stream_pdf_to_images(
+                raw_file(tmp_path), str(tmp_path), pages_per_chunk=3
+            )
+        ]
+
+    with pytest.raises(RuntimeError, match="pdftocairo failed"):
+        asyncio.run(read())
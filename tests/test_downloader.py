@@ -0,0 +1,147 @@
+import asyncio
+import hashlib
+import os
+import re
+from typing import Optional
+
+import httpx
+import pytest
+
+from parallex.exceptions.DownloadError import DownloadError
+from parallex.file_management.downloader import Downloader
+
+URL = "https://example.com/document.pdf"
+CONTENT = b"%PDF-1.7\n" + os.urandom(10_000)
+
+
+class FileServer:
+    """Serves CONTENT, answering Range requests unless supports_ranges is False"""
+
+    def __init__(
+        self,
+        supports_ranges: bool = True,
+        etag: Optional[str] = '"v1"',
+        changes_etag: bool = False,
+    ):
+        self.supports_ranges = supports_ranges
+        self.etag = etag
+        self.changes_etag = changes_etag
+        self.requests: list[httpx.Request] = []
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        headers = {"Content-Type": "application/pdf"}
+        if self.etag is not None:
+            headers["ETag"] = self.etag
+        if_match = request.headers.get("If-Match")
+        if if_match is not None and if_match != self.etag:
+            return httpx.Response(412, headers=headers)
+        if self.changes_etag:
+            self.etag = '"v2"'
+        range_header = request.headers.get("Range")
+        if not self.supports_ranges or range_header is None:
+            return httpx.Response(200, headers=headers, content=CONTENT)
+        start, end = map(int, re.fullmatch(r"bytes=(\d+)-(\d+)", range_header).groups())
+        end = min(end, len(CONTENT) - 1)
+        headers["Content-Range"] = f"bytes {start}-{end}/{len(CONTENT)}"
+        return httpx.Response(206, headers=headers, content=CONTENT[start : end + 1])
+
+
+def download(server: FileServer, path: str, **settings):
+    downloader = Downloader(range_size=1024, **settings)
+
+    async def run():
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(server.handle)
+        ) as client:
+            return await downloader.download(URL, path, client=client)
+
+    return asyncio.run(run())
+
+
+def test_fetches_the_rest_of_the_file_in_ranges(tmp_path):
+    server = FileServer()
+    path = str(tmp_path / "document.download")
+
+    downloaded = download(server, path)
+
+    assert open(path, "rb").read() == CONTENT
+    assert downloaded.size == len(CONTENT)
+    assert downloaded.content_type == "application/pdf"
+    assert downloaded.content_hash == hashlib.sha256(CONTENT).hexdigest()
+    assert len(server.requests) == -(-len(CONTENT) // 1024)
+    assert all(request.headers["If-Match"] == '"v1"' for request in server.requests[1:])
+
+
+def test_falls_back_to_one_response_when_ranges_are_ignored(tmp_path):
+    server = FileServer(supports_ranges=False)
+    path = str(tmp_path / "document.download")
+
+    downloaded = download(server, path)
+
+    assert open(path, "rb").read() == CONTENT
+    assert downloaded.content_hash == hashlib.sha256(CONTENT).hexdigest()
+    assert len(server.requests) == 1
+
+
+def test_does_not_match_weak_etags(tmp_path):
+    server = FileServer(etag='W/"v1"')
+
+    download(server, str(tmp_path / "document.download"))
+
+    assert not any("If-Match" in request.headers for request in server.requests)
+
+
+def test_fails_when_the_file_changes_between_ranges(tmp_path):
+    server = FileServer(changes_etag=True)
+
+    with pytest.raises(DownloadError):
+        download(server, str(tmp_path / "document.download"))
+
+
+def test_stops_files_past_max_bytes(tmp_path):
+    server = FileServer()
+
+    with pytest.raises(DownloadError, match="more than the limit"):
+        download(server, str(tmp_path / "document.download"), max_bytes=5000)
+
+    assert len(server.requests) == 1
+
+
+def test_requests_carry_the_request_timeout(tmp_path):
+    server = FileServer()
+
+    download(server, str(tmp_path / "document.pdf"), request_timeout=12)
+
+    assert len(server.requests) > 1
+    assert all(
+        request.extensions["timeout"]["read"] == 12 for request in server.requests
+    )
+
+
+def test_opened_clients_use_the_request_timeout():
+    client = Downloader(request_timeout=12).open_client(httpx.Limits(max_connections=3))
+
+    assert client.timeout == httpx.Timeout(12)
+    asyncio.run(client.aclose())
+
+
+@pytest.mark.parametrize(
+    "setting",
+    [
+        {"timeout": 0},
+        {"timeout": -1},
+        {"request_timeout": 0},
+        {"max_bytes": 0},
+        {"range_size": 0},
+        {"range_concurrency": 0},
+    ],
+)
+def test_limits_that_stop_every_download_are_rejected(setting):
+    downloader = Downloader()
+
+    with pytest.raises(ValueError):
+        downloader.configure(**setting)
+    with pytest.raises(ValueError):
+        Downloader(**setting)
+    assert downloader.timeout > 0 and downloader.request_timeout > 0
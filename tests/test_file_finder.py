@@ -0,0 +1,100 @@
+import hashlib
+import os
+import sys
+import uuid
+
+import pytest
+
+import parallex.file_management.file_finder as file_finder_module
+from parallex.file_management.file_finder import _copy_local_file, _reflink
+
+CONTENT = b"%PDF-1.7\n" + os.urandom(5000)
+
+
+def fail(*args) -> None:
+    raise OSError("not supported here")
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "source" / "document.pdf"
+    path.parent.mkdir()
+    path.write_bytes(CONTENT)
+    return path
+
+
+@pytest.fixture
+def job_directory(tmp_path) -> str:
+    path = tmp_path / "job"
+    path.mkdir()
+    return str(path)
+
+
+def test_hard_links_local_files(source, job_directory):
+    raw_file = _copy_local_file(source, job_directory, uuid.uuid4())
+
+    assert os.stat(raw_file.path).st_ino == os.stat(source).st_ino
+    assert raw_file.content_hash == hashlib.sha256(CONTENT).hexdigest()
+    assert raw_file.given_name == "document.pdf"
+
+
+def test_reflinks_when_hard_links_fail(source, job_directory, monkeypatch):
+    reflinked = []
+
+    def reflink(source_path, destination_path) -> None:
+        reflinked.append(destination_path)
+        with open(destination_path, "wb") as destination:
+            destination.write(source_path.read_bytes())
+
+    monkeypatch.setattr(os, "link", fail)
+    monkeypatch.setattr(file_finder_module, "_reflink", reflink)
+    monkeypatch.setattr(file_finder_module, "_symlink", fail)
+
+    raw_file = _copy_local_file(source, job_directory, uuid.uuid4())
+
+    assert reflinked == [raw_file.path]
+    assert raw_file.content_hash == hashlib.sha256(CONTENT).hexdigest()
+
+
+def test_symlinks_when_neither_link_can_be_made(source, job_directory, monkeypatch):
+    monkeypatch.setattr(os, "link", fail)
+    monkeypatch.setattr(file_finder_module, "_reflink", fail)
+
+    raw_file = _copy_local_file(source, job_directory, uuid.uuid4())
+
+    assert os.path.islink(raw_file.path)
+    assert os.readlink(raw_file.path) == str(source.resolve())
+    assert raw_file.content_hash == hashlib.sha256(CONTENT).hexdigest()
+
+
+def test_copies_when_no_link_can_be_made(source, job_directory, monkeypatch):
+    monkeypatch.setattr(os, "link", fail)
+    monkeypatch.setattr(file_finder_module, "_reflink", fail)
+    monkeypatch.setattr(file_finder_module, "_symlink", fail)
+
+    raw_file = _copy_local_file(source, job_directory, uuid.uuid4())
+
+    assert not os.path.islink(raw_file.path)
+    assert os.stat(raw_file.path).st_ino != os.stat(source).st_ino
+    assert open(raw_file.path, "rb").read() == CONTENT
+    assert raw_file.content_hash == hashlib.sha256(CONTENT).hexdigest()
+
+
+@pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="reflinks are Linux only"
+)
+def test_failed_reflinks_leave_no_file_behind(source, job_directory, monkeypatch):
+    import fcntl
+
+    monkeypatch.setattr(fcntl, "ioctl", fail)
+    destination_path = os.path.join(job_directory, "document.pdf")
+
+    with pytest.raises(OSError):
+        _reflink(source, destination_path)
+
+    assert not os.path.exists(destination_path)
+
+
+def test_missing_files_are_reported(tmp_path, job_directory):
+    with pytest.raises(FileNotFoundError):
+        _copy_local_file(tmp_path / "missing.pdf", job_directory, uuid.uuid4())
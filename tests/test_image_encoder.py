@@ -0,0 +1,96 @@
+import asyncio
+import os
+import random
+import uuid
+
+from PIL import Image
+
+from parallex.file_management.image_encoder import encode_image, encode_images
+from parallex.models.encoding_stats import EncodingStats
+from parallex.models.image_encoding import IMAGE_ENCODINGS
+from parallex.models.image_file import ImageFile
+
+
+def page(tmp_path, name: str, noisy: bool) -> ImageFile:
+    """Writes a PNG page. Noisy pages compress poorly as PNG, small flat ones compress well"""
+    image = Image.new("RGB", (200, 260) if noisy else (8, 8), "white")
+    if noisy:
+        generator = random.Random(name)
+        image.putdata(
+            [
+                tuple(generator.randrange(256) for _ in range(3))
+                for _ in range(200 * 260)
+            ]
+        )
+    path = tmp_path / f"{name}.png"
+    image.save(path, format="PNG")
+    return ImageFile(
+        path=str(path),
+        page_number=1,
+        given_file_name="document.pdf",
+        trace_id=uuid.uuid4(),
+    )
+
+
+def test_replaces_the_page_when_the_encoding_is_smaller(tmp_path):
+    image_file = page(tmp_path, "noisy", noisy=True)
+
+    encoded = encode_image(image_file, IMAGE_ENCODINGS["balanced"])
+
+    assert encoded.path.endswith("noisy-encoded.jpeg")
+    assert encoded.content_type == "image/jpeg"
+    assert not os.path.exists(image_file.path)
+    with Image.open(encoded.path) as image:
+        assert image.format == "JPEG"
+        assert image.mode == "L"
+
+
+def test_keeps_the_original_when_the_encoding_is_larger(tmp_path):
+    image_file = page(tmp_path, "flat", noisy=False)
+
+    encoded = encode_image(image_file, IMAGE_ENCODINGS["high"])
+
+    assert encoded == image_file
+    assert os.listdir(tmp_path) == ["flat.png"]
+
+
+def test_records_the_bytes_saved_per_page(tmp_path):
+    image_files = [page(tmp_path, "noisy", noisy=True), page(tmp_path, "flat", False)]
+    original_bytes = sum(os.path.getsize(f.path) for f in image_files)
+    stats = EncodingStats(encoding="compact")
+
+    async def encode() -> list[ImageFile]:
+        async def pages():
+            for image_file in image_files:
+                yield image_file
+
+        return [
+            image_file
+            async for image_file in encode_images(
+                pages(), IMAGE_ENCODINGS["compact"], stats
+            )
+        ]
+
+    encoded = asyncio.run(encode())
+
+    assert stats.pages == 2
+    assert stats.original_bytes == original_bytes
+    assert stats.encoded_bytes == sum(os.path.getsize(f.path) for f in encoded)
+    assert stats.bytes_saved > 0
+
+
+def test_passthrough_encodings_keep_pages_as_they_are(tmp_path):
+    image_file = page(tmp_path, "noisy", noisy=True)
+    stats = EncodingStats(encoding="lossless")
+
+    async def encode() -> list[ImageFile]:
+        async def pages():
+            yield image_file
+
+        return [
+            f async for f in encode_images(pages(), IMAGE_ENCODINGS["lossless"], stats)
+        ]
+
+    assert asyncio.run(encode()) == [image_file]
+    assert stats.bytes_saved == 0
+    assert stats.pages == 1
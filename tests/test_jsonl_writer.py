@@ -0,0 +1,146 @@
+import asyncio
+import base64
+import json
+import os
+import uuid
+
+from parallex.ai.encoding_pool import EncodingPool
+from parallex.ai.jsonl_writer import JsonlShardWriter
+from parallex.ai.request_template import RequestTemplate, raw_slot, value_slot
+from parallex.ai.shard_planner import ShardPlanner
+from parallex.models.batch_file import BatchFile
+
+TEMPLATE = RequestTemplate(
+    {
+        "custom_id": value_slot("custom_id"),
+        "method": "POST",
+        "body": {
+            "messages": [
+                {
+                    "role": "user",
+                    "content": f"data:image/png;base64,{raw_slot('image')}",
+                }
+            ],
+            "temperature": value_slot("temperature"),
+        },
+    }
+)
+
+
+def test_shards_round_trip_lines_and_base64_sources(tmp_path):
+    sources = []
+    for index in range(5):
+        path = tmp_path / f"page-{index}.png"
+        path.write_bytes(os.urandom(1000 + index))
+        sources.append(path)
+    sealed: list[str] = []
+    written: list[str] = []
+
+    async def on_shard_sealed(path: str, tokens: int) -> BatchFile:
+        sealed.append(path)
+        return BatchFile(
+            id=f"file-{len(sealed)}",
+            name=os.path.basename(path),
+            purpose="batch",
+            status="processed",
+            trace_id=trace_id,
+            path=path,
+            estimated_tokens=tokens,
+        )
+
+    async def write_all() -> list[BatchFile]:
+        writer = JsonlShardWriter(
+            temp_directory=str(tmp_path),
+            trace_id=trace_id,
+            on_shard_sealed=on_shard_sealed,
+            planner=ShardPlanner(max_requests=2),
+            pool=EncodingPool(mode="thread", max_workers=2),
+            on_source_written=written.append,
+        )
+        await writer.write(
+            TEMPLATE.render(custom_id="text", temperature=0, image="").encode(), 7
+        )
+        for index, source in enumerate(sources):
+            prefix, suffix = TEMPLATE.render_around(
+                "image", custom_id=f"page-{index}", temperature=0
+            )
+            await writer.write_base64_line(
+                prefix.encode(), str(source), suffix.encode(), 10
+            )
+        return await writer.close()
+
+    trace_id = uuid.uuid4()
+    batch_files = asyncio.run(write_all())
+
+    assert [batch_file.path for batch_file in batch_files] == sealed
+    assert [batch_file.estimated_tokens for batch_file in batch_files] == [17, 20, 20]
+    assert sorted(written) == sorted(str(source) for source in sources)
+    lines = []
+    for path in sealed:
+        with open(path, "rb") as shard:
+            lines += [json.loads(line) for line in shard]
+    assert [line["custom_id"] for line in lines] == ["text"] + [
+        f"page-{index}" for index in range(5)
+    ]
+    for line, source in zip(lines[1:], sources):
+        content = line["body"]["messages"][0]["content"]
+        encoded = content.removeprefix("data:image/png;base64,")
+        assert base64.b64decode(encoded) == source.read_bytes()
+
+
+def test_sources_that_cannot_be_read_are_left_out(tmp_path):
+    sources = []
+    for index in range(4):
+        path = tmp_path / f"page-{index}.png"
+        path.write_bytes(os.urandom(1000))
+        sources.append(path)
+    sealed: list[str] = []
+    written: list[str] = []
+
+    async def on_shard_sealed(path: str, tokens: int) -> BatchFile:
+        sealed.append(path)
+        return BatchFile(
+            id=f"file-{len(sealed)}",
+            name=os.path.basename(path),
+            purpose="batch",
+            status="processed",
+            trace_id=trace_id,
+            path=path,
+        )
+
+    async def write_all() -> list[BatchFile]:
+        writer = JsonlShardWriter(
+            temp_directory=str(tmp_path),
+            trace_id=trace_id,
+            on_shard_sealed=on_shard_sealed,
+            planner=ShardPlanner(max_requests=2),
+            pool=EncodingPool(mode="thread", max_workers=2),
+            on_source_written=written.append,
+        )
+        for index, source in enumerate(sources):
+            if index == 2:
+                # Lines are only encoded once the next line seals their shard
+                sources[0].unlink()
+            prefix, suffix = TEMPLATE.render_around(
+                "image", custom_id=f"page-{index}", temperature=0
+            )
+            await writer.write_base64_line(
+                prefix.encode(), str(source), suffix.encode()
+            )
+        # The second shard loses both of its pages
+        sources[2].unlink()
+        sources[3].write_bytes(os.urandom(2000))
+        return await writer.close()
+
+    trace_id = uuid.uuid4()
+    batch_files = asyncio.run(write_all())
+
+    assert len(batch_files) == 1
+    assert sorted(written) == sorted(str(source) for source in sources)
+    with open(sealed[0], "rb") as shard:
+        lines = [json.loads(line) for line in shard]
+    assert [line["custom_id"] for line in lines] == ["page-1"]
+    content = lines[0]["body"]["messages"][0]["content"]
+    encoded = content.removeprefix("data:image/png;base64,")
+    assert base64.b64decode(encoded) == sources[1].read_bytes()
+    assert not any(name.endswith(".tmp") for name in os.listdir(tmp_path))
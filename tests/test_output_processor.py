@@ -0,0 +1,56 @@
+import asyncio
+import json
+
+from parallex.ai.output_processor import (
+    _split_lines,
+    iter_output_records,
+    retrieve_output_records,
+)
+from tests.fakes import FakeOpenAIClient
+
+
+async def chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+def split(*parts: bytes) -> list[bytes]:
+    async def run() -> list[bytes]:
+        return [line async for line in _split_lines(chunks(*parts))]
+
+    return asyncio.run(run())
+
+
+def test_lines_are_joined_across_chunks():
+    assert split(b'{"a"', b": 1}\n{", b'"b": 2}\n') == [b'{"a": 1}', b'{"b": 2}']
+
+
+def test_a_chunk_can_hold_many_lines():
+    assert split(b"one\ntwo\nthree\n") == [b"one", b"two", b"three"]
+
+
+def test_the_last_line_does_not_need_a_newline():
+    assert split(b"one\ntw", b"o") == [b"one", b"two"]
+
+
+def test_empty_streams_have_no_lines():
+    assert split() == []
+    assert split(b"") == []
+
+
+def test_output_records_are_parsed_as_they_stream():
+    client = FakeOpenAIClient()
+    records = [{"custom_id": f"page-{index}", "response": {}} for index in range(5)]
+    client.files["output-1"] = "\n".join(json.dumps(r) for r in records).encode()
+
+    assert asyncio.run(retrieve_output_records(client, "output-1")) == records
+
+
+def test_blank_and_unreadable_lines_are_skipped():
+    client = FakeOpenAIClient()
+    client.files["output-1"] = b'{"custom_id": "a"}\n\nnot json\n{"custom_id": "b"}\n'
+
+    async def read() -> list[dict]:
+        return [record async for record in iter_output_records(client, "output-1")]
+
+    assert asyncio.run(read()) == [{"custom_id": "a"}, {"custom_id": "b"}]
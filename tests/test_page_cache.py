@@ -0,0 +1,142 @@
+import asyncio
+import os
+import shutil
+import uuid
+
+import pytest
+
+import parallex.file_management.page_cache as page_cache_module
+from parallex.file_management.page_cache import PageCache
+from parallex.models.image_file import ImageFile
+from parallex.models.raw_file import RawFile
+
+PAGE_COUNT = 4
+PAGE_BYTES = 100
+
+
+@pytest.fixture
+def renders(monkeypatch):
+    """Replaces rasterization with pages of PAGE_BYTES bytes, counting the renders"""
+    rendered = []
+
+    async def stream_pdf_to_images(raw_file, temp_directory, render_profile):
+        rendered.append(raw_file.content_hash)
+        for page_number in range(1, PAGE_COUNT + 1):
+            path = os.path.join(
+                temp_directory, f"{raw_file.trace_id}-{page_number}.png"
+            )
+            with open(path, "wb") as page:
+                page.write(bytes([page_number]) * PAGE_BYTES)
+            yield ImageFile(
+                path=path,
+                page_number=page_number,
+                given_file_name=raw_file.given_name,
+                trace_id=raw_file.trace_id,
+                page_count=PAGE_COUNT,
+            )
+
+    monkeypatch.setattr(page_cache_module, "stream_pdf_to_images", stream_pdf_to_images)
+    return rendered
+
+
+def raw_file(content_hash: str) -> RawFile:
+    return RawFile(
+        name="document.pdf",
+        path="/unused/document.pdf",
+        content_type="application/pdf",
+        given_name="document.pdf",
+        trace_id=uuid.uuid4(),
+        content_hash=content_hash,
+    )
+
+
+def read_pages(cache: PageCache, content_hash: str, directory) -> list[bytes]:
+    async def read() -> list[bytes]:
+        pages = []
+        async for image_file in cache.stream_pages(
+            raw_file(content_hash), str(directory)
+        ):
+            with open(image_file.path, "rb") as page:
+                pages.append(page.read())
+        return pages
+
+    return asyncio.run(read())
+
+
+def entries(cache: PageCache) -> list[str]:
+    return sorted(name[:2] for name in os.listdir(cache.directory))
+
+
+def test_is_off_by_default(renders, tmp_path):
+    cache = PageCache(directory=str(tmp_path / "cache"))
+
+    read_pages(cache, "h1", tmp_path)
+    read_pages(cache, "h1", tmp_path)
+
+    assert renders == ["h1", "h1"]
+
+
+def test_serves_cached_pages_without_rendering(renders, tmp_path):
+    cache = PageCache(directory=str(tmp_path / "cache"), max_bytes=10_000)
+
+    first = read_pages(cache, "h1", tmp_path)
+    second = read_pages(cache, "h1", tmp_path)
+
+    assert renders == ["h1"]
+    assert second == first
+    assert len(second) == PAGE_COUNT
+
+
+def test_links_cached_pages_as_they_are_pulled(renders, tmp_path):
+    cache = PageCache(directory=str(tmp_path / "cache"), max_bytes=10_000)
+    read_pages(cache, "h1", tmp_path)
+    job_directory = tmp_path / "job"
+    job_directory.mkdir()
+
+    async def pull_one() -> None:
+        pages = cache.stream_pages(raw_file("h1"), str(job_directory))
+        await anext(pages)
+        assert len(os.listdir(job_directory)) == 1
+        await pages.aclose()
+
+    asyncio.run(pull_one())
+
+
+def test_renders_the_rest_when_an_entry_is_evicted_while_served(renders, tmp_path):
+    cache = PageCache(directory=str(tmp_path / "cache"), max_bytes=10_000)
+    read_pages(cache, "h1", tmp_path)
+
+    async def read() -> list[int]:
+        pages = cache.stream_pages(raw_file("h1"), str(tmp_path))
+        page_numbers = [(await anext(pages)).page_number]
+        for name in os.listdir(cache.directory):
+            shutil.rmtree(os.path.join(cache.directory, name))
+        page_numbers += [image_file.page_number async for image_file in pages]
+        return page_numbers
+
+    assert asyncio.run(read()) == [1, 2, 3, 4]
+    assert renders == ["h1", "h1"]
+
+
+def test_does_not_stage_documents_larger_than_the_cache(renders, tmp_path):
+    cache = PageCache(directory=str(tmp_path / "cache"), max_bytes=PAGE_BYTES * 2)
+
+    read_pages(cache, "h1", tmp_path)
+
+    assert entries(cache) == []
+    assert cache._staged_bytes == 0
+
+
+def test_evicts_the_least_recently_used_page_sets(renders, tmp_path):
+    cache = PageCache(
+        directory=str(tmp_path / "cache"), max_bytes=PAGE_BYTES * PAGE_COUNT * 2 + 100
+    )
+    read_pages(cache, "h1", tmp_path)
+    read_pages(cache, "h2", tmp_path)
+    # Age both sets, then use h1 so that h2 is the least recently used
+    for name in os.listdir(cache.directory):
+        os.utime(os.path.join(cache.directory, name, "manifest.json"), (0, 0))
+    read_pages(cache, "h1", tmp_path)
+    read_pages(cache, "h3", tmp_path)
+
+    assert entries(cache) == ["h1", "h3"]
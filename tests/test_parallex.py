@@ -0,0 +1,150 @@
+import asyncio
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import parallex.ai.batch_poller as batch_poller_module
+import parallex.file_management.page_cache as page_cache_module
+import parallex.parallex as parallex_module
+from parallex.ai.batch_admission import batch_admission
+from parallex.models.image_file import ImageFile
+from parallex.parallex import parallex
+from tests.fakes import FakeOpenAIClient, make_batch
+
+PAGE_COUNT = 2
+
+
+class AccountClient(FakeOpenAIClient):
+    """
+    Stands in for the OpenAIClient of a call. Every uploaded shard becomes a batch that
+    completes with an answer for each of its requests.
+    """
+
+    uploads: list[str] = []
+
+    def __init__(self, remote_file_handler, api_key_env_name, limiter, openai_client):
+        super().__init__()
+        self.file_handler = remote_file_handler
+        self._connection = openai_client
+
+    @property
+    def connection(self):
+        return self._connection
+
+    async def upload(self, file_path: str) -> SimpleNamespace:
+        file_id = f"file-{len(self.uploads)}"
+        self.uploads.append(file_path)
+        with open(file_path, "rb") as shard:
+            custom_ids = [json.loads(line)["custom_id"] for line in shard]
+        self.files[f"{file_id}-output"] = b"".join(
+            json.dumps(
+                {
+                    "custom_id": custom_id,
+                    "response": {
+                        "status_code": 200,
+                        "body": {"choices": [{"message": {"content": "text"}}]},
+                    },
+                }
+            ).encode()
+            + b"\n"
+            for custom_id in custom_ids
+        )
+        self.file_handler.add_file(file_id)
+        return SimpleNamespace(
+            id=file_id, filename=file_path, purpose="batch", status="processed"
+        )
+
+    async def create_batch(self, upload_file_id: str):
+        batch_id = f"batch-{upload_file_id}"
+        self.statuses[batch_id] = ["in_progress", "completed"]
+        self.output_file_ids[batch_id] = f"{upload_file_id}-output"
+        return make_batch(batch_id, "validating")
+
+    async def delete_file(self, file_id: str) -> None:
+        pass
+
+
+@pytest.fixture
+def account(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(AccountClient, "uploads", [])
+    monkeypatch.setattr(parallex_module, "OpenAIClient", AccountClient)
+    monkeypatch.setattr(batch_admission, "track", lambda *args: None)
+    monkeypatch.setattr(batch_poller_module, "MIN_POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(batch_poller_module, "MAX_POLL_INTERVAL", 0.05)
+    monkeypatch.setattr(parallex_module, "setup_logger", lambda level: None)
+
+    async def stream_pdf_to_images(raw_file, temp_directory, render_profile):
+        await asyncio.sleep(0.02)  # Let the second call find the first in flight
+        for page_number in range(1, PAGE_COUNT + 1):
+            path = os.path.join(
+                temp_directory, f"{raw_file.trace_id}-{page_number}.png"
+            )
+            with open(path, "wb") as page:
+                page.write(b"page")
+            yield ImageFile(
+                path=path,
+                page_number=page_number,
+                given_file_name=raw_file.given_name,
+                trace_id=raw_file.trace_id,
+                page_count=PAGE_COUNT,
+            )
+
+    monkeypatch.setattr(page_cache_module, "stream_pdf_to_images", stream_pdf_to_images)
+    return AccountClient
+
+
+def test_concurrent_calls_for_the_same_document_share_one_upload(account, tmp_path):
+    sources = []
+    for name in ("first.pdf", "second.pdf"):
+        path = tmp_path / name
+        path.write_bytes(b"%PDF-1.7 same content")
+        sources.append(path)
+    outputs = []
+
+    def post_process(output) -> None:
+        outputs.append(output)
+
+    async def run():
+        await asyncio.gather(
+            *(
+                parallex(
+                    model_name="gpt-4o",
+                    pdf_source=str(source),
+                    post_process_callable=post_process,
+                )
+                for source in sources
+            )
+        )
+
+    asyncio.run(run())
+
+    assert len(account.uploads) == 1
+    assert sorted(output.file_name for output in outputs) == ["first.pdf", "second.pdf"]
+    assert all(len(output.pages) == PAGE_COUNT for output in outputs)
+    assert outputs[0].trace_id != outputs[1].trace_id
+
+
+def test_calls_on_different_accounts_do_not_share_runs(account, tmp_path, monkeypatch):
+    monkeypatch.setenv("OTHER_API_KEY", "sk-other")
+    source = tmp_path / "document.pdf"
+    source.write_bytes(b"%PDF-1.7 same content")
+
+    async def run():
+        await asyncio.gather(
+            *(
+                parallex(
+                    model_name="gpt-4o",
+                    pdf_source=str(source),
+                    post_process_callable=lambda output: None,
+                    api_key_env_name=api_key_env_name,
+                )
+                for api_key_env_name in ("OPENAI_API_KEY", "OTHER_API_KEY")
+            )
+        )
+
+    asyncio.run(run())
+
+    assert len(account.uploads) == 2
@@ -0,0 +1,109 @@
+import asyncio
+import time
+
+import pytest
+
+from parallex.ai.open_ai_client import RateLimiter, TokenBucket, _parse_duration
+
+HEADERS = {
+    "x-ratelimit-limit-requests": "60",
+    "x-ratelimit-remaining-requests": "0",
+    "x-ratelimit-reset-requests": "100ms",
+    "x-ratelimit-limit-tokens": "1000",
+    "x-ratelimit-remaining-tokens": "400",
+    "x-ratelimit-reset-tokens": "6m0s",
+}
+
+
+def timed(coroutine) -> float:
+    async def run() -> float:
+        started = time.monotonic()
+        await coroutine
+        return time.monotonic() - started
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize(
+    "duration, seconds",
+    [("1s", 1), ("6m0s", 360), ("120ms", 0.12), ("1h2m3.5s", 3723.5)],
+)
+def test_parses_reset_durations(duration, seconds):
+    assert _parse_duration(duration) == pytest.approx(seconds)
+
+
+@pytest.mark.parametrize("duration", [None, "", "soon"])
+def test_unreadable_durations_are_none(duration):
+    assert _parse_duration(duration) is None
+
+
+def test_bucket_hands_out_its_level_without_waiting():
+    bucket = TokenBucket(10)
+
+    assert timed(bucket.acquire(10)) < 0.05
+    assert bucket.level == pytest.approx(0, abs=0.1)
+
+
+def test_bucket_waits_for_the_refill():
+    bucket = TokenBucket(10)
+    # Empty, and full again in 0.1 seconds
+    bucket.update(capacity=10, remaining=0, reset_seconds=0.1)
+
+    assert timed(bucket.acquire(5)) >= 0.04
+
+
+def test_bucket_caps_requests_larger_than_its_capacity():
+    bucket = TokenBucket(10)
+    bucket.update(capacity=10, remaining=10, reset_seconds=0.1)
+
+    assert timed(bucket.acquire(50)) < 0.05
+
+
+def test_bucket_serves_waiters_in_arrival_order():
+    bucket = TokenBucket(10)
+    bucket.update(capacity=10, remaining=0, reset_seconds=0.1)
+    served = []
+
+    async def acquire(name: str, amount: int) -> None:
+        await bucket.acquire(amount)
+        served.append(name)
+
+    async def run() -> None:
+        await asyncio.gather(acquire("large", 8), acquire("small", 1))
+
+    asyncio.run(run())
+
+    assert served == ["large", "small"]
+
+
+def test_limits_are_learned_from_response_headers():
+    limiter = RateLimiter()
+
+    assert limiter.update("gpt-4o", HEADERS)
+
+    requests = limiter._buckets["gpt-4o"]["requests"]
+    tokens = limiter._buckets["gpt-4o"]["tokens"]
+    assert (requests.capacity, requests.level) == (60, 0)
+    assert requests.refill_per_second == pytest.approx(600)
+    assert (tokens.capacity, tokens.level) == (1000, 400)
+    assert tokens.refill_per_second == pytest.approx(600 / 360)
+
+
+def test_responses_without_rate_limit_headers_change_nothing():
+    limiter = RateLimiter()
+
+    assert not limiter.update("gpt-4o", {"x-ratelimit-limit-requests": "60"})
+    assert limiter._buckets == {}
+
+
+def test_unknown_keys_are_not_limited():
+    assert timed(RateLimiter().acquire("gpt-4o", tokens=10**9)) < 0.05
+
+
+def test_configured_limits_apply_before_any_response():
+    limiter = RateLimiter()
+    limiter.configure("gpt-4o", requests_per_minute=60, tokens_per_minute=100)
+    limiter._buckets["gpt-4o"]["tokens"].update(100, 0, reset_seconds=0.1)
+
+    assert timed(limiter.acquire("gpt-4o")) < 0.05
+    assert timed(limiter.acquire("gpt-4o", tokens=50)) >= 0.04
@@ -0,0 +1,179 @@
+import asyncio
+import base64
+import json
+import os
+import uuid
+
+import httpx
+import pytest
+from openai import APIError
+
+from parallex.ai.execution_mode import (
+    AUTO_REALTIME_MAX_REQUESTS,
+    select_execution_mode,
+)
+from parallex.ai.realtime_processor import (
+    process_images_realtime,
+    process_prompts_realtime,
+    send_requests,
+)
+from parallex.file_management.working_directory import working_directories
+from parallex.models.deadline_policy import DeadlinePolicy
+from parallex.models.image_file import ImageFile
+from parallex.utils.constants import CUSTOM_ID_DELINEATOR
+from tests.fakes import FakeOpenAIClient
+
+
+class SlowClient(FakeOpenAIClient):
+    """Records how many completions are in flight at once and fails the prompts it is told to"""
+
+    def __init__(self, failing: tuple = ()):
+        super().__init__()
+        self.failing = failing
+        self.in_flight = 0
+        self.most_in_flight = 0
+
+    async def create_chat_completion(self, body: dict):
+        self.in_flight += 1
+        self.most_in_flight = max(self.most_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if body["messages"][-1]["content"] in self.failing:
+                raise APIError(
+                    "server error", httpx.Request("POST", "https://api"), body=None
+                )
+            return await super().create_chat_completion(body)
+        finally:
+            self.in_flight -= 1
+
+
+def test_auto_selects_realtime_for_small_jobs():
+    assert select_execution_mode("auto", AUTO_REALTIME_MAX_REQUESTS) == "realtime"
+    assert select_execution_mode("auto", AUTO_REALTIME_MAX_REQUESTS + 1) == "batch"
+    assert select_execution_mode("auto", None) == "batch"
+
+
+def test_auto_selects_realtime_for_short_deadlines():
+    assert select_execution_mode("auto", 500, DeadlinePolicy(timeout=60)) == "realtime"
+    assert select_execution_mode("auto", 500, DeadlinePolicy(timeout=None)) == "batch"
+
+
+def test_explicit_modes_are_kept_and_unknown_ones_rejected():
+    assert select_execution_mode("batch", 1) == "batch"
+    assert select_execution_mode("realtime", 10_000) == "realtime"
+    with pytest.raises(ValueError, match="Unknown execution mode"):
+        select_execution_mode("fast", 1)
+
+
+def test_pages_are_sent_with_their_encoding_and_unreadable_ones_skipped(tmp_path):
+    trace_id = uuid.uuid4()
+    image_files = []
+    for page_number in (1, 2, 3):
+        path = tmp_path / f"page-{page_number}.jpeg"
+        if page_number != 2:
+            path.write_bytes(bytes([page_number]) * 10)
+        image_files.append(
+            ImageFile(
+                path=str(path),
+                page_number=page_number,
+                given_file_name="document.pdf",
+                trace_id=trace_id,
+                content_type="image/jpeg",
+            )
+        )
+    client = FakeOpenAIClient()
+
+    async def pages():
+        for image_file in image_files:
+            yield image_file
+
+    output_records = asyncio.run(
+        process_images_realtime(client, pages(), "Read", "gpt-4o", concurrency=2)
+    )
+
+    assert sorted(record["custom_id"] for record in output_records) == [
+        f"{trace_id}{CUSTOM_ID_DELINEATOR}1.jsonl",
+        f"{trace_id}{CUSTOM_ID_DELINEATOR}3.jsonl",
+    ]
+    image_urls = sorted(
+        body["messages"][0]["content"][1]["image_url"]["url"]
+        for body in client.completions
+    )
+    assert image_urls == [
+        "data:image/jpeg;base64," + base64.b64encode(bytes([n]) * 10).decode()
+        for n in (1, 3)
+    ]
+
+
+def test_prompts_are_sent_concurrency_at_a_time_and_failures_left_out():
+    client = SlowClient(failing=("prompt 3",))
+    trace_id = uuid.uuid4()
+    prompts = [f"prompt {index}" for index in range(8)]
+
+    output_records = asyncio.run(
+        process_prompts_realtime(client, prompts, trace_id, "gpt-4o", concurrency=3)
+    )
+
+    assert client.most_in_flight == 3
+    assert len(output_records) == 7
+    assert all(record["response"]["status_code"] == 200 for record in output_records)
+    assert f"{trace_id}{CUSTOM_ID_DELINEATOR}3.jsonl" not in {
+        record["custom_id"] for record in output_records
+    }
+
+
+def test_requests_are_pulled_as_slots_free_up():
+    client = SlowClient()
+    pulled = []
+
+    def requests():
+        for index in range(5):
+            pulled.append(index)
+            yield {
+                "custom_id": str(index),
+                "body": {"messages": [{"role": "user", "content": index}]},
+            }
+
+    async def run():
+        sending = asyncio.create_task(send_requests(client, requests(), concurrency=2))
+        await asyncio.sleep(0.005)
+        assert pulled == [0, 1]
+        return await sending
+
+    output_records = asyncio.run(run())
+
+    assert [
+        json.loads(r["response"]["body"]["choices"][0]["message"]["content"])
+        for r in sorted(output_records, key=lambda r: r["custom_id"])
+    ] == list(range(5))
+
+
+def test_pages_are_deleted_once_read():
+    client = FakeOpenAIClient()
+
+    async def run() -> list[str]:
+        async with working_directories.job() as directory:
+            paths = []
+            for page_number in (1, 2):
+                path = os.path.join(directory, f"page-{page_number}.png")
+                with open(path, "wb") as page:
+                    page.write(b"page")
+                working_directories.track(path)
+                paths.append(path)
+
+            async def pages():
+                for page_number, path in enumerate(paths, start=1):
+                    yield ImageFile(
+                        path=path,
+                        page_number=page_number,
+                        given_file_name="document.pdf",
+                        trace_id=uuid.uuid4(),
+                    )
+
+            await process_images_realtime(
+                client, pages(), "Read", "gpt-4o", concurrency=2
+            )
+            return os.listdir(directory)
+
+    assert asyncio.run(run()) == []
+    assert len(client.completions) == 2
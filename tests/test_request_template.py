@@ -0,0 +1,65 @@
+import json
+
+from pydantic import BaseModel
+
+from parallex.ai.request_template import RequestTemplate, raw_slot, value_slot
+from parallex.ai.uploader import _response_format, image_request_template
+
+TEMPLATE = RequestTemplate(
+    {
+        "custom_id": value_slot("custom_id"),
+        "method": "POST",
+        "body": {
+            "messages": [
+                {
+                    "role": "user",
+                    "content": f"data:image/png;base64,{raw_slot('image')}",
+                }
+            ],
+            "temperature": value_slot("temperature"),
+        },
+    }
+)
+
+
+class Page(BaseModel):
+    text: str
+
+
+def test_template_renders_json_values_and_raw_text():
+    line = TEMPLATE.render(custom_id='doc "1"', temperature=0.5, image="QUJD")
+
+    request = json.loads(line)
+    assert line.endswith("\n")
+    assert request["custom_id"] == 'doc "1"'
+    assert request["body"]["temperature"] == 0.5
+    assert request["body"]["messages"][0]["content"] == "data:image/png;base64,QUJD"
+
+
+def test_template_splits_around_raw_slot():
+    prefix, suffix = TEMPLATE.render_around("image", custom_id="a", temperature=0)
+
+    assert prefix + "QUJD" + suffix == TEMPLATE.render(
+        custom_id="a", temperature=0, image="QUJD"
+    )
+
+
+def test_image_requests_carry_the_strict_response_schema():
+    template = image_request_template("Read the page", "gpt-4o", Page, 0.0, "low")
+
+    request = json.loads(
+        template.render(custom_id="a", content_type="image/jpeg", image="QUJD")
+    )
+
+    response_format = request["body"]["response_format"]
+    assert response_format["json_schema"]["name"] == "Page"
+    assert response_format["json_schema"]["strict"] is True
+    image_url = request["body"]["messages"][0]["content"][1]["image_url"]
+    assert image_url == {"url": "data:image/jpeg;base64,QUJD", "detail": "low"}
+
+
+def test_response_formats_can_be_changed_without_touching_the_cache():
+    response_format = _response_format(Page)
+    response_format["json_schema"]["schema"]["properties"].clear()
+
+    assert "text" in _response_format(Page)["json_schema"]["schema"]["properties"]
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+import parallex.ai.result_cache as result_cache_module
+from parallex.ai.result_cache import ResultCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(result_cache_module, "time", clock)
+    return clock
+
+
+def test_returns_cached_content(tmp_path, clock):
+    cache = ResultCache(str(tmp_path / "results.sqlite"))
+
+    asyncio.run(cache.put_many([("a", "first"), ("b", "second")]))
+
+    assert asyncio.run(cache.get("a")) == "first"
+    assert asyncio.run(cache.get("missing")) is None
+
+
+def test_entries_expire_after_max_age(tmp_path, clock):
+    cache = ResultCache(str(tmp_path / "results.sqlite"), max_age=60)
+    asyncio.run(cache.put_many([("a", "content")]))
+
+    clock.now += 59
+    assert asyncio.run(cache.get("a")) == "content"
+    clock.now += 2
+    assert asyncio.run(cache.get("a")) is None
+
+
+def test_evicts_the_least_recently_used_entries_past_max_bytes(tmp_path, clock):
+    cache = ResultCache(str(tmp_path / "results.sqlite"), max_bytes=20)
+    asyncio.run(cache.put_many([("a", "x" * 8), ("b", "y" * 8)]))
+    clock.now += 1
+    asyncio.run(cache.get("a"))
+
+    clock.now += 1
+    asyncio.run(cache.put_many([("c", "z" * 8)]))
+
+    assert asyncio.run(cache.get("a")) == "x" * 8
+    assert asyncio.run(cache.get("b")) is None
+    assert asyncio.run(cache.get("c")) == "z" * 8
+
+
+def test_persists_across_instances(tmp_path, clock):
+    path = str(tmp_path / "results.sqlite")
+    cache = ResultCache(path)
+    asyncio.run(cache.put_many([("a", "content")]))
+    cache.close()
+
+    assert asyncio.run(ResultCache(path).get("a")) == "content"
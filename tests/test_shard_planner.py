@@ -0,0 +1,52 @@
+import pytest
+
+from parallex.ai.shard_planner import ShardPlanner
+
+
+def fits(planner: ShardPlanner, **overrides) -> bool:
+    arguments = dict(
+        shard_bytes=0,
+        shard_requests=1,
+        shard_tokens=0,
+        line_bytes=10,
+        line_tokens=0,
+        total_requests=None,
+    )
+    arguments.update(overrides)
+    return planner.fits(**arguments)
+
+
+def test_seals_before_the_byte_limit():
+    planner = ShardPlanner(max_bytes=100)
+
+    assert fits(planner, shard_bytes=90, line_bytes=10)
+    assert not fits(planner, shard_bytes=91, line_bytes=10)
+
+
+def test_seals_before_the_request_limit():
+    planner = ShardPlanner(max_requests=3)
+
+    assert fits(planner, shard_requests=2)
+    assert not fits(planner, shard_requests=3)
+
+
+def test_token_limit_applies_only_when_set():
+    assert fits(ShardPlanner(), shard_tokens=10**9, line_tokens=10**9)
+
+    planner = ShardPlanner(max_tokens=1000)
+    assert fits(planner, shard_tokens=900, line_tokens=100)
+    assert not fits(planner, shard_tokens=901, line_tokens=100)
+
+
+def test_target_batches_balances_requests():
+    planner = ShardPlanner(max_requests=50, target_batches=4)
+
+    assert planner.requests_per_shard(None) == 50
+    assert planner.requests_per_shard(10) == 3
+    assert planner.requests_per_shard(1000) == 50
+    assert not fits(planner, shard_requests=3, total_requests=10)
+
+
+def test_target_batches_must_be_positive():
+    with pytest.raises(ValueError):
+        ShardPlanner(target_batches=0)
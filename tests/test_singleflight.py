@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from parallex.utils.singleflight import Singleflight
+
+
+def test_concurrent_callers_share_one_execution():
+    flights = Singleflight()
+    runs = []
+
+    async def work() -> str:
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def run():
+        results = await asyncio.gather(*(flights.run("key", work) for _ in range(3)))
+        assert not flights.in_flight("key")
+        return results
+
+    assert asyncio.run(run()) == ["result"] * 3
+    assert len(runs) == 1
+
+
+def test_followers_receive_the_error_of_the_leader():
+    flights = Singleflight()
+
+    async def work() -> None:
+        await asyncio.sleep(0.01)
+        raise ValueError("broken")
+
+    async def run():
+        return await asyncio.gather(
+            flights.run("key", work), flights.run("key", work), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+
+    assert [type(result) for result in results] == [ValueError, ValueError]
+
+
+def test_a_follower_runs_the_work_when_the_leader_is_cancelled():
+    flights = Singleflight()
+    runs = []
+
+    async def work() -> int:
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return len(runs)
+
+    async def run():
+        leader = asyncio.create_task(flights.run("key", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.run("key", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(run()) == 2
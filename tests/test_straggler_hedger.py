@@ -0,0 +1,102 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+
+import parallex.ai.batch_poller as batch_poller_module
+from parallex.ai.straggler_hedger import hedge_batch
+from parallex.exceptions.BatchDeadlineError import BatchDeadlineError
+from parallex.models.deadline_policy import DeadlinePolicy
+from parallex.models.upload_batch import UploadBatch, build_batch
+from parallex.parallex import _wait_and_collect
+from parallex.utils.iterators import as_async_iterator
+from tests.fakes import FakeOpenAIClient, make_batch
+
+POLICY = DeadlinePolicy(timeout=0.05, hedge=True, cancel_grace=1)
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(batch_poller_module, "MIN_POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(batch_poller_module, "MAX_POLL_INTERVAL", 0.05)
+
+
+def request(index: int) -> dict:
+    return {
+        "custom_id": f"page-{index}",
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {"model": "gpt-4o", "messages": [{"role": "user", "content": index}]},
+    }
+
+
+def output_record(index: int) -> dict:
+    body = {"choices": [{"message": {"content": json.dumps(index)}}]}
+    return {
+        "custom_id": f"page-{index}",
+        "response": {"status_code": 200, "body": body},
+    }
+
+
+@pytest.fixture
+def straggler(tmp_path) -> tuple[FakeOpenAIClient, UploadBatch]:
+    """A batch of three requests that never finishes on its own and completed the first before cancelling"""
+    input_file_path = tmp_path / "shard.jsonl"
+    input_file_path.write_text(
+        "".join(json.dumps(request(index)) + "\n" for index in range(3))
+    )
+    client = FakeOpenAIClient({"batch-1": ["in_progress"]})
+    client.output_file_ids["batch-1"] = "output-1"
+    client.files["output-1"] = (json.dumps(output_record(0)) + "\n").encode()
+    batch = build_batch(make_batch("batch-1", "validating"), trace_id=uuid.uuid4())
+    batch.input_file_path = str(input_file_path)
+    return client, batch
+
+
+async def collect_ids(output_records) -> list[str]:
+    return [record["custom_id"] async for record in as_async_iterator(output_records)]
+
+
+def test_hedging_sends_the_unfinished_requests_realtime(straggler):
+    client, batch = straggler
+
+    output_records = asyncio.run(hedge_batch(client, batch, POLICY))
+
+    assert client.cancelled == ["batch-1"]
+    assert [body["messages"][0]["content"] for body in client.completions] == [1, 2]
+    assert sorted(record["custom_id"] for record in output_records) == [
+        "page-0",
+        "page-1",
+        "page-2",
+    ]
+
+
+def test_batches_past_the_deadline_are_hedged_when_collected(straggler):
+    client, batch = straggler
+
+    custom_ids = asyncio.run(
+        _wait_and_collect(batch, client, asyncio.Semaphore(1), collect_ids, POLICY)
+    )
+
+    assert sorted(custom_ids) == ["page-0", "page-1", "page-2"]
+
+
+def test_batches_past_the_deadline_fail_without_hedging(straggler):
+    client, batch = straggler
+    policy = POLICY.model_copy(update={"hedge": False})
+
+    with pytest.raises(BatchDeadlineError):
+        asyncio.run(
+            _wait_and_collect(batch, client, asyncio.Semaphore(1), collect_ids, policy)
+        )
+
+    assert client.cancelled == []
+
+
+def test_batches_without_an_input_file_cannot_be_hedged(straggler):
+    client, batch = straggler
+    batch.input_file_path = None
+
+    with pytest.raises(BatchDeadlineError, match="not available to hedge"):
+        asyncio.run(hedge_batch(client, batch, POLICY))
@@ -0,0 +1,38 @@
+import asyncio
+
+from parallex.parallex import _as_completed
+
+
+async def finish_after(seconds: float, result: str) -> str:
+    await asyncio.sleep(seconds)
+    return result
+
+
+def test_results_are_yielded_in_the_order_tasks_finish():
+    async def run() -> list[str]:
+        tasks = [
+            asyncio.create_task(finish_after(0.03, "slow")),
+            asyncio.create_task(finish_after(0.01, "fast")),
+            asyncio.create_task(finish_after(0.02, "medium")),
+        ]
+        return [result async for result in _as_completed(tasks)]
+
+    assert asyncio.run(run()) == ["fast", "medium", "slow"]
+
+
+def test_closing_early_cancels_the_unfinished_tasks():
+    async def run() -> list[asyncio.Task]:
+        tasks = [
+            asyncio.create_task(finish_after(0.01, "fast")),
+            asyncio.create_task(finish_after(10, "slow")),
+        ]
+        results = _as_completed(tasks)
+        assert await anext(results) == "fast"
+        await results.aclose()
+        await asyncio.sleep(0)
+        return tasks
+
+    fast, slow = asyncio.run(run())
+
+    assert fast.result() == "fast"
+    assert slow.cancelled()
@@ -0,0 +1,139 @@
+import asyncio
+import os
+import uuid
+
+import parallex.file_management.page_cache as page_cache_module
+from parallex.file_management.document_stream import render_pages
+from parallex.file_management.working_directory import (
+    WorkingDirectories,
+    working_directories,
+)
+from parallex.models.encoding_stats import EncodingStats
+from parallex.models.image_encoding import IMAGE_ENCODINGS
+from parallex.models.image_file import ImageFile
+from parallex.models.raw_file import RawFile
+from parallex.models.render_profile import DEFAULT_RENDER_PROFILE, RENDER_PROFILES
+
+
+def write_file(directory: str, name: str, size: int) -> str:
+    path = os.path.join(directory, name)
+    with open(path, "wb") as file:
+        file.write(b"\0" * size)
+    return path
+
+
+def test_job_directories_are_removed_with_their_files(tmp_path):
+    directories = WorkingDirectories(root=str(tmp_path))
+
+    async def run() -> str:
+        async with directories.job() as directory:
+            directories.track(write_file(directory, "page.png", 100))
+            assert directories.used_bytes == 100
+        return directory
+
+    directory = asyncio.run(run())
+
+    assert not os.path.exists(directory)
+    assert directories.used_bytes == 0
+
+
+def test_discarding_a_file_frees_its_bytes(tmp_path):
+    directories = WorkingDirectories(root=str(tmp_path), job_max_bytes=100)
+
+    async def run() -> None:
+        async with directories.job() as directory:
+            path = write_file(directory, "page.png", 100)
+            directories.track(path)
+            assert not directories.has_room(directory)
+            directories.discard(path)
+            assert not os.path.exists(path)
+            assert directories.has_room(directory)
+
+    asyncio.run(run())
+
+
+def test_jobs_wait_for_room_until_files_are_discarded(tmp_path):
+    directories = WorkingDirectories(root=str(tmp_path), max_bytes=150)
+    events = []
+
+    async def first_job(written: asyncio.Event, release: asyncio.Event) -> None:
+        async with directories.job() as directory:
+            path = write_file(directory, "page.png", 200)
+            directories.track(path)
+            written.set()
+            await release.wait()
+            events.append("discarded")
+            directories.discard(path)
+
+    async def second_job(written: asyncio.Event) -> None:
+        await written.wait()
+        async with directories.job() as directory:
+            await directories.wait_for_room(directory)
+            events.append("room")
+
+    async def run() -> None:
+        written, release = asyncio.Event(), asyncio.Event()
+        jobs = asyncio.gather(first_job(written, release), second_job(written))
+        await written.wait()
+        await asyncio.sleep(0.01)
+        assert events == []
+        release.set()
+        await jobs
+
+    asyncio.run(run())
+
+    assert events == ["discarded", "room"]
+
+
+def test_files_outside_job_directories_are_not_tracked(tmp_path):
+    directories = WorkingDirectories(root=str(tmp_path / "jobs"))
+    path = write_file(str(tmp_path), "other.png", 100)
+
+    directories.track(path)
+    directories.discard(path)
+
+    assert directories.used_bytes == 0
+    assert os.path.exists(path)
+
+
+def test_raw_files_are_deleted_once_their_pages_are_rendered(monkeypatch):
+    rendered = []
+
+    async def stream_pdf_to_images(raw_file, temp_directory, render_profile):
+        path = write_file(temp_directory, "page-1.png", 10)
+        rendered.append(os.path.exists(raw_file.path))
+        yield ImageFile(
+            path=path,
+            page_number=1,
+            given_file_name=raw_file.given_name,
+            trace_id=raw_file.trace_id,
+        )
+
+    monkeypatch.setattr(page_cache_module, "stream_pdf_to_images", stream_pdf_to_images)
+
+    async def run() -> None:
+        async with working_directories.job() as directory:
+            trace_id = uuid.uuid4()
+            raw_file = RawFile(
+                name=f"{trace_id}.pdf",
+                path=write_file(directory, f"{trace_id}.pdf", 100),
+                content_type="application/pdf",
+                given_name="document.pdf",
+                trace_id=trace_id,
+            )
+            working_directories.track(raw_file.path)
+            used_bytes = working_directories.used_bytes
+            pages = render_pages(
+                raw_file=raw_file,
+                temp_directory=directory,
+                render_profile=RENDER_PROFILES[DEFAULT_RENDER_PROFILE],
+                image_encoding=IMAGE_ENCODINGS["lossless"],
+                stats=EncodingStats(encoding="lossless"),
+            )
+            assert [page.page_number async for page in pages] == [1]
+            assert not os.path.exists(raw_file.path)
+            assert working_directories.used_bytes == used_bytes - 100
+
+    asyncio.run(run())
+
+    assert rendered == [True]